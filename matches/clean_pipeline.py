@@ -0,0 +1,184 @@
+import argparse
+import glob
+import os
+import re
+import time
+
+import pandas as pd
+
+from csv_reader import TournamentFile
+from dedup import open_index
+from match_store import COLUMNS, STORE_PATH, StoreWriter
+
+# One pass from turneringer/*.csv to the match store, replacing the combineMatch.py ->
+# fjern_tab.py -> fjerne_duplicates.py -> remove_duplicates_json.py chain. Rows are
+# streamed through generator stages and written in batches, so memory stays bounded by
+# the batch size and the set of match keys seen so far.
+#
+#   read       rows of every CSV whose header matches COLUMNS
+#   repair     the column-shift repair from fjern_tab.py
+#   normalise  '' and 'NaN' -> null
+#   dedup      first row of every match (dedup.MATCH_KEY, partners in either order)
+
+INPUT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'turneringer')
+
+# A shifted row has its set scores one column too far left, in "Team 2 Player 2"
+SCORE = re.compile(r'^\d+/\d+')
+
+MISSING = {'', 'NaN'}
+
+
+# The column moves that put each kind of shifted row back in place, as (column, column
+# its value comes from); None clears the column. All sources are read before any is written.
+SHIFT_REPAIRS = {
+    # A doubles match: every value from Tab on is one column too far left
+    'doubles': [("Team 1 Player 1", "Tab"), ("Team 1 Player 2", "Team 1 Player 1"),
+                ("Team 2 Player 1", "Team 1 Player 2"), ("Team 2 Player 2", "Team 2 Player 1"),
+                ("Result", "Team 2 Player 2"), ("Winner Player 1", "Result"), ("Winner Player 2", "Winner Player 1")],
+    # A singles match: the second player is in Tab
+    'singles': [("Tab", None), ("Team 2 Player 1", "Tab"), ("Team 2 Player 2", "Team 2 Player 1"),
+                ("Result", "Team 2 Player 2"), ("Winner Player 1", "Result"), ("Winner Player 2", None)],
+    # A singles match with an empty Tab: the players are in place, the result and winner are not
+    'singles, empty tab': [("Team 2 Player 2", None), ("Result", "Team 2 Player 2"), ("Winner Player 1", "Result"),
+                           ("Winner Player 2", None)],
+}
+
+
+def shift_kind(row):
+    """The SHIFT_REPAIRS kind of a row, or None if its set scores are not in "Team 2 Player 2"."""
+    if not row["Team 2 Player 2"] or not SCORE.match(row["Team 2 Player 2"]):
+        return None
+    if row["Tab"]:
+        return 'doubles' if row["Team 1 Player 2"] else 'singles'
+    return 'singles, empty tab'
+
+
+def fix_row(row):
+    """Move the values of a shifted row back into their columns; returns the kind of repair, or None."""
+    kind = shift_kind(row)
+    if kind:
+        # The list is built before update() writes, so every source is read first
+        row.update([(column, row[source] if source else "") for column, source in SHIFT_REPAIRS[kind]])
+    return kind
+
+
+class Stage:
+    """Row count, time and notes of one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.seconds = 0.0  # including the stages before it
+        self.notes = {}
+
+    def note(self, what, count=1):
+        self.notes[what] = self.notes.get(what, 0) + count
+
+    def timed(self, rows):
+        rows = iter(rows)
+        while True:
+            start = time.perf_counter()
+            try:
+                row = next(rows)
+            except StopIteration:
+                self.seconds += time.perf_counter() - start
+                return
+            self.seconds += time.perf_counter() - start
+            self.rows += 1
+            yield row
+
+
+def read_rows(files, stage):
+    for path in files:
+        with TournamentFile(path) as f:
+            if f.encoding != 'utf-8':
+                stage.note(f.encoding + ' files')
+            reader = f.rows()
+            if next(reader, None) != COLUMNS:
+                stage.note('files with another header')
+                continue
+            stage.note('files')
+            for values in reader:
+                if len(values) == len(COLUMNS) - 1:
+                    # The scraper leaves out the last column of every row
+                    values.append('')
+                elif len(values) != len(COLUMNS):
+                    stage.note('rows with %d fields' % len(values))
+                    continue
+                yield dict(zip(COLUMNS, values))
+
+
+def repair(rows, stage):
+    for row in rows:
+        kind = fix_row(row)
+        if kind:
+            stage.note('repaired ' + kind)
+        yield row
+
+
+def normalise(rows, stage):
+    for row in rows:
+        for column, value in row.items():
+            if value in MISSING:
+                row[column] = None
+        yield row
+
+
+def dedup(rows, stage, index):
+    for row in rows:
+        if not index.add(row):
+            stage.note('duplicates')
+            continue
+        yield row
+
+
+def run(files, output=STORE_PATH, batch_rows=20000, dedup_db=None):
+    """Stream files through every stage into the store at output; returns the stages.
+
+    dedup_db keeps the seen match keys in a temporary SQLite file instead of memory.
+    """
+    stages = [Stage(name) for name in ('read', 'repair', 'normalise', 'dedup')]
+    index = open_index(dedup_db)
+    rows = stages[0].timed(read_rows(files, stages[0]))
+    rows = stages[1].timed(repair(rows, stages[1]))
+    rows = stages[2].timed(normalise(rows, stages[2]))
+    rows = stages[3].timed(dedup(rows, stages[3], index))
+
+    write = Stage('write')
+    with StoreWriter(output) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                start = time.perf_counter()
+                writer.write(pd.DataFrame(batch, columns=COLUMNS))
+                write.seconds += time.perf_counter() - start
+                batch = []
+        start = time.perf_counter()
+        writer.write(pd.DataFrame(batch, columns=COLUMNS))
+        write.seconds += time.perf_counter() - start
+        write.rows = writer.rows
+    index.close()
+    return stages + [write]
+
+
+def print_stages(stages):
+    print(f"{'stage':<11}{'rows':>9}{'seconds':>9}  notes")
+    before = 0.0
+    for stage in stages:
+        # Stage.seconds includes the stages upstream of it; write is timed on its own
+        seconds = stage.seconds if stage.name == 'write' else stage.seconds - before
+        before = stage.seconds if stage.name != 'write' else before
+        notes = ', '.join(f'{what} {count}' for what, count in stage.notes.items())
+        print(f'{stage.name:<11}{stage.rows:>9}{seconds:>9.2f}  {notes}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Clean turneringer/*.csv into the match store in one pass.')
+    parser.add_argument('--input', default=INPUT_FOLDER, help='folder of per-tournament CSVs')
+    parser.add_argument('--output', default=STORE_PATH)
+    parser.add_argument('--batch-rows', type=int, default=20000, help='rows per Parquet row group')
+    parser.add_argument('--dedup-db', help='keep the dedup index in this temporary SQLite file')
+    args = parser.parse_args()
+
+    print_stages(run(sorted(glob.glob(os.path.join(args.input, '*.csv'))), args.output, args.batch_rows, args.dedup_db))
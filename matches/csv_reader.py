@@ -0,0 +1,97 @@
+import codecs
+import csv
+import io
+import mmap
+import unicodedata
+
+import pandas as pd
+
+# Shared reader for the per-tournament CSVs in turneringer/, used by every cleaning tool
+# (match_store.read_tournament_csv, ingest.py, clean_pipeline.py). The scrapers write
+# UTF-8, but older copies of the files are ISO-8859-1, and a name like "Flåtten" read with
+# the wrong codec (or in decomposed form) becomes a second player downstream. Each file
+# is therefore decoded and normalised to NFC UTF-8 once, here.
+#
+# A file that already is NFC UTF-8 (all the scraper writes) is not copied: it is
+# memory-mapped, and lines() hands out memoryview slices of the mapping. Other files are
+# transcoded once into an in-memory buffer that is sliced the same way.
+
+ENCODINGS = ['utf-8', 'iso-8859-1']
+
+
+def normalise(data):
+    """(NFC UTF-8 bytes or None if data already is that, offset past a BOM, source encoding) of a file's bytes."""
+    start = len(codecs.BOM_UTF8) if data[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+    view = memoryview(data)[start:]
+    try:
+        for encoding in ENCODINGS:
+            try:
+                text = codecs.decode(view, encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+    finally:
+        view.release()
+    if encoding == 'utf-8' and unicodedata.is_normalized('NFC', text):
+        return None, start, encoding
+    return unicodedata.normalize('NFC', text).encode('utf-8'), 0, encoding
+
+
+class TournamentFile:
+    """One per-tournament CSV as NFC UTF-8, memory-mapped where possible.
+
+    The slices from lines() point into the file's buffer; keep them only while the file is open.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                self.map = None
+        normalised, self.start, self.encoding = normalise(self.map if self.map is not None else b'')
+        # The bytes every reader works on: the mapping itself, or the transcoded copy
+        self.data = normalised if normalised is not None else self.map if self.map is not None else b''
+        self.transcoded = normalised is not None
+
+    def lines(self):
+        """Every line (with its line break) as a memoryview slice of the buffer."""
+        data, position, end = self.data, self.start, len(self.data)
+        while position < end:
+            newline = data.find(b'\n', position)
+            stop = end if newline < 0 else newline + 1
+            # No view is held between lines, so an abandoned generator does not keep the mapping open
+            yield memoryview(data)[position:stop]
+            position = stop
+
+    def rows(self):
+        """Every row as a list of strings, header included, as csv.reader gives them."""
+        return csv.reader(str(line, 'utf-8') for line in self.lines())
+
+    def frame(self, names=None, **kwargs):
+        """The file as a DataFrame of strings with empty cells as nulls; names replaces the header row."""
+        source = self.map if not self.transcoded and self.map is not None else io.BytesIO(self.data)
+        source.seek(self.start)
+        options = dict(dtype=str, keep_default_na=False, na_values=[''], index_col=False)
+        if names is not None:
+            options.update(names=names, header=0)
+        options.update(kwargs)
+        return pd.read_csv(source, encoding='utf-8', **options)
+
+    def close(self):
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # A caller still holds a slice; the mapping is closed when the last one is freed
+                pass
+            self.map = None
+        self.data = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
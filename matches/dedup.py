@@ -0,0 +1,114 @@
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+
+# What makes two match rows the same match, shared by the cleaning tools. The key is a
+# list of columns; the players of a team are sorted, so a pair listed as "B & A" in one
+# file and "A & B" in another is one match.
+#
+# Streams keep only a 64-bit hash of each key: in a set (DedupIndex) or, to keep memory
+# flat however much history is merged, in a temporary SQLite table (SqliteDedupIndex).
+
+MATCH_KEY = ['Season', 'Tournament Name', 'Date', 'Team 1 Player 1', 'Team 1 Player 2', 'Team 2 Player 1', 'Team 2 Player 2']
+
+TEAMS = [('Team 1 Player 1', 'Team 1 Player 2'), ('Team 2 Player 1', 'Team 2 Player 2')]
+
+# Separates the key fields before hashing; it does not occur in the data
+SEPARATOR = '\x1f'
+
+
+def canonical_values(row, key=MATCH_KEY):
+    """The key fields of a row as strings ('' for missing), with the players of each team sorted."""
+    values = {column: row[column] or '' for column in key}
+    for first, second in TEAMS:
+        if first in values and second in values and values[second] < values[first]:
+            values[first], values[second] = values[second], values[first]
+    return [values[column] for column in key]
+
+
+def key_hash(values):
+    """Signed 64-bit BLAKE2b hash of the key values (signed so it fits an SQLite INTEGER)."""
+    digest = hashlib.blake2b(SEPARATOR.join(values).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+class DedupIndex:
+    """The key hashes seen so far, in memory."""
+
+    def __init__(self, key=MATCH_KEY):
+        self.key = key
+        self.hashes = set()
+
+    def add(self, row):
+        """Record the row's key; False if it was seen before."""
+        return self.add_hash(key_hash(canonical_values(row, self.key)))
+
+    def add_hash(self, value):
+        if value in self.hashes:
+            return False
+        self.hashes.add(value)
+        return True
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def close(self):
+        self.hashes = set()
+
+
+class SqliteDedupIndex(DedupIndex):
+    """The key hashes seen so far, in a temporary SQLite file that is removed on close."""
+
+    def __init__(self, path, key=MATCH_KEY, commit_every=100000):
+        super().__init__(key)
+        self.path = path
+        if os.path.exists(path):
+            os.remove(path)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=OFF')
+        self.conn.execute('PRAGMA synchronous=OFF')
+        self.conn.execute('CREATE TABLE hashes (hash INTEGER PRIMARY KEY) WITHOUT ROWID')
+        self.commit_every = commit_every
+        self.pending = 0
+        self.count = 0
+
+    def add_hash(self, value):
+        cursor = self.conn.execute('INSERT OR IGNORE INTO hashes VALUES (?)', (value,))
+        if cursor.rowcount == 0:
+            return False
+        self.count += 1
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.conn.commit()
+            self.pending = 0
+        return True
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.conn.close()
+        os.remove(self.path)
+
+
+def open_index(path=None, key=MATCH_KEY):
+    """An in-memory index, or an on-disk one at path."""
+    return SqliteDedupIndex(path, key) if path else DedupIndex(key)
+
+
+def canonical_frame(df, key=MATCH_KEY):
+    """The key columns of a frame as strings, with the players of each team sorted."""
+    keys = df[key].astype('string').fillna('')
+    for first, second in TEAMS:
+        if first in keys.columns and second in keys.columns:
+            a, b = keys[first].to_numpy(dtype=object), keys[second].to_numpy(dtype=object)
+            swap = b < a
+            keys[first], keys[second] = np.where(swap, b, a), np.where(swap, a, b)
+    return keys
+
+
+def drop_duplicate_matches(df, key=MATCH_KEY):
+    """The first row of every match in df."""
+    return df[~canonical_frame(df, key).duplicated()]
@@ -1,35 +1,105 @@
-import csv
-
-def fix_csv(input_filename, output_filename):
-    with open(input_filename, 'r', newline='', encoding='iso-8859-1') as infile, open(output_filename, 'w', newline='', encoding='iso-8859-1') as outfile:
-        reader = csv.DictReader(infile)
-        fieldnames = reader.fieldnames
-        
-        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for row in reader:
-            if row["Tab"]:
-                if row["Team 1 Player 2"]:
-                    # This is a doubles match
-                    row["Winner Player 2"] = row["Winner Player 1"]
-                    row["Winner Player 1"] = row["Result"]
-                    row["Result"] = row["Team 2 Player 2"]
-                    row["Team 2 Player 2"] = row["Team 2 Player 1"]
-                    row["Team 2 Player 1"] = row["Team 1 Player 2"]
-                    row["Team 1 Player 2"] = row["Team 1 Player 1"]
-                    row["Team 1 Player 1"] = row["Tab"]
-                else:
-                    # This is a singles match
-                    row["Winner Player 2"] = ""
-                    row["Winner Player 1"] = row["Result"]
-                    row["Result"] = row["Team 2 Player 2"]
-                    row["Team 2 Player 2"] = row["Team 2 Player 1"]
-                    row["Team 2 Player 1"] = row["Tab"]
-                    row["Tab"] = ""
-            writer.writerow(row)
-
-input_filename = "C:\\Users\\Torstein\\Documents\\rankinglist-master (2)\\rankinglist-master\\badmintonstats\\matches\\all_matches_combined.csv"
-output_filename = "C:\\Users\\Torstein\\Documents\\rankinglist-master (2)\\rankinglist-master\\badmintonstats\\matches\\all_matches_combined_fixed.csv"
-
-fix_csv(input_filename, output_filename)
+import argparse
+import time
+from collections import Counter
+
+import pandas as pd
+
+from clean_pipeline import SCORE, SHIFT_REPAIRS, fix_row
+from match_store import STORE_PATH, read_matches, write_matches
+
+# Repairs the rows of the match store whose values sit one column too far left (see
+# clean_pipeline.SHIFT_REPAIRS). By default the repair is vectorized: shifted rows are
+# found with column masks and every column block is moved for all rows of a kind at once.
+# Rows already in place are left alone, so running it twice changes nothing.
+#
+#   python fjern_tab.py            repair the store and print what was repaired
+#   python fjern_tab.py --rows     the old row-by-row repair, for comparison
+
+# Columns a score may have been shifted into, for the report of unknown patterns
+SHIFTABLE = ['Tab', 'Team 1 Player 1', 'Team 1 Player 2', 'Team 2 Player 1', 'Team 2 Player 2', 'Result',
+             'Winner Player 1', 'Winner Player 2']
+
+
+def present(column):
+    return column.notna() & (column != '')
+
+
+def has_score(column):
+    return column.str.match(SCORE).fillna(False).astype(bool)
+
+
+def shift_masks(values):
+    """{kind: boolean mask} of the rows of each SHIFT_REPAIRS kind, for a dict of string columns."""
+    shifted = has_score(values['Team 2 Player 2'])
+    tab = present(values['Tab'])
+    return {
+        'doubles': shifted & tab & present(values['Team 1 Player 2']),
+        'singles': shifted & tab & ~present(values['Team 1 Player 2']),
+        'singles, empty tab': shifted & ~tab,
+    }
+
+
+def repair_shifts(data):
+    """(repaired copy of data, Counter of rows per kind of repair and of rows left alone)."""
+    columns = {column for moves in SHIFT_REPAIRS.values() for move in moves for column in move if column}
+    values = {column: data[column].astype('string') for column in columns}
+    masks = shift_masks(values)
+
+    repaired = dict(values)
+    report = Counter()
+    for kind, mask in masks.items():
+        report['repaired ' + kind] = int(mask.sum())
+        if not mask.any():
+            continue
+        for column, source in SHIFT_REPAIRS[kind]:
+            # Sources come from values, the columns as they were before any move
+            new = values[source] if source else pd.Series(pd.NA, index=data.index, dtype='string')
+            repaired[column] = repaired[column].mask(mask, new)
+
+    # Shift patterns without a repair: a score left in some column other than Result
+    untouched = ~pd.concat(list(masks.values()), axis=1).any(axis=1)
+    in_place = untouched & has_score(repaired['Result'])
+    report['in place'] = int(in_place.sum())
+    left = untouched & ~in_place
+    for column in SHIFTABLE:
+        if column != 'Result' and left.any():
+            stray = left & has_score(values[column])
+            if stray.any():
+                report[f'score in {column}, not repaired'] = int(stray.sum())
+                left &= ~stray
+    report['no score'] = int(left.sum())
+
+    data = data.copy()
+    for column, value in repaired.items():
+        data[column] = value
+    return data, report
+
+
+def fix_rows(data):
+    """Move the values of shifted rows back into their columns, one row at a time."""
+    rows = data.astype(object).where(data.notna(), '').to_dict('records')
+    report = Counter()
+    for row in rows:
+        kind = fix_row(row)
+        report['repaired ' + kind if kind else 'not repaired'] += 1
+    return pd.DataFrame(rows, columns=data.columns), report
+
+
+def fix_store(path=STORE_PATH, by_row=False):
+    """Repair the store in place; returns the report."""
+    data = read_matches(path)
+    start = time.perf_counter()
+    data, report = fix_rows(data) if by_row else repair_shifts(data)
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    write_matches(data, path)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Repair the shifted rows of the match store.')
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--rows', action='store_true', help='repair one row at a time instead of vectorized')
+    args = parser.parse_args()
+
+    for what, count in fix_store(args.store, args.rows).items():
+        print(f'{what:<40}{count:>10}')
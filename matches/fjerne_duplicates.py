@@ -1,11 +1,12 @@
-import pandas as pd
-file_path = r'C:\Users\Torstein\Documents\rankinglist-master (2)\rankinglist-master\badmintonstats\matches\all_matches_combined_fixed.csv'
-# Read the CSV file
-data = pd.read_csv(file_path, encoding='ISO-8859-1')
+from dedup import drop_duplicate_matches
+from match_store import STORE_PATH, read_matches, write_matches
 
+# Read the match store
+data = read_matches(STORE_PATH)
 
-# Remove duplicates
-data_no_duplicates = data.drop_duplicates()
+# Remove duplicates (same match key as remove_duplicates_json.py, see dedup.py)
+data_no_duplicates = drop_duplicate_matches(data)
 
-# Save the cleaned data back to a CSV
-data_no_duplicates.to_csv("cleaned_file.csv", index=False, encoding='ISO-8859-1')
+# Save the cleaned data back to the store
+write_matches(data_no_duplicates, STORE_PATH)
+print(f"Removed {len(data) - len(data_no_duplicates)} duplicate rows")
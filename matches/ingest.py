@@ -0,0 +1,76 @@
+import argparse
+import glob
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from csv_reader import TournamentFile
+from match_store import COLUMNS, STORE_PATH, write_matches
+
+# Parallel first stage of the match store build: every per-tournament CSV is parsed by a
+# pool of processes, one file per task. Each worker reads its file through csv_reader
+# (encoding detected, names normalised) and turns empty cells into nulls in read_csv,
+# so no Python loop touches single cells. The frames come back in the order of the
+# (sorted) file list, so the store is the same whatever the number of workers.
+#
+#   python ingest.py                   turneringer/*.csv -> matches/matches.parquet
+#   python ingest.py --workers 1       parse in this process only
+
+INPUT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'turneringer')
+
+
+def read_file(path):
+    """(encoding, match rows) of one per-tournament CSV."""
+    with TournamentFile(path) as f:
+        return f.encoding, f.frame(COLUMNS)
+
+
+def ingest(files, workers=None, chunksize=8):
+    """Match rows of every file, in file order, and a count of the files per encoding.
+
+    workers defaults to one process per CPU; with one worker the files are parsed here.
+    chunksize files are sent to a worker at a time, which saves round trips for small files.
+    """
+    workers = min(workers or os.cpu_count() or 1, max(len(files), 1))
+    if workers == 1:
+        return merge(map(read_file, files))
+    with ProcessPoolExecutor(workers) as executor:
+        # map() yields results in the order of files, whichever worker finishes first
+        return merge(executor.map(read_file, files, chunksize=chunksize))
+
+
+def merge(results):
+    encodings = Counter()
+    frames = []
+    for encoding, df in results:
+        encodings[encoding] += 1
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS, dtype=str), encodings
+    return pd.concat(frames, ignore_index=True), encodings
+
+
+def build_store(input_folder=INPUT_FOLDER, path=STORE_PATH, workers=None):
+    """Read every per-tournament CSV in input_folder into the store; returns the number of rows."""
+    df, _ = ingest(sorted(glob.glob(os.path.join(input_folder, '*.csv'))), workers)
+    write_matches(df, path)
+    return len(df)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parse turneringer/*.csv in parallel into the match store.')
+    parser.add_argument('--input', default=INPUT_FOLDER, help='folder of per-tournament CSVs')
+    parser.add_argument('--output', default=STORE_PATH)
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df, encodings = ingest(sorted(glob.glob(os.path.join(args.input, '*.csv'))), args.workers)
+    parsed = time.perf_counter()
+    write_matches(df, args.output)
+    print(f"{sum(encodings.values())} files ({', '.join(f'{n} {e}' for e, n in sorted(encodings.items()))}), "
+          f"{len(df)} rows")
+    print(f'parse {parsed - start:.2f}s, write {time.perf_counter() - parsed:.2f}s')
@@ -0,0 +1,116 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from csv_reader import TournamentFile
+
+# The canonical match history: every row of turneringer/*.csv in one Parquet file.
+# Season, tournament, class, match type and the player columns are stored as
+# dictionary-encoded categoricals, Date as a datetime and missing values as nulls
+# (not the 'NaN' strings the old CSV tools wrote).
+#
+#   viktig/combineMatch.py, ingest.py  turneringer/*.csv -> store, parsed in parallel
+#   matches/fjern_tab.py               repairs shifted rows in place
+#   matches/fjerne_duplicates.py       drops exact duplicates
+#   src/remove_duplicates_json.py      drops duplicate matches by season/tournament/date/players
+#   src/report.py                      reads one season straight from the store
+
+STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'matches.parquet')
+
+# Rows per row group of a store written in one go, as clean_pipeline.py writes its batches;
+# player_index.py reads only the row groups holding a player's rows
+ROW_GROUP_ROWS = 20000
+
+# Same layout as viktig/match_parser.HEADER
+COLUMNS = ['Season', 'Tournament Name', 'Date', 'Tournament Class', 'Match', 'Tab', 'Team 1 Player 1', 'Team 1 Player 2',
+           'Team 2 Player 1', 'Team 2 Player 2', 'Result', 'Winner Player 1', 'Winner Player 2']
+PLAYER_COLUMNS = ['Team 1 Player 1', 'Team 1 Player 2', 'Team 2 Player 1', 'Team 2 Player 2', 'Winner Player 1', 'Winner Player 2']
+CATEGORY_COLUMNS = ['Season', 'Tournament Name', 'Tournament Class', 'Match', 'Tab']
+
+# Fixed Arrow schema, so row groups written separately by StoreWriter line up
+SCHEMA = pa.schema([(c, pa.timestamp('us')) if c == 'Date' else (c, pa.string()) if c == 'Result'
+                    else (c, pa.dictionary(pa.int32(), pa.string())) for c in COLUMNS])
+
+
+def read_tournament_csv(path):
+    """One per-tournament CSV as strings. Short rows are padded with nulls, as csv.DictReader did."""
+    with TournamentFile(path) as f:
+        return f.frame(COLUMNS)
+
+
+def encode(df):
+    """Give a frame of match rows the store's column types."""
+    df = df.reindex(columns=COLUMNS).copy()
+    if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = pd.to_datetime(df['Date'], format='%d.%m.%Y', errors='coerce')
+    # Empty strings from the CSV tools are stored as nulls
+    df['Result'] = df['Result'].astype('string').replace('', pd.NA)
+    for column in CATEGORY_COLUMNS + PLAYER_COLUMNS:
+        df[column] = df[column].astype('string').replace('', pd.NA).astype('category')
+    share_player_categories(df)
+    return df.reset_index(drop=True)
+
+
+def share_player_categories(df):
+    """Give every player column the same categories, so the columns can be compared with each other."""
+    columns = [df[c].astype('category') for c in PLAYER_COLUMNS if c in df.columns]
+    if not columns:
+        return
+    categories = columns[0].cat.categories
+    for column in columns[1:]:
+        categories = categories.union(column.cat.categories)
+    for column in columns:
+        if not column.cat.categories.equals(categories):
+            column = column.cat.set_categories(categories)
+        df[column.name] = column
+
+
+def read_matches(path=STORE_PATH, columns=None, season=None):
+    """Load the store (memory-mapped), optionally only some columns and one season."""
+    filters = [('Season', '==', season)] if season is not None else None
+    df = pd.read_parquet(path, columns=columns, filters=filters, memory_map=True)
+    share_player_categories(df)
+    if season is not None and 'Season' in df.columns:
+        df['Season'] = df['Season'].cat.remove_unused_categories()
+    return df
+
+
+def write_matches(df, path=STORE_PATH):
+    """Write match rows to the store, replacing it atomically."""
+    temp_name = path + '.tmp'
+    encode(df).to_parquet(temp_name, compression='zstd', index=False, row_group_size=ROW_GROUP_ROWS)
+    os.replace(temp_name, path)
+
+
+class StoreWriter:
+    """Writes the store one batch of rows at a time, for pipelines that never hold all rows at once.
+
+    Each batch becomes a row group. The store is replaced when the writer is closed without an error.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.temp_name = path + '.tmp'
+        self.writer = pq.ParquetWriter(self.temp_name, SCHEMA, compression='zstd')
+        self.rows = 0
+
+    def write(self, df):
+        if len(df):
+            self.writer.write_table(pa.Table.from_pandas(encode(df), preserve_index=False).cast(SCHEMA))
+            self.rows += len(df)
+
+    def close(self, commit=True):
+        self.writer.close()
+        if commit:
+            os.replace(self.temp_name, self.path)
+        else:
+            os.remove(self.temp_name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
@@ -0,0 +1,158 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from match_store import STORE_PATH, read_matches, share_player_categories
+
+# Inverted index from player name to the rows of the match store the player played in,
+# saved next to the store as matches.players.parquet. One player's matches are then a
+# direct take() of those rows instead of a scan of four player columns over the whole
+# history. The match rows carry no player ids, so names are the only key.
+#
+# A lookup reads only the row groups of the store that hold the player's rows and takes
+# the rows from them in Arrow, so one player's report never loads the whole history.
+# Runs over many players can ask for the whole store to be loaded once instead.
+#
+# The index records the size and mtime of the store it was built from and is rebuilt
+# when the store changes.
+#
+#   python player_index.py             (re)build the index
+#   python player_index.py "Name"      print that player's matches
+
+
+def index_path_for(store_path):
+    return os.path.splitext(store_path)[0] + '.players.parquet'
+
+
+INDEX_PATH = index_path_for(STORE_PATH)
+
+# The players of a match; winners are always among them
+TEAM_COLUMNS = ['Team 1 Player 1', 'Team 1 Player 2', 'Team 2 Player 1', 'Team 2 Player 2']
+
+
+def store_stamp(store_path):
+    stat = os.stat(store_path)
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def build_index(matches):
+    """Frame of (Player, Row) pairs for a frame of match rows, grouped by player and in row order within a player."""
+    # read_matches gives the player columns the same categories, so their codes can be stacked
+    players = matches[TEAM_COLUMNS[0]].cat.categories
+    codes = np.concatenate([matches[column].cat.codes.to_numpy() for column in TEAM_COLUMNS])
+    rows = np.tile(np.arange(len(matches), dtype=np.int64), len(TEAM_COLUMNS))
+    keep = codes >= 0
+    pairs = np.unique(np.stack([codes[keep].astype(np.int64), rows[keep]]), axis=1)
+    return pd.DataFrame({'Player': np.asarray(players, dtype=object)[pairs[0]], 'Row': pairs[1]})
+
+
+def read_rows(store_path, rows, columns=None):
+    """The rows at the given (sorted) offsets of the store, reading only the row groups they fall in."""
+    store = pq.ParquetFile(store_path, memory_map=True)
+    sizes = np.array([store.metadata.row_group(i).num_rows for i in range(store.num_row_groups)], dtype=np.int64)
+    stops = np.cumsum(sizes)
+    groups = np.unique(np.searchsorted(stops, rows, side='right'))
+    table = store.read_row_groups(groups.tolist(), columns=columns)
+    # Offsets in the store -> offsets in the row groups read, which follow each other in table
+    read_starts = np.cumsum(sizes[groups]) - sizes[groups]
+    group_of_row = np.searchsorted(stops, rows, side='right')
+    local = rows - (stops - sizes)[group_of_row] + read_starts[np.searchsorted(groups, group_of_row)]
+    df = table.take(pa.array(local, type=pa.int64())).to_pandas()
+    share_player_categories(df)
+    # Indexed by offset in the store, like a take() from the whole store
+    df.index = rows
+    return df
+
+
+def write_index(store_path=STORE_PATH, index_path=None):
+    """Build the index of the store at store_path and write it atomically; returns the index frame."""
+    index_path = index_path or index_path_for(store_path)
+    stamp = store_stamp(store_path)
+    index = build_index(read_matches(store_path, columns=TEAM_COLUMNS))
+    table = pa.Table.from_pandas(index, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'store': stamp.encode()})
+    temp_name = index_path + '.tmp'
+    pq.write_table(table, temp_name, compression='zstd')
+    os.replace(temp_name, index_path)
+    return index
+
+
+class PlayerIndex:
+    """Lazily loaded lookup of a player's rows in the match store.
+
+    With whole_store the store is loaded on the first lookup and every player is taken from it,
+    which pays off in batch runs; otherwise each lookup reads only that player's rows.
+    """
+
+    def __init__(self, store_path=STORE_PATH, index_path=None, whole_store=False):
+        self.store_path = store_path
+        self.index_path = index_path or index_path_for(store_path)
+        self.whole_store = whole_store
+        self.spans = None
+        self.rows_by_span = None
+        self.store = None
+        self.seasons = None
+
+    def load(self):
+        """Read the index, rebuilding it first if it is missing or older than the store."""
+        if self.spans is not None:
+            return
+        stamp = store_stamp(self.store_path)
+        index = None
+        if os.path.exists(self.index_path):
+            table = pq.read_table(self.index_path, memory_map=True)
+            if (table.schema.metadata or {}).get(b'store') == stamp.encode():
+                index = table.to_pandas()
+        if index is None:
+            index = write_index(self.store_path, self.index_path)
+        players = index['Player'].to_numpy(dtype=object)
+        # The index is grouped by player, so each player's rows are one contiguous span
+        starts = np.flatnonzero(np.r_[True, players[1:] != players[:-1]]) if len(players) else np.array([], dtype=int)
+        stops = np.r_[starts[1:], len(players)]
+        self.spans = {players[start]: (start, stop) for start, stop in zip(starts, stops)}
+        self.rows_by_span = index['Row'].to_numpy()
+
+    def rows(self, player_name):
+        """Offsets of the player's rows in the store, in store order."""
+        self.load()
+        start, stop = self.spans.get(player_name, (0, 0))
+        return self.rows_by_span[start:stop]
+
+    def matches(self, player_name, season=None):
+        """The player's match rows, optionally of one season only."""
+        rows = self.rows(player_name)
+        if not self.whole_store:
+            matches = read_rows(self.store_path, rows)
+            return matches[matches['Season'] == season] if season is not None else matches
+        if self.store is None:
+            self.store = read_matches(self.store_path)
+            self.seasons = self.store['Season'].cat.codes.to_numpy()
+        if season is not None:
+            categories = self.store['Season'].cat.categories
+            code = categories.get_loc(season) if season in categories else -2
+            rows = rows[self.seasons[rows] == code]
+        return self.store.take(rows)
+
+    def players(self):
+        self.load()
+        return list(self.spans)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the player index of the match store, or look a player up.')
+    parser.add_argument('player', nargs='?')
+    parser.add_argument('--season')
+    parser.add_argument('--store', default=STORE_PATH)
+    args = parser.parse_args()
+
+    if args.player is None:
+        start = time.perf_counter()
+        index = write_index(args.store)
+        print(f"{index['Player'].nunique()} players, {len(index)} entries, {time.perf_counter() - start:.2f}s")
+    else:
+        print(PlayerIndex(args.store).matches(args.player, args.season).to_string())
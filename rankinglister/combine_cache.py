@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (needed by DataFrame.to_feather)
+except ImportError:
+    pyarrow = None
+
+# On-disk state for incremental runs of combine_rankings.py, kept in <folder>/.combine_cache/:
+#
+#   manifest.json       mtime, size and SHA1 of every yearly CSV the cached tables were built from
+#   year_<year>.feather that year's table from combine_rankings.year_tables()
+#   points.feather      the points table with NaN for years a player was not listed
+#   clubs.feather       All Clubs / Current Club per player
+#
+# Tables are Feather when pyarrow is installed and pickles otherwise.
+
+CACHE_DIR = '.combine_cache'
+MANIFEST = 'manifest.json'
+TABLE_SUFFIX = '.feather' if pyarrow is not None else '.pkl'
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class CombineCache:
+    def __init__(self, folder, cache_dir=None):
+        self.cache_dir = cache_dir or os.path.join(folder, CACHE_DIR)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            with open(os.path.join(self.cache_dir, MANIFEST), 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.manifest = {}
+        self.pending = None
+
+    def changed_years(self, files):
+        """Years whose files were added, removed or edited since the manifest was written.
+
+        Files with an unchanged mtime and size are trusted; the others are hashed, so a file
+        that was only touched (or rewritten with the same rows) does not count as changed.
+        """
+        current = {}
+        changed = set()
+        for year, paths in files.items():
+            for path in paths:
+                name = os.path.basename(path)
+                stat = os.stat(path)
+                entry = self.manifest.get(name)
+                if entry and (entry['year'], entry['mtime'], entry['size']) == (year, stat.st_mtime, stat.st_size):
+                    current[name] = entry
+                    continue
+                digest = file_digest(path)
+                if not entry or (entry['year'], entry['sha1']) != (year, digest):
+                    changed.add(year)
+                current[name] = {'year': year, 'mtime': stat.st_mtime, 'size': stat.st_size, 'sha1': digest}
+        for name, entry in self.manifest.items():
+            if name not in current:
+                changed.add(entry['year'])
+        # Only saved by commit(), once the tables it describes are written
+        self.pending = current
+        return changed
+
+    def commit(self):
+        temp_name = os.path.join(self.cache_dir, MANIFEST + '.tmp')
+        with open(temp_name, 'w', encoding='utf-8') as f:
+            json.dump(self.pending, f, indent=1, sort_keys=True)
+        os.replace(temp_name, os.path.join(self.cache_dir, MANIFEST))
+        self.manifest = self.pending
+
+    def table_path(self, name):
+        return os.path.join(self.cache_dir, name + TABLE_SUFFIX)
+
+    def read(self, name):
+        """A cached table, or None if it is not there."""
+        path = self.table_path(name)
+        if not os.path.exists(path):
+            return None
+        return pd.read_feather(path) if pyarrow is not None else pd.read_pickle(path)
+
+    def write(self, name, df):
+        path = self.table_path(name)
+        temp_name = path + '.tmp'
+        if pyarrow is not None:
+            df.to_feather(temp_name)
+        else:
+            df.to_pickle(temp_name)
+        os.replace(temp_name, path)
+
+    def remove(self, name):
+        try:
+            os.remove(self.table_path(name))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,297 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from combine_cache import CombineCache
+
+# Builds the wide combined_rankings<category>.csv table (one row per player and name,
+# one points column per year) from the yearly ranking CSVs in a category folder. This
+# replaces the per-category combine*.py copies, which are now thin wrappers around it.
+#
+#   python combine_rankings.py                      every category, every year found
+#   python combine_rankings.py HS MIX --first-year 2013 --last-year 2024
+#   python combine_rankings.py --full               ignore the cache of unchanged years
+#   python combine_rankings.py --export-dir ../public --compress gz br
+#                                                   also write the compact JSON of each category
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# category -> output file name; each category's CSVs live in the folder of that name
+CATEGORIES = {
+    'HS': 'combined_rankingsHS.csv',
+    'HD': 'combined_rankingsHD.csv',
+    'DS': 'combined_rankingsDS.csv',
+    'DD': 'combined_rankingsDD.csv',
+    'MIX': 'combined_rankingsMIX.csv',
+}
+
+# Yearly files are named <year>_<tab>_<category>.csv by ranking.py and ranking_http.py
+YEAR_FILE = re.compile(r'^(\d{4})_.*\.csv$')
+
+
+def ranking_files(folder, years=None):
+    """{year: [paths]} of the yearly ranking CSVs in folder, optionally limited to years."""
+    files = {}
+    for path in sorted(glob.glob(os.path.join(folder, '*.csv'))):
+        match = YEAR_FILE.match(os.path.basename(path))
+        if match and (years is None or int(match.group(1)) in years):
+            files.setdefault(int(match.group(1)), []).append(path)
+    return dict(sorted(files.items()))
+
+
+def split_names(df):
+    """Split the 'Name, Club' Navn column of ranking rows into Navn and Klubb."""
+    split_names = df['Navn'].str.split(',', n=1, expand=True)
+    df['Navn'] = split_names[0].str.strip()
+    df['Klubb'] = split_names[1].str.strip().fillna('') if split_names.shape[1] > 1 else ''
+    df['Poeng'] = df['Poeng'].fillna(0)
+    return df
+
+
+def year_tables(files):
+    """{year: table} for the files returned by ranking_files().
+
+    Each year is reduced to its (Spiller-Id, Navn, Klubb) combinations in the order first listed.
+    Poeng is summed per combination, and Current marks the club of each player's last listing that year.
+    """
+    frames = []
+    for year, paths in files.items():
+        for path in paths:
+            frames.append(pd.read_csv(path, usecols=['Spiller-Id', 'Navn', 'Poeng']).assign(year=year))
+    if not frames:
+        return {}
+    df = split_names(pd.concat(frames, ignore_index=True))
+
+    table = df.groupby(['year', 'Spiller-Id', 'Navn', 'Klubb'], sort=False)['Poeng'].sum().reset_index()
+    last_club = df.groupby(['year', 'Spiller-Id'], sort=False)['Klubb'].last().rename('last_club')
+    table = table.join(last_club, on=['year', 'Spiller-Id'])
+    table['Current'] = table['Klubb'] == table.pop('last_club')
+    return {year: group.drop(columns='year').reset_index(drop=True) for year, group in table.groupby('year', sort=False)}
+
+
+def points_table(year_tables):
+    """Points per (Spiller-Id, Navn), one column per year; NaN where the player was not listed."""
+    df = pd.concat([table.assign(year=year) for year, table in year_tables.items()], ignore_index=True)
+    points = df.pivot_table(index=['Spiller-Id', 'Navn'], columns='year', values='Poeng', aggfunc='sum')
+    return points.reindex(columns=list(year_tables)).astype(float)
+
+
+def club_table(year_tables, player_ids=None):
+    """All Clubs and Current Club per Spiller-Id, optionally only for player_ids."""
+    df = pd.concat(list(year_tables.values()), ignore_index=True)
+    if player_ids is not None:
+        df = df[df['Spiller-Id'].isin(player_ids)]
+    # Every club a player has been listed for (in the order first seen) and the club of their last listing.
+    # ('|' + club) summed per player is a vectorized '|'.join
+    player_clubs = df.drop_duplicates(['Spiller-Id', 'Klubb'])
+    clubs = ('|' + player_clubs['Klubb']).groupby(player_clubs['Spiller-Id'], sort=False).sum().str[1:]
+    current_club = df[df['Current']].groupby('Spiller-Id', sort=False)['Klubb'].last()
+    return pd.DataFrame({'All Clubs': clubs, 'Current Club': current_club})
+
+
+def wide_table(points, clubs):
+    """The combined_rankings table from points_table() and club_table() output."""
+    combined = points.fillna(0)
+    combined.columns = [str(year) for year in points.columns]
+    point_columns = list(combined.columns)
+
+    # Same row order as the old year-by-year outer merges: by first ranked year, then id and name
+    first_year = points.notna().to_numpy().argmax(axis=1)
+    combined = combined.assign(first_year=first_year).reset_index()
+    combined = combined.sort_values(['first_year', 'Spiller-Id', 'Navn'], kind='stable', ignore_index=True)
+
+    combined['All Clubs'] = combined['Spiller-Id'].map(clubs['All Clubs'])
+    combined['Current Club'] = combined['Spiller-Id'].map(clubs['Current Club'])
+    return combined[['Spiller-Id', 'Navn', 'All Clubs', 'Current Club'] + point_columns]
+
+
+def combine_rankings(files):
+    """The combined table for the yearly files returned by ranking_files()."""
+    tables = year_tables(files)
+    return wide_table(points_table(tables), club_table(tables))
+
+
+def update_combined(files, cache):
+    """Bring the cached tables up to date with files and return (combined table, years rebuilt).
+
+    Only the years whose files changed are read again. Their point columns are swapped into
+    the cached points table, and clubs are recomputed for the players listed in those years.
+    """
+    changed = cache.changed_years(files)
+    points, clubs = cache.read('points'), cache.read('clubs')
+    if points is None or clubs is None:
+        changed = set(files) | changed
+        points = pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=['Spiller-Id', 'Navn']))
+        clubs = pd.DataFrame(columns=['All Clubs', 'Current Club'])
+    else:
+        points = points.set_index(['Spiller-Id', 'Navn']).rename(columns=int)
+        clubs = clubs.set_index('Spiller-Id')
+    if not changed:
+        return wide_table(points, clubs), changed
+
+    # Players listed in a changed year before or after this run may have new clubs
+    new_tables = year_tables({year: files[year] for year in sorted(changed) if year in files})
+    affected = set()
+    for year in changed:
+        previous = cache.read(f'year_{year}')
+        if previous is not None:
+            affected.update(previous['Spiller-Id'])
+        if year in new_tables:
+            affected.update(new_tables[year]['Spiller-Id'])
+            cache.write(f'year_{year}', new_tables[year])
+        else:
+            cache.remove(f'year_{year}')
+
+    points = points.drop(columns=[year for year in changed if year in points.columns])
+    if new_tables:
+        points = points.join(points_table(new_tables), how='outer')
+    points = points.reindex(columns=list(files)).dropna(how='all')
+
+    tables = {year: new_tables[year] if year in new_tables else cache.read(f'year_{year}') for year in files}
+    clubs = pd.concat([clubs.drop(index=list(affected), errors='ignore'), club_table(tables, affected)])
+
+    cache.write('points', points.rename(columns=str).reset_index())
+    cache.write('clubs', clubs.rename_axis('Spiller-Id').reset_index())
+    cache.commit()
+    return wide_table(points, clubs), changed
+
+
+def combine_folder(folder, output_file, years=None, incremental=True):
+    """Write the combined table of folder to output_file.
+
+    By default only the years whose files changed since the last run are rebuilt (see
+    combine_cache.py); incremental=False reads every file again.
+    """
+    files = ranking_files(folder, years)
+    if not files:
+        print('No ranking files in', folder)
+        return None
+    if not incremental:
+        combined = combine_rankings(files)
+    else:
+        combined, changed = update_combined(files, CombineCache(folder))
+        if not changed and os.path.exists(output_file):
+            return combined
+        print('Rebuilt', ', '.join(map(str, sorted(changed))))
+    combined.to_csv(output_file, index=False)
+    return combined
+
+
+# Compact JSON export of a combined table for the web site. Columnar, one array per field:
+#
+#   {"v": 1, "years": [2013, ...], "clubs": ["Asker", ...],
+#    "id": [100002, ...], "name": ["David Gustafsson", ...],
+#    "clubs_of": [[0], [4, 17], ...],      All Clubs as indexes into clubs, in listing order
+#    "club": [0, 17, ...],                 Current Club as an index into clubs, -1 for none
+#    "points": [[12, 3096, ...], ...]}     integer points, one array per year, in years order
+#
+# The clubs table is sorted by use, so the most common clubs get the shortest indexes.
+EXPORT_VERSION = 1
+
+# suffix -> compress(bytes); 'br' needs the brotli package
+COMPRESSORS = {'gz': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda data: brotli.compress(data, quality=11)
+
+
+def compact_export(combined):
+    """The export document of a combined table from wide_table()."""
+    point_columns = [column for column in combined.columns if str(column).isdigit()]
+    all_clubs = combined['All Clubs'].fillna('').astype(str).str.split('|')
+    all_clubs = all_clubs.map(lambda clubs: [club for club in clubs if club])
+    current = combined['Current Club'].fillna('').astype(str)
+
+    uses = pd.concat([all_clubs.explode().dropna(), current[current != '']]).value_counts()
+    clubs = sorted(uses.index, key=lambda club: (-uses[club], club))
+    club_index = {club: i for i, club in enumerate(clubs)}
+
+    return {
+        'v': EXPORT_VERSION,
+        'years': [int(column) for column in point_columns],
+        'clubs': clubs,
+        'id': combined['Spiller-Id'].astype(int).tolist(),
+        'name': combined['Navn'].astype(str).tolist(),
+        'clubs_of': [[club_index[club] for club in player_clubs] for player_clubs in all_clubs],
+        'club': [club_index.get(club, -1) for club in current],
+        'points': [combined[column].fillna(0).round().astype(int).tolist() for column in point_columns],
+    }
+
+
+def write_export(combined, path, compress=()):
+    """Write the compact export of combined to path, plus a <path>.<suffix> copy per compress suffix.
+
+    Suffixes without their compressor installed are skipped. Returns {path: size in bytes}.
+    """
+    data = json.dumps(compact_export(combined), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    outputs = {path: data}
+    for suffix in compress:
+        if suffix not in COMPRESSORS:
+            print(f'Skipping .{suffix}: brotli is not installed' if suffix == 'br' else f'Unknown compression .{suffix}')
+            continue
+        outputs[f'{path}.{suffix}'] = COMPRESSORS[suffix](data)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    for output, content in outputs.items():
+        temp_name = output + '.tmp'
+        with open(temp_name, 'wb') as file:
+            file.write(content)
+        os.replace(temp_name, output)
+    return {output: len(content) for output, content in outputs.items()}
+
+
+def export_name(category):
+    """combined_rankings<category>.json, the export name of a category's table."""
+    return os.path.splitext(CATEGORIES[category])[0] + '.json'
+
+
+def combine_category(category, years=None, root=ROOT, incremental=True):
+    """Write <root>/<category>/combined_rankings<category>.csv."""
+    folder = os.path.join(root, category)
+    return combine_folder(folder, os.path.join(folder, CATEGORIES[category]), years, incremental)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Combine the yearly ranking lists of each category into one table.')
+    # Checked after parsing: argparse tests an empty or default list against choices as one value
+    parser.add_argument('categories', nargs='*', metavar='CATEGORY', help=f"any of {', '.join(CATEGORIES)} (default: all)")
+    parser.add_argument('--first-year', type=int)
+    parser.add_argument('--last-year', type=int)
+    parser.add_argument('--root', default=None, help='folder holding the category folders')
+    parser.add_argument('--full', action='store_true', help='read every yearly file instead of only the changed ones')
+    parser.add_argument('--export-dir', help='also write the compact JSON export of each category to this folder')
+    parser.add_argument('--compress', nargs='*', choices=['gz', 'br'], default=[],
+                        help='precompressed copies of the exports to write next to them')
+    args = parser.parse_args(argv)
+    unknown = [category for category in args.categories if category not in CATEGORIES]
+    if unknown:
+        parser.error(f"unknown categories {', '.join(unknown)} (choose from {', '.join(CATEGORIES)})")
+    categories = args.categories or list(CATEGORIES)
+    root = args.root or ROOT
+
+    years = None
+    if args.first_year or args.last_year:
+        years = range(args.first_year or 0, (args.last_year or 9999) + 1)
+
+    start = time.perf_counter()
+    for category in categories:
+        combined = combine_category(category, years, root, not args.full)
+        if combined is not None:
+            print(category, len(combined), 'players')
+            if args.export_dir:
+                sizes = write_export(combined, os.path.join(args.export_dir, export_name(category)), args.compress)
+                print(', '.join(f'{os.path.basename(path)} {size / 1024:.0f} KB' for path, size in sizes.items()))
+    print(f'{time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,16 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from bs4 import BeautifulSoup
 import pandas as pd
-import time
+import os
+import sys
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'viktig'))
+from waits import Waiter, content_settled, content_signature, option_selected, ranking_page_loaded
+from ranking_parser import parse_ranking_grid
+from page_recorder import PageRecorder
+from ranking_http import CATEGORIES
 
 # The URL of the page you want to scrape
 url = 'https://badmintonportalen.no/NBF/Ranglister/'
@@ -18,37 +25,58 @@ driver = webdriver.Chrome(ChromeDriverManager().install())
 driver.get(url)
 
 wait = WebDriverWait(driver, 10)
+waiter = Waiter(driver)
+
+# Set to a directory to save every page for offline replay and benchmarks (viktig/bench_scrape.py)
+record_dir = None
+recorder = PageRecorder(record_dir) if record_dir else None
 
 # Here we create a list with all the options values for the different seasons
 seasons_values = [f'20020{i}' for i in range(25, 26)]
 
 categories = range(1, 7)  # The numbers used in the SelectRankingList(n) function
 
-for season in seasons_values:
-    season_select = Select(driver.find_element(By.ID, "DropDownListSeasons"))
-    season_select.select_by_value(season)  # Selects a season
-
+def search_season(season):
+    Select(driver.find_element(By.ID, "DropDownListSeasons")).select_by_value(season)  # Selects a season
     # Click the "Søk" button to update the rankings list
-    search_button = driver.find_element(By.ID, "LinkButtonSearch")
-    search_button.click()
+    driver.find_element(By.ID, "LinkButtonSearch").click()
 
-    # Wait for the page to load
-    time.sleep(0.5)
 
-    for category in categories:
-        data = []  # Initialize the data list for each category
+def selected_tab(name):
+    # The category's tab is the selected one
+    def shown(driver):
+        return [tab.text for tab in driver.find_elements(By.CSS_SELECTOR, 'div.smallTabSelected a')] == [name]
+    return shown
+
+
+def grid_settled(shown):
+    return lambda: content_settled('table.RankingListGrid', content_signature(driver, 'table.RankingListGrid'), shown=shown)
+
 
-        # Call the SelectRankingList(n) function to switch to a different category
-        driver.execute_script(f'SelectRankingList({category})')
+for season in seasons_values:
+    # Wait for the rankings of the selected season to replace the old grid; a timeout skips the season
+    try:
+        waiter.after('search_season', lambda: search_season(season), grid_settled(option_selected('#DropDownListSeasons', season)))
+    except TimeoutException:
+        print('Season', season, 'did not load; skipped')
+        continue
 
-        # Wait for the page to load
-        time.sleep(0.5)
+    for category in categories:
+        data = []  # Initialize the data list for each category
+        tab_name = CATEGORIES[category][0]
 
-        # Get the name of the current tab
-        tab_name = driver.find_element(By.CSS_SELECTOR, 'div.smallTabSelected a').text
+        # Call the SelectRankingList(n) function to switch to a different category and wait for its grid,
+        # so the rows of the last category are never saved under this one
+        try:
+            waiter.after('select_category', lambda: driver.execute_script(f'SelectRankingList({category})'),
+                         grid_settled(selected_tab(tab_name)))
+        except TimeoutException:
+            print('Category', tab_name, 'of', season, 'did not load; skipped')
+            continue
 
         page_number = 0
         headers = []  # Initialize headers list for each category
+        complete = True
         while True:
             # Wait for the table to load
             try:
@@ -58,23 +86,19 @@ for season in seasons_values:
 
             # Get the HTML of the page
             html = driver.page_source
+            if recorder:
+                recorder.record(url + '?' + urlencode({'season': season, 'category': category, 'page': page_number}), html,
+                                'ranking', season=season, category=category, page=page_number)
 
-            # Parse the HTML with BeautifulSoup
-            soup = BeautifulSoup(html, 'html.parser')
-
-            # Find the table containing the rankings on the page
-            table = soup.find('table', {'class': 'RankingListGrid'})
+            # Parse the ranking grid (lxml when available, see ranking_parser.py)
+            page_headers, page_rows = parse_ranking_grid(html)
 
             # Get the headers of the table if not done already
             if not headers:
-                headers = [header.text.strip() for header in table.find_all('th')]
-
-            # Get the rows of the table
-            rows = table.find_all('tr')[1:]  # skip the header row
+                headers = page_headers
 
             # Get the data in each row, excluding the row with page numbers
-            data.extend([[cell.text.strip() for cell in row.find_all('td')] for row in rows if
-                         not row.find('td', {'colspan': '5'})])
+            data.extend(page_rows)
 
             # Try to find the link to the next page
             try:
@@ -83,12 +107,22 @@ for season in seasons_values:
             except NoSuchElementException:
                 break  # if we can't find a link to the next page, we're done
 
-            # Click the link to the next page
+            # Click the link to the next page and wait until the grid shows it
             next_link.click()
+            try:
+                waiter.until('next_page', ranking_page_loaded(page_number + 1))
+            except TimeoutException:
+                complete = False
+                break
 
             # Increment the page number
             page_number += 1
 
+        if not complete:
+            # A half list would replace a full one from an earlier run
+            print('Page', page_number + 1, 'of', tab_name, season, 'did not load; category skipped')
+            continue
+
         # Create a pandas DataFrame from the data
         df = pd.DataFrame(data, columns=headers)
 
@@ -102,5 +136,7 @@ for season in seasons_values:
         file_name = f'{season[-4:]}_{tab_name}_{category}.csv'
         df.to_csv(file_name, index=False)
 
+print(waiter.stats.summary())
+
 # Close the WebDriver instance
 driver.quit()
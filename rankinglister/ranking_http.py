@@ -0,0 +1,170 @@
+import argparse
+import csv
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'viktig'))
+from aspnet_form import AspNetForm, element_by_id, link_postback, selected_value
+from http_scraper import make_session
+from ranking_parser import parse_ranking_grid
+
+# HTTP version of ranking.py for many seasons at once. The ranking page is an ASP.NET
+# form, so every step ranking.py clicks through is a postback of the form of the previous
+# response, with its hidden fields (__VIEWSTATE, __EVENTVALIDATION, ...) copied forward:
+#
+#   season      DropDownListSeasons set to the season, posted by the LinkButtonSearch link
+#   category    the SelectRankingList(n) script
+#   page        the SelectRankingListPage(n) script
+#
+# Field names, postback targets and what the two scripts post are read from the page
+# itself, never assumed (viktig/aspnet_form.py). The pages of one list follow each other,
+# so the parallelism is across lists: every (season, category) runs on its own session in
+# a bounded pool. A response that does not show the season, category or page asked for
+# raises instead of writing some other list's rows.
+
+BASE_URL = 'https://badmintonportalen.no'
+RANKING_PATH = '/NBF/Ranglister/'
+
+SEASON_DROPDOWN = 'DropDownListSeasons'
+SEARCH_LINK = 'LinkButtonSearch'
+
+# category number -> (tab name used in the file name, output folder)
+CATEGORIES = {
+    1: ('HS', 'HS'),
+    2: ('HD', 'HD'),
+    3: ('DS', 'DS'),
+    4: ('DD', 'DD'),
+    5: ('MD D', 'MIX'),
+    6: ('MD H', 'MIX'),
+}
+
+
+def clean_cell(value):
+    # Same as ranking.py's df.replace(r'^\s*,\s*$', '', regex=True)
+    return '' if re.match(r'^\s*,\s*$', value) else value
+
+
+def season_values(soup):
+    """{year: value} of the season dropdown; the value ends in the year of the list (e.g. '2002025')."""
+    values = {}
+    for option in element_by_id(soup, SEASON_DROPDOWN).find_all('option'):
+        value = option.get('value', '')
+        if re.fullmatch(r'\d*\d{4}', value):
+            values[int(value[-4:])] = value
+    return values
+
+
+def selected_season(soup):
+    return selected_value(element_by_id(soup, SEASON_DROPDOWN))
+
+
+def selected_tab(soup):
+    link = soup.select_one('div.smallTabSelected a')
+    return link.get_text(strip=True) if link is not None else None
+
+
+class RankingForm(AspNetForm):
+    """One session on the ranking page, posting its form back with the state of the last response."""
+
+    def __init__(self, session, base_url=BASE_URL, timeout=30):
+        super().__init__(session, base_url.rstrip('/') + RANKING_PATH, timeout)
+
+    def select_season(self, value):
+        target, argument = link_postback(self.soup, SEARCH_LINK)
+        name = element_by_id(self.soup, SEASON_DROPDOWN).get('name', SEASON_DROPDOWN)
+        self.post(target, argument, {name: value})
+        if selected_season(self.soup) != value:
+            raise ValueError(f'Asked for season {value}, the page shows {selected_season(self.soup)}')
+
+    def select_category(self, category):
+        self.call_script('SelectRankingList', category)
+        tab = selected_tab(self.soup)
+        if tab != CATEGORIES[category][0]:
+            raise ValueError(f'Asked for category {category} ({CATEGORIES[category][0]}), the page shows {tab}')
+
+    def has_page(self, page):
+        return f'SelectRankingListPage({page})' in self.html
+
+    def select_page(self, page):
+        self.call_script('SelectRankingListPage', page)
+        # Like waits.ranking_page_loaded: the page shown is no longer a link
+        if self.has_page(page):
+            raise ValueError(f'Asked for page {page}, the pager still links to it')
+
+
+def scrape_category(form, year, season, category, output_root):
+    """Walk every page of one ranking list and stream it to its CSV; returns the number of rows written."""
+    form.open()
+    form.select_season(season)
+    form.select_category(category)
+    headers, rows = parse_ranking_grid(form.html)
+    if not headers:
+        return 0
+
+    tab_name, folder = CATEGORIES[category]
+    os.makedirs(os.path.join(output_root, folder), exist_ok=True)
+    file_name = os.path.join(output_root, folder, f'{year}_{tab_name}_{category}.csv')
+    temp_name = file_name + '.tmp'
+    written = 0
+    with open(temp_name, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(headers)
+        page = 0
+        while True:
+            writer.writerows([clean_cell(cell) for cell in row] for row in rows)
+            written += len(rows)
+            if not form.has_page(page + 1):
+                break
+            page += 1
+            form.select_page(page)
+            rows = parse_ranking_grid(form.html)[1]
+    os.replace(temp_name, file_name)
+    return written
+
+
+def scrape_list(base_url, year, season, category, output_root):
+    # Each list gets its own session: the server keeps the form state per visitor
+    form = RankingForm(make_session(1), base_url)
+    try:
+        return scrape_category(form, year, season, category, output_root), form.pages
+    finally:
+        form.session.close()
+
+
+def scrape_rankings(years, categories=CATEGORIES, base_url=BASE_URL, output_root='.', concurrency=8):
+    first = RankingForm(make_session(1), base_url)
+    seasons = season_values(first.open())
+    first.session.close()
+    units = []
+    for year in years:
+        if year not in seasons:
+            print('No season', year, 'in the season dropdown')
+            continue
+        units.extend((year, seasons[year], category) for category in categories)
+
+    pages = first.pages
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ranking') as pool:
+        futures = [(unit, pool.submit(scrape_list, base_url, *unit, output_root)) for unit in units]
+        for (year, season, category), future in futures:
+            try:
+                rows, unit_pages = future.result()
+                pages += unit_pages
+                print(year, CATEGORIES[category][0], rows, 'rows')
+            except Exception as e:
+                print('Exception;', year, category, e)
+    print(f'{pages} pages fetched')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scrape ranking lists for a range of seasons over HTTP.')
+    parser.add_argument('first_year', type=int)
+    parser.add_argument('last_year', type=int)
+    parser.add_argument('--categories', type=int, nargs='+', default=list(CATEGORIES))
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--output-root', default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument('--concurrency', type=int, default=8, help='ranking lists fetched at the same time')
+    args = parser.parse_args()
+
+    scrape_rankings(range(args.first_year, args.last_year + 1), args.categories, args.base_url, args.output_root, args.concurrency)
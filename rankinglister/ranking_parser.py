@@ -0,0 +1,49 @@
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# Parses the RankingListGrid table on badmintonportalen.no/NBF/Ranglister/. The lxml
+# backend only walks the grid with precompiled XPath; 'bs4' is the original code.
+DEFAULT_BACKEND = 'lxml' if lxml_html is not None else 'bs4'
+
+if lxml_html is not None:
+    _HTML_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+    _GRID = etree.XPath("(//table[contains(concat(' ', normalize-space(@class), ' '), ' RankingListGrid ')])[1]")
+    _HEADERS = etree.XPath('.//th')
+    _ROWS = etree.XPath('.//tr')
+    _CELLS = etree.XPath('.//td')
+    _PAGER_CELL = etree.XPath("boolean(.//td[@colspan='5'])")
+
+
+def parse_ranking_grid(html, backend=None):
+    """Return (headers, rows) of the ranking grid; rows skip the header and the pager row."""
+    if (backend or DEFAULT_BACKEND) == 'lxml':
+        if isinstance(html, str):
+            html = html.encode('utf-8')
+        found = _GRID(lxml_html.fromstring(html, parser=_HTML_PARSER))
+        if not found:
+            return [], []
+        table = found[0]
+        headers = [header.text_content().strip() for header in _HEADERS(table)]
+        rows = [[cell.text_content().strip() for cell in _CELLS(row)] for row in _ROWS(table)[1:] if not _PAGER_CELL(row)]
+        return headers, rows
+
+    # Parse the HTML with BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Find the table containing the rankings on the page
+    table = soup.find('table', {'class': 'RankingListGrid'})
+    if table is None:
+        return [], []
+
+    headers = [header.text.strip() for header in table.find_all('th')]
+
+    # Get the rows of the table
+    rows = table.find_all('tr')[1:]  # skip the header row
+
+    # Get the data in each row, excluding the row with page numbers
+    return headers, [[cell.text.strip() for cell in row.find_all('td')] for row in rows if
+                     not row.find('td', {'colspan': '5'})]
@@ -0,0 +1,160 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'matches'))
+from match_store import STORE_PATH, read_matches
+from match_stats import player_matches
+
+# Head-to-head records over the whole match history, per season, in an SQLite file next
+# to the match store:
+#
+#   opponents   (player, opponent, season)    the player against one opponent, in any match
+#   pairs       (player, opponents, season)   the player against one side of the net: a
+#                                             singles opponent or a doubles pair ("A & B",
+#                                             names sorted, see match_stats.player_matches)
+#
+# Both hold matches, wins, losses, points for and against and the last date they met.
+# The tables are keyed on (player, ...), so a record, a player's nemesis or rivals are
+# index lookups instead of scans of the player's matches.
+#
+#   python head_to_head.py                       rebuild from the match store
+#   python head_to_head.py "Name" --season 2023/2024
+
+H2H_PATH = os.path.join(os.path.dirname(STORE_PATH), 'head_to_head.sqlite')
+
+RECORD_COLUMNS = ['matches', 'wins', 'losses', 'points_for', 'points_against', 'last_met']
+
+TABLES = {'opponents': 'opponent', 'pairs': 'opponents'}
+
+
+def aggregate(rows, key, column):
+    """Records per (season, player, opponent) of player_matches() rows whose key column holds the opponent.
+
+    The opponent column of the records is named column.
+    """
+    rows = rows[rows[key].notna() & (rows[key] != '')]
+    grouped = rows.groupby(['Season', 'Player', key], observed=True, sort=False)
+    records = grouped.agg(matches=('Is Win', 'size'), wins=('Is Win', 'sum'), points_for=('Points', 'sum'),
+                          points_against=('Opponent Points', 'sum'), last_met=('Date', 'max')).reset_index()
+    records['losses'] = records['matches'] - records['wins']
+    records['last_met'] = records['last_met'].dt.strftime('%Y-%m-%d')
+    return records.rename(columns={'Season': 'season', 'Player': 'player', key: column})
+
+
+def head_to_head_tables(rows):
+    """{table name: records} for player_matches() rows."""
+    singles = pd.concat([rows.drop(columns='Opponent 2').rename(columns={'Opponent 1': 'Opponent'}),
+                         rows.drop(columns='Opponent 1').rename(columns={'Opponent 2': 'Opponent'})], ignore_index=True)
+    return {'opponents': aggregate(singles, 'Opponent', TABLES['opponents']),
+            'pairs': aggregate(rows, 'Opponent Key', TABLES['pairs'])}
+
+
+def pick_nemesis(records):
+    """The side of {side: record} the player lost to most, or None if they never lost.
+
+    Ties go to the side met most often, then to the first name in alphabetical order.
+    """
+    sides = [side for side, record in records.items() if side and record['losses']]
+    if not sides:
+        return None
+    return min(sides, key=lambda side: (-records[side]['losses'], -records[side]['matches'], side))
+
+
+def nemeses(pairs):
+    """{player: side} by the rule of pick_nemesis, for every player of a pairs table at once."""
+    pairs = pairs[pairs['losses'] > 0].sort_values(['player', 'losses', 'matches', 'opponents'],
+                                                   ascending=[True, False, False, True])
+    first = pairs.drop_duplicates('player')
+    return dict(zip(first['player'], first['opponents']))
+
+
+def write_head_to_head(data, path=H2H_PATH):
+    """Build both tables from match rows and replace the file at path atomically."""
+    rows = player_matches(data)
+    rows = rows[rows['Player'].str.strip() != '']
+    tables = head_to_head_tables(rows)
+    temp_name = path + '.tmp'
+    if os.path.exists(temp_name):
+        os.remove(temp_name)
+    conn = sqlite3.connect(temp_name)
+    for name, key in TABLES.items():
+        conn.execute(f'CREATE TABLE {name} (player TEXT, {key} TEXT, season TEXT, matches INTEGER, wins INTEGER, '
+                     f'losses INTEGER, points_for INTEGER, points_against INTEGER, last_met TEXT, '
+                     f'PRIMARY KEY (player, {key}, season)) WITHOUT ROWID')
+        # Inserting in key order keeps the B-tree appends sequential
+        records = tables[name].sort_values(['player', key, 'season'])[['player', key, 'season'] + RECORD_COLUMNS]
+        columns = [records[column].tolist() for column in records.columns]
+        conn.executemany(f'INSERT INTO {name} VALUES ({", ".join("?" * 9)})', zip(*columns))
+    conn.commit()
+    conn.close()
+    os.replace(temp_name, path)
+    return {name: len(table) for name, table in tables.items()}
+
+
+class HeadToHead:
+    """Lookups in the head-to-head file; season=None sums every season."""
+
+    def __init__(self, path=H2H_PATH):
+        self.conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+
+    def query(self, table, player, opponent=None, season=None):
+        key = TABLES[table]
+        sql = (f'SELECT {key}, SUM(matches), SUM(wins), SUM(losses), SUM(points_for), SUM(points_against), '
+               f'MAX(last_met) FROM {table} WHERE player = ?')
+        args = [player]
+        if opponent is not None:
+            sql += f' AND {key} = ?'
+            args.append(opponent)
+        if season is not None:
+            sql += ' AND season = ?'
+            args.append(season)
+        rows = self.conn.execute(sql + f' GROUP BY {key}', args).fetchall()
+        return {row[0]: dict(zip(RECORD_COLUMNS, row[1:])) for row in rows}
+
+    def record(self, player, opponent, season=None):
+        """The player's record against one opponent, or None if they never met."""
+        return self.query('opponents', player, opponent, season).get(opponent)
+
+    def pair_record(self, player, opponents, season=None):
+        """The player's record against a side ("A & B" in either order, or a singles opponent)."""
+        opponents = ' & '.join(sorted(opponents.split(' & ')))
+        return self.query('pairs', player, opponents, season).get(opponents)
+
+    def nemesis(self, player, season=None):
+        """(side, record) the player lost to most (see pick_nemesis), or (None, None)."""
+        records = self.query('pairs', player, season=season)
+        side = pick_nemesis(records)
+        return (side, records[side]) if side is not None else (None, None)
+
+    def rivals(self, player, season=None, limit=5):
+        """[(opponent, record)] of the opponents the player met most often."""
+        records = self.query('opponents', player, season=season)
+        return sorted(records.items(), key=lambda item: (-item[1]['matches'], item[0]))[:limit]
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the head-to-head file, or show one player\'s records.')
+    parser.add_argument('player', nargs='?')
+    parser.add_argument('--season')
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--output', default=H2H_PATH)
+    args = parser.parse_args()
+
+    if args.player is None:
+        start = time.perf_counter()
+        counts = write_head_to_head(read_matches(args.store), args.output)
+        print(', '.join(f'{n} {name}' for name, n in counts.items()), f'{time.perf_counter() - start:.2f}s')
+    else:
+        h2h = HeadToHead(args.output)
+        side, record = h2h.nemesis(args.player, args.season)
+        print('Nemesis:', side, record)
+        for opponent, record in h2h.rivals(args.player, args.season):
+            print(f'{opponent:<40}', record)
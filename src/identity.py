@@ -0,0 +1,231 @@
+import argparse
+import difflib
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'matches'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rankinglister'))
+from combine_rankings import ROOT as RANKING_ROOT, ranking_files, split_names
+from match_store import STORE_PATH, read_matches
+
+# Links the display names of the match store to the Spiller-Id of the ranking lists.
+# Every (season, name) of the matches is resolved against the ranking listings of the
+# year the season ends in (2023/2024 -> the 2024 lists), then the years around it:
+#
+#   exact       same normalised name (case, accents, ø/æ, punctuation and spacing ignored)
+#   fuzzy       same first and last name up to a spelling variant of a long name, with
+#               middle names equal, abbreviated to initials or left out on one side. Only
+#               names sharing a first or last name (a block) are compared, never all pairs
+#
+# Every link has a confidence between 0 and 1. It drops with the distance in years,
+# with the fuzzy similarity and when a name is listed under more than one Spiller-Id;
+# the id listed most often wins such a tie.
+#
+# The links are saved next to the match store as identities.parquet, and attach_ids()
+# adds integer Spiller-Id columns next to the player columns of match rows.
+#
+#   python identity.py                 resolve every season of the store
+#   python identity.py "Name"          show the links of one name
+
+IDENTITIES_PATH = os.path.join(os.path.dirname(STORE_PATH), 'identities.parquet')
+
+PLAYER_COLUMNS = ['Team 1 Player 1', 'Team 1 Player 2', 'Team 2 Player 1', 'Team 2 Player 2', 'Winner Player 1',
+                  'Winner Player 2']
+
+# How many years before or after a season's own lists are searched
+MAX_YEAR_DISTANCE = 3
+# Confidence lost per year between the season and the listing
+YEAR_PENALTY = 0.05
+# Lowest similarity a fuzzy link is kept at
+MIN_SIMILARITY = 0.85
+# Shortest name token that may differ in spelling (Aanensen / Aanesen)
+MIN_VARIANT_LENGTH = 6
+# Factor of a fuzzy link where one name has a middle name the other lacks
+MIDDLE_NAME_PENALTY = 0.9
+
+# Letters NFKD does not take apart
+LETTERS = str.maketrans({'ø': 'o', 'Ø': 'o', 'æ': 'ae', 'Æ': 'ae', 'ß': 'ss', 'ł': 'l', 'Ł': 'l', 'đ': 'd', 'Đ': 'd'})
+
+
+def name_keys(names):
+    """Normalised comparison keys of a Series of names: lower-case ASCII words separated by one space."""
+    names = names.astype('string').str.translate(LETTERS).str.normalize('NFKD')
+    names = names.str.encode('ascii', 'ignore').str.decode('ascii').str.lower()
+    return names.str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+
+
+def season_year(seasons):
+    """The year a '2023/2024' season ends in, as an int array."""
+    return seasons.astype('string').str[-4:].astype(int).to_numpy()
+
+
+def ranking_listings(root=RANKING_ROOT):
+    """Distinct (Spiller-Id, name, club, year) of the ranking lists, with the number of lists per listing."""
+    frames = []
+    for year, paths in ranking_files(root).items():
+        for path in paths:
+            frames.append(pd.read_csv(path, usecols=['Spiller-Id', 'Navn', 'Poeng']).assign(year=year))
+    listings = split_names(pd.concat(frames, ignore_index=True))
+    listings = listings.groupby(['Spiller-Id', 'Navn', 'Klubb', 'year'], sort=False).size().rename('lists').reset_index()
+    listings['key'] = name_keys(listings['Navn'])
+    return listings[listings['key'] != '']
+
+
+def match_names(data):
+    """Distinct (Season, Name) of the player columns of match rows, with their keys and years."""
+    names = pd.concat([data[['Season', column]].rename(columns={column: 'Name'}).astype('string')
+                       for column in PLAYER_COLUMNS if column in data.columns], ignore_index=True)
+    names = names.dropna().drop_duplicates(ignore_index=True)
+    names['key'] = name_keys(names['Name'])
+    names['year'] = season_year(names['Season'])
+    return names[names['key'] != ''].reset_index(drop=True)
+
+
+def pick_links(candidates):
+    """The best candidate per (Season, Name): nearest year, then highest similarity, then most lists.
+
+    candidates has Season, Name, Spiller-Id, Klubb, distance, similarity and lists columns.
+    """
+    # Different ids for the same name at the same distance split the confidence between them
+    rivals = candidates.groupby(['Season', 'Name', 'distance'])['Spiller-Id'].transform('nunique')
+    candidates = candidates.assign(rivals=rivals)
+    best = candidates.sort_values(['Season', 'Name', 'distance', 'similarity', 'lists'],
+                                  ascending=[True, True, True, False, False], kind='stable')
+    best = best.drop_duplicates(['Season', 'Name']).copy()
+    confidence = best['similarity'] * (1 - YEAR_PENALTY * best['distance'])
+    best['confidence'] = (confidence / best['rivals']).round(3)
+    return best
+
+
+def token_similarity(a, b):
+    """1 for equal name tokens, the difflib ratio for a spelling variant of a long token, else 0.
+
+    A variant differs by at most one letter in length. Short tokens must be equal: Marius and
+    Markus, or Hansen and Johansen, are different people.
+    """
+    if a == b:
+        return 1.0
+    if min(len(a), len(b)) < MIN_VARIANT_LENGTH or abs(len(a) - len(b)) > 1:
+        return 0.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def middle_names_agree(a, b):
+    """Every middle name of the side with fewer equals, or is the initial of, a middle name of the other."""
+    if len(a) > len(b):
+        a, b = b, a
+    return all(any(word == other or (len(word) == 1 and other.startswith(word)) for other in b) for word in a)
+
+
+def key_similarity(key, listed_key):
+    """Similarity of two name keys: first and last names compared token-wise, middle names must agree."""
+    words, listed = key.split(), listed_key.split()
+    if len(words) < 2 or len(listed) < 2 or not middle_names_agree(words[1:-1], listed[1:-1]):
+        return 0.0
+    similarity = token_similarity(words[0], listed[0]) * token_similarity(words[-1], listed[-1])
+    # A middle name on one side only is weaker evidence than the same full name
+    return similarity * (1.0 if len(words) == len(listed) else MIDDLE_NAME_PENALTY)
+
+
+def fuzzy_pairs(keys, listed_keys):
+    """[(key, listed key, similarity)] of the pairs scoring at least MIN_SIMILARITY.
+
+    Listed keys are blocked on their first and their last word, and a key is only compared
+    with the keys sharing one of its own, never with every listed name.
+    """
+    blocks = {}
+    for listed_key in listed_keys:
+        words = listed_key.split()
+        for word in {words[0], words[-1]}:
+            blocks.setdefault(word, set()).add(listed_key)
+    pairs = []
+    for key in keys:
+        words = key.split()
+        for listed_key in blocks.get(words[0], set()) | blocks.get(words[-1], set()):
+            similarity = key_similarity(key, listed_key)
+            if similarity >= MIN_SIMILARITY:
+                pairs.append((key, listed_key, similarity))
+    return pairs
+
+
+def resolve(data, listings):
+    """Identity links of every (Season, Name) in match rows: Season, Name, Spiller-Id, Klubb, confidence, method.
+
+    Names without a link are left out.
+    """
+    names = match_names(data)
+    by_key = listings[['key', 'Spiller-Id', 'Klubb', 'year', 'lists']]
+
+    # Exact: one merge on the normalised key
+    exact = names.merge(by_key, on='key', suffixes=('', '_listed'))
+    exact['distance'] = (exact['year'] - exact['year_listed']).abs()
+    exact = exact[exact['distance'] <= MAX_YEAR_DISTANCE]
+    exact = exact.assign(similarity=1.0)
+    links = [pick_links(exact).assign(method='exact')]
+
+    # Fuzzy: only names without an exact link, compared within their blocks
+    unresolved = names[~names.set_index(['Season', 'Name']).index.isin(links[0].set_index(['Season', 'Name']).index)]
+    pairs = fuzzy_pairs(unresolved['key'].unique(), listings['key'].unique())
+    if pairs:
+        similar = pd.DataFrame(pairs, columns=['key', 'listed_key', 'similarity'])
+        fuzzy = unresolved.merge(similar, on='key').merge(by_key.rename(columns={'key': 'listed_key'}),
+                                                          on='listed_key', suffixes=('', '_listed'))
+        fuzzy['distance'] = (fuzzy['year'] - fuzzy['year_listed']).abs()
+        fuzzy = fuzzy[fuzzy['distance'] <= MAX_YEAR_DISTANCE]
+        if len(fuzzy):
+            links.append(pick_links(fuzzy).assign(method='fuzzy'))
+
+    links = pd.concat(links, ignore_index=True)
+    links = links[['Season', 'Name', 'Spiller-Id', 'Klubb', 'confidence', 'method']]
+    links['Spiller-Id'] = links['Spiller-Id'].astype('int64')
+    return links.sort_values(['Season', 'Name'], ignore_index=True)
+
+
+def write_identities(links, path=IDENTITIES_PATH):
+    temp_name = path + '.tmp'
+    links.to_parquet(temp_name, compression='zstd', index=False)
+    os.replace(temp_name, path)
+
+
+def read_identities(path=IDENTITIES_PATH):
+    return pd.read_parquet(path)
+
+
+def attach_ids(data, links, min_confidence=0.0):
+    """data with an Int64 '<column> Id' column after each player column (null where no link is good enough)."""
+    links = links[links['confidence'] >= min_confidence]
+    lookup = pd.Series(links['Spiller-Id'].to_numpy(),
+                       index=pd.MultiIndex.from_arrays([links['Season'].astype(str), links['Name'].astype(str)]))
+    data = data.copy()
+    seasons = data['Season'].astype('string')
+    for column in PLAYER_COLUMNS:
+        if column in data.columns:
+            keys = pd.MultiIndex.from_arrays([seasons.fillna(''), data[column].astype('string').fillna('')])
+            ids = lookup.reindex(keys).to_numpy()
+            data.insert(data.columns.get_loc(column) + 1, column + ' Id', pd.array(ids, dtype='Int64'))
+    return data
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Link the player names of the match store to ranking Spiller-Ids.')
+    parser.add_argument('name', nargs='?')
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--rankings', default=RANKING_ROOT, help='folder of the yearly ranking CSVs')
+    parser.add_argument('--output', default=IDENTITIES_PATH)
+    args = parser.parse_args()
+
+    if args.name is None:
+        start = time.perf_counter()
+        data = read_matches(args.store, columns=['Season'] + PLAYER_COLUMNS)
+        links = resolve(data, ranking_listings(args.rankings))
+        write_identities(links, args.output)
+        total = len(match_names(data))
+        print(f'{len(links)} of {total} season names linked ({time.perf_counter() - start:.2f}s)')
+        print(links['method'].value_counts().to_string())
+        print(f"confidence < 0.9: {(links['confidence'] < 0.9).sum()}")
+    else:
+        links = read_identities(args.output)
+        print(links[links['Name'] == args.name].to_string(index=False))
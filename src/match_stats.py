@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+# Shared table of match statistics for the report tools. Every Result ("21/15,18/21,21/19",
+# Team 1's points first) is parsed once, with one regular expression over the whole column,
+# into integer set-score arrays; everything else is computed from those arrays.
+#
+#   match_table(data)       one row per match: set points, sets won, points and differences
+#   player_matches(data)    one row per (player, match), from the player's side of the net
+
+MAX_SETS = 3
+
+TEAM_COLUMNS = ['Team 1 Player 1', 'Team 1 Player 2', 'Team 2 Player 1', 'Team 2 Player 2']
+
+# Up to MAX_SETS "team 1/team 2" set scores separated by commas
+RESULT = r'^(\d+)/(\d+)' + r'(?:,(\d+)/(\d+))?' * (MAX_SETS - 1) + r'$'
+
+
+def parse_results(results):
+    """(team 1 points, team 2 points) per set as int arrays of shape (rows, MAX_SETS), and the set count per row.
+
+    Sets that were not played, and results that do not parse, count 0 points and no sets.
+    """
+    scores = pd.Series(results).astype('string').str.extract(RESULT).astype('float64').to_numpy()
+    played = ~np.isnan(scores[:, 0::2])
+    scores = np.nan_to_num(scores).astype(np.int64)
+    return scores[:, 0::2], scores[:, 1::2], played.sum(axis=1)
+
+
+def match_table(data):
+    """Per-match statistics of data, one row per row of data and in its order (with a fresh index)."""
+    team_1, team_2, sets = parse_results(data['Result'])
+    table = {'Sets Count': sets}
+    for i in range(MAX_SETS):
+        table[f'Set {i + 1} Team 1'] = team_1[:, i]
+        table[f'Set {i + 1} Team 2'] = team_2[:, i]
+    table['Team 1 Sets'] = (team_1 > team_2).sum(axis=1)
+    table['Team 2 Sets'] = (team_2 > team_1).sum(axis=1)
+    table['Team 1 Points'] = team_1.sum(axis=1)
+    table['Team 2 Points'] = team_2.sum(axis=1)
+    table['Abs Difference'] = np.abs(team_1 - team_2).sum(axis=1)
+    return pd.DataFrame(table)
+
+
+def opponents_columns(first, second, player):
+    """(first, second, display string, order-independent key) of a side's players other than player, as string Series."""
+    first = first.where(first != player)
+    second = second.where(second != player)
+    display = first.str.cat(second, sep=' & ').fillna(first).fillna(second).fillna('')
+    swap = (second < first).fillna(False).astype(bool)
+    low, high = first.where(~swap, second), second.where(~swap, first)
+    key = low.str.cat(high, sep=' & ').fillna(low).fillna(high).fillna('')
+    return first, second, display, key
+
+
+def player_matches(data, players=None):
+    """One row per (player, match) of data, optionally only for players, sorted by player and match.
+
+    Row is the position of the match in data. Opponent 1 and 2 are the other side's players,
+    Opponents lists them as the report shows them; Opponent Key is the same names sorted, the same for "A & B" and "B & A".
+    Score Difference is the player's side's points minus the other side's. Is Win is set when the
+    player is one of the listed winners.
+    """
+    positions = np.arange(len(data))
+    if players is not None:
+        # Only the matches of those players are parsed
+        positions = np.flatnonzero(np.logical_or.reduce([data[column].isin(players).to_numpy() for column in TEAM_COLUMNS]))
+        data = data.iloc[positions]
+    data = data.reset_index(drop=True)
+    names = {column: data[column].astype('string') for column in TEAM_COLUMNS + ['Winner Player 1', 'Winner Player 2']}
+    stats = match_table(data)
+
+    frames = []
+    for column in TEAM_COLUMNS:
+        team = 1 if column.startswith('Team 1') else 2
+        own = TEAM_COLUMNS[:2] if team == 1 else TEAM_COLUMNS[2:]
+        other = TEAM_COLUMNS[2:] if team == 1 else TEAM_COLUMNS[:2]
+        player = names[column]
+        keep = player.notna()
+        if players is not None:
+            keep &= player.isin(players).fillna(False)
+        rows = np.flatnonzero(keep.to_numpy())
+        player = player.iloc[rows].reset_index(drop=True)
+        partner_column = own[1] if column == own[0] else own[0]
+        partner = names[partner_column].iloc[rows].reset_index(drop=True)
+        opponent_1, opponent_2, display, key = opponents_columns(names[other[0]].iloc[rows].reset_index(drop=True),
+                                         names[other[1]].iloc[rows].reset_index(drop=True), player)
+        frames.append(pd.DataFrame({'Player': player, 'Row': rows, 'Team': team,
+                                    'Partner': partner.where(partner != player), 'Opponent 1': opponent_1,
+                                    'Opponent 2': opponent_2, 'Opponents': display, 'Opponent Key': key}))
+    # A name listed twice in one match counts once, on the first side it is found
+    table = pd.concat(frames, ignore_index=True).drop_duplicates(['Player', 'Row'])
+    table = table.sort_values(['Player', 'Row'], kind='stable', ignore_index=True)
+
+    rows = table['Row'].to_numpy()
+    team_1 = table['Team'].to_numpy() == 1
+    for column in ['Season', 'Date', 'Tournament Name', 'Tournament Class', 'Match', 'Result']:
+        if column in data.columns:
+            table[column] = data[column].iloc[rows].to_numpy()
+    player = table['Player'].astype('string')
+    table['Is Win'] = ((player == names['Winner Player 1'].iloc[rows].to_numpy()).fillna(False) |
+                       (player == names['Winner Player 2'].iloc[rows].to_numpy()).fillna(False)).to_numpy(dtype=bool)
+    own_points = np.where(team_1, stats['Team 1 Points'].to_numpy()[rows], stats['Team 2 Points'].to_numpy()[rows])
+    other_points = np.where(team_1, stats['Team 2 Points'].to_numpy()[rows], stats['Team 1 Points'].to_numpy()[rows])
+    table['Points'] = own_points
+    table['Opponent Points'] = other_points
+    table['Score Difference'] = own_points - other_points
+    table['Abs Difference'] = stats['Abs Difference'].to_numpy()[rows]
+    table['Sets Count'] = stats['Sets Count'].to_numpy()[rows]
+    table['Sets Won'] = np.where(team_1, stats['Team 1 Sets'].to_numpy()[rows], stats['Team 2 Sets'].to_numpy()[rows])
+    table['Sets Lost'] = np.where(team_1, stats['Team 2 Sets'].to_numpy()[rows], stats['Team 1 Sets'].to_numpy()[rows])
+    for i in range(MAX_SETS):
+        set_1, set_2 = stats[f'Set {i + 1} Team 1'].to_numpy()[rows], stats[f'Set {i + 1} Team 2'].to_numpy()[rows]
+        table[f'Set {i + 1} Points'] = np.where(team_1, set_1, set_2)
+        table[f'Set {i + 1} Opponent Points'] = np.where(team_1, set_2, set_1)
+    table['Row'] = positions[rows]
+    return table
@@ -0,0 +1,140 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'matches'))
+from match_store import STORE_PATH, read_matches
+from match_stats import player_matches
+from identity import IDENTITIES_PATH, PLAYER_COLUMNS, ranking_listings, read_identities, resolve
+
+# Precomputed player statistics for the web site, so a player page fetches one small JSON
+# shard instead of every match of the player and recomputing them in the browser
+# (src/utils/processPlayerData.js). Players are spread over SHARDS files by a 32-bit
+# FNV-1a hash of the UTF-8 name, public/player_stats/<hash % SHARDS as 2 hex digits>.json:
+#
+#   {"v": 1, "players": {"<name>": {"id": 101933, "g": 812, "d": [3, 5, 40, 61, 7, 9], "c": ["10/21,21/18,21/15"]}}}
+#
+#   id   Spiller-Id of the ranking lists (see identity.py), left out when the name has no link
+#   g    matches played
+#   d    deciding-set wins and matches: singles wins, singles matches, doubles wins, doubles
+#        matches, mixed wins, mixed matches
+#   c    results of the comebacks: three-set wins after losing the first set by more than 10
+#
+# Every shard is rewritten on each run, so players no longer in the store drop out.
+#
+#   python player_export.py
+#   python player_export.py --output-dir public/player_stats --shards 256
+
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public', 'player_stats')
+
+FORMAT_VERSION = 1
+SHARDS = 256
+# Lost by more than this many points, a first set makes a three-set win a comeback
+COMEBACK_MARGIN = 10
+
+# Match (event) values of the singles and mixed categories; everything else is doubles
+SINGLES = ['Herresingle', 'Damesingle']
+MIXED = ['Mixeddouble']
+
+
+def shard_of(name, shards=SHARDS):
+    """The shard number of a player name: 32-bit FNV-1a of its UTF-8 bytes, modulo shards."""
+    value = 0x811c9dc5
+    for byte in name.encode('utf-8'):
+        value = ((value ^ byte) * 0x01000193) & 0xffffffff
+    return value % shards
+
+
+def shard_file_name(shard):
+    return f'{shard:02x}.json'
+
+
+def player_stats(rows):
+    """Frame of the export fields per player, indexed by player, from player_matches() rows."""
+    rows = rows[rows['Player'].str.strip() != '']
+    kind = np.select([rows['Match'].isin(SINGLES).to_numpy(), rows['Match'].isin(MIXED).to_numpy()],
+                     ['singles', 'mixed'], 'doubles')
+    decider = rows['Sets Count'].to_numpy() == 3
+    win = rows['Is Win'].to_numpy()
+    counts = {'g': np.ones(len(rows), dtype=np.int64)}
+    for name in ['singles', 'doubles', 'mixed']:
+        in_kind = decider & (kind == name)
+        counts[f'{name} wins'] = in_kind & win
+        counts[f'{name} matches'] = in_kind
+    table = pd.DataFrame(counts).astype(np.int64).groupby(rows['Player'].to_numpy()).sum()
+
+    lost_first = rows['Set 1 Opponent Points'] - rows['Set 1 Points'] > COMEBACK_MARGIN
+    won_third = rows['Set 3 Points'] > rows['Set 3 Opponent Points']
+    comebacks = rows[decider & win & (lost_first & won_third).to_numpy()]
+    table['c'] = comebacks.groupby('Player', observed=True)['Result'].agg(list).reindex(table.index)
+    return table
+
+
+def player_ids(links):
+    """{name: Spiller-Id} of identity links, from the latest season each name is linked in."""
+    latest = links.sort_values(['Name', 'Season']).drop_duplicates('Name', keep='last')
+    return dict(zip(latest['Name'], latest['Spiller-Id']))
+
+
+def shard_documents(table, ids, shards=SHARDS):
+    """{shard: document} of every shard, empty shards included."""
+    documents = {shard: {'v': FORMAT_VERSION, 'players': {}} for shard in range(shards)}
+    decider_columns = [f'{name} {count}' for name in ['singles', 'doubles', 'mixed'] for count in ['wins', 'matches']]
+    deciders = table[decider_columns].to_numpy().tolist()
+    for name, games, decider, comebacks in zip(table.index, table['g'].tolist(), deciders, table['c']):
+        entry = {}
+        if name in ids:
+            entry['id'] = int(ids[name])
+        entry['g'] = games
+        entry['d'] = decider
+        if isinstance(comebacks, list):
+            entry['c'] = comebacks
+        documents[shard_of(name, shards)]['players'][name] = entry
+    return documents
+
+
+def write_shards(documents, output_dir=EXPORT_DIR):
+    """Write each document atomically as compact JSON; returns the total size in bytes."""
+    os.makedirs(output_dir, exist_ok=True)
+    size = 0
+    for shard, document in documents.items():
+        path = os.path.join(output_dir, shard_file_name(shard))
+        data = json.dumps(document, ensure_ascii=False, separators=(',', ':'))
+        temp_name = path + '.tmp'
+        with open(temp_name, 'w', encoding='utf-8') as file:
+            file.write(data)
+        os.replace(temp_name, path)
+        size += len(data.encode('utf-8'))
+    return size
+
+
+def export_players(data, links, output_dir=EXPORT_DIR, shards=SHARDS):
+    """Build and write the shards of every player in data; returns (players, bytes written)."""
+    table = player_stats(player_matches(data))
+    size = write_shards(shard_documents(table, player_ids(links), shards), output_dir)
+    return len(table), size
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write the precomputed player statistics of the web site.')
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--identities', default=IDENTITIES_PATH,
+                        help='identity links from identity.py; resolved from the ranking lists when missing')
+    parser.add_argument('--output-dir', default=EXPORT_DIR)
+    parser.add_argument('--shards', type=int, default=SHARDS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = read_matches(args.store)
+    if os.path.exists(args.identities):
+        links = read_identities(args.identities)
+    else:
+        links = resolve(data[['Season'] + PLAYER_COLUMNS], ranking_listings())
+    players, size = export_players(data, links, args.output_dir, args.shards)
+    print(f'{players} players in {args.shards} shards, {size / 1024:.0f} KB '
+          f'(~{size / args.shards / 1024:.1f} KB per shard), {time.perf_counter() - start:.2f}s')
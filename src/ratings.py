@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'matches'))
+from match_store import STORE_PATH, read_matches
+
+# Elo ratings replayed over the whole match history. Singles and doubles (men's, women's
+# and mixed) are separate pools. A doubles side is rated as the mean of its two players,
+# and both players get the side's whole rating change.
+#
+# The matches of one date form one rating period: every match of the day is scored
+# against the ratings at the start of the day, and the changes are summed with
+# numpy.add.at, so a replay is one small numpy step per date instead of work per row.
+# Ratings and match counts live in one float/int array per pool, indexed by player.
+#
+# The state is saved next to the match store as ratings.parquet. Later runs rate only
+# the tournaments that are not in it yet; a tournament dated before the last rated day
+# cannot be slotted into the past, so it triggers a full replay.
+#
+#   python ratings.py                     rate new tournaments (or everything, the first time)
+#   python ratings.py --full              replay the whole history
+#   python ratings.py --top 20 --pool singles
+
+RATINGS_PATH = os.path.join(os.path.dirname(STORE_PATH), 'ratings.parquet')
+
+POOLS = ['singles', 'doubles']
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+SCALE = 400.0
+
+TEAMS = [('Team 1 Player 1', 'Team 1 Player 2'), ('Team 2 Player 1', 'Team 2 Player 2')]
+
+
+def tournament_keys(data):
+    """The (season, tournament) of every row, as one string per row."""
+    return (data['Season'].astype('string') + '|' + data['Tournament Name'].astype('string')).fillna('')
+
+
+class Ratings:
+    """Array-backed Elo state of every player in every pool."""
+
+    def __init__(self, k_factor=K_FACTOR):
+        self.k_factor = k_factor
+        self.players = []
+        self.codes = {}
+        self.rating = {pool: np.empty(0) for pool in POOLS}
+        self.matches = {pool: np.empty(0, dtype=np.int32) for pool in POOLS}
+        self.last_played = {pool: np.empty(0, dtype='datetime64[D]') for pool in POOLS}
+        self.last_date = None
+        self.tournaments = set()
+
+    def player_codes(self, names):
+        """Array codes of a column of names (-1 for none); players not seen before are added."""
+        names = names.astype('string')
+        unique = names.dropna().unique()
+        new = [name for name in unique if name not in self.codes]
+        if new:
+            for name in new:
+                self.codes[name] = len(self.players)
+                self.players.append(name)
+            for pool in POOLS:
+                self.rating[pool] = np.concatenate([self.rating[pool], np.full(len(new), INITIAL_RATING)])
+                self.matches[pool] = np.concatenate([self.matches[pool], np.zeros(len(new), dtype=np.int32)])
+                self.last_played[pool] = np.concatenate([self.last_played[pool],
+                                                         np.full(len(new), np.datetime64('NaT'), dtype='datetime64[D]')])
+        lookup = pd.Series(np.arange(len(self.players)), index=self.players)
+        return names.map(lookup).fillna(-1).astype(np.int64).to_numpy()
+
+    def replay(self, data):
+        """Rate the matches of data in date order; returns the number of matches rated.
+
+        Matches without a date, with one player on one side and two on the other, or whose
+        listed winner is on neither side, are skipped.
+        """
+        data = data[data['Date'].notna()].sort_values('Date', kind='stable')
+        sides = [[self.player_codes(data[column]) for column in team] for team in TEAMS]
+        winner = data['Winner Player 1'].astype('string')
+        team_1_won = (winner == data[TEAMS[0][0]].astype('string')) | (winner == data[TEAMS[0][1]].astype('string'))
+        team_2_won = (winner == data[TEAMS[1][0]].astype('string')) | (winner == data[TEAMS[1][1]].astype('string'))
+        team_1_won, team_2_won = team_1_won.fillna(False).to_numpy(bool), team_2_won.fillna(False).to_numpy(bool)
+        valid = (team_1_won != team_2_won) & (sides[0][0] >= 0) & (sides[1][0] >= 0)
+        doubles = (sides[0][1] >= 0) & (sides[1][1] >= 0)
+        singles = (sides[0][1] < 0) & (sides[1][1] < 0)
+        dates = data['Date'].to_numpy().astype('datetime64[D]')
+
+        rated = 0
+        for pool, in_pool in (('singles', valid & singles), ('doubles', valid & doubles)):
+            rows = np.flatnonzero(in_pool)
+            if not len(rows):
+                continue
+            a1, a2, b1, b2 = (side[rows] for team in sides for side in team)
+            score = team_1_won[rows].astype(float)
+            day = dates[rows]
+            # Boundaries of the runs of equal dates; data is sorted by date
+            starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+            stops = np.r_[starts[1:], len(rows)]
+            for start, stop in zip(starts, stops):
+                self.rate_period(pool, a1[start:stop], a2[start:stop], b1[start:stop], b2[start:stop],
+                                 score[start:stop], day[start])
+            rated += len(rows)
+        if len(dates):
+            last = dates.max()
+            self.last_date = last if self.last_date is None else max(self.last_date, last)
+        self.tournaments.update(tournament_keys(data).unique())
+        return rated
+
+    def rate_period(self, pool, a1, a2, b1, b2, score, day):
+        """One rating period: team 1 (a1, a2) against team 2 (b1, b2), score 1 where team 1 won."""
+        rating = self.rating[pool]
+        if pool == 'doubles':
+            team_1 = (rating[a1] + rating[a2]) / 2
+            team_2 = (rating[b1] + rating[b2]) / 2
+            players = [a1, a2, b1, b2]
+        else:
+            team_1, team_2 = rating[a1], rating[b1]
+            players = [a1, b1]
+        expected = 1.0 / (1.0 + 10.0 ** ((team_2 - team_1) / SCALE))
+        change = self.k_factor * (score - expected)
+        delta = np.zeros(len(rating))
+        for i, side in enumerate(players):
+            # The first half of players is team 1
+            np.add.at(delta, side, change if i < len(players) // 2 else -change)
+        rating += delta
+        for side in players:
+            np.add.at(self.matches[pool], side, 1)
+            self.last_played[pool][side] = day
+
+    def table(self):
+        """Rating, matches and last played date of every rated player per pool, best first."""
+        frames = []
+        for pool in POOLS:
+            rated = np.flatnonzero(self.matches[pool] > 0)
+            frames.append(pd.DataFrame({'Pool': pool, 'Player': np.asarray(self.players, dtype=object)[rated],
+                                        'Rating': self.rating[pool][rated], 'Matches': self.matches[pool][rated],
+                                        'Last Played': self.last_played[pool][rated]}))
+        table = pd.concat(frames, ignore_index=True)
+        return table.sort_values(['Pool', 'Rating'], ascending=[True, False], ignore_index=True)
+
+    def save(self, path=RATINGS_PATH):
+        """Write the state of every player (rated or not) atomically to path."""
+        columns = {'Player': pa.array(self.players, pa.string())}
+        for pool in POOLS:
+            columns[f'{pool} rating'] = pa.array(self.rating[pool])
+            columns[f'{pool} matches'] = pa.array(self.matches[pool])
+            columns[f'{pool} last played'] = pa.array(self.last_played[pool])
+        table = pa.table(columns)
+        metadata = {'k_factor': self.k_factor, 'tournaments': sorted(self.tournaments),
+                    'last_date': str(self.last_date) if self.last_date is not None else None}
+        table = table.replace_schema_metadata({b'ratings': json.dumps(metadata).encode()})
+        temp_name = path + '.tmp'
+        pq.write_table(table, temp_name, compression='zstd')
+        os.replace(temp_name, path)
+
+    @classmethod
+    def load(cls, path=RATINGS_PATH):
+        table = pq.read_table(path)
+        metadata = json.loads(table.schema.metadata[b'ratings'])
+        state = cls(metadata['k_factor'])
+        state.players = table['Player'].to_pylist()
+        state.codes = {name: code for code, name in enumerate(state.players)}
+        for pool in POOLS:
+            state.rating[pool] = table[f'{pool} rating'].to_numpy().copy()
+            state.matches[pool] = table[f'{pool} matches'].to_numpy().astype(np.int32)
+            state.last_played[pool] = table[f'{pool} last played'].to_numpy().astype('datetime64[D]')
+        state.last_date = np.datetime64(metadata['last_date'], 'D') if metadata['last_date'] else None
+        state.tournaments = set(metadata['tournaments'])
+        return state
+
+
+def update_ratings(data, path=RATINGS_PATH, full=False):
+    """Bring the saved ratings up to date with the match rows in data; returns (state, matches rated, full replay).
+
+    Only tournaments not rated before are replayed, unless full is set, nothing is saved yet,
+    or a new tournament is dated before the last rated day.
+    """
+    state = None if full or not os.path.exists(path) else Ratings.load(path)
+    if state is not None:
+        new = data[~tournament_keys(data).isin(state.tournaments).to_numpy()]
+        if len(new) and state.last_date is not None and new['Date'].min() < pd.Timestamp(state.last_date):
+            state = None
+    replay_all = state is None
+    if replay_all:
+        state = Ratings()
+        new = data
+    rated = state.replay(new)
+    state.save(path)
+    return state, rated, replay_all
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Elo ratings over the match store.')
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--output', default=RATINGS_PATH)
+    parser.add_argument('--full', action='store_true', help='replay the whole history instead of only new tournaments')
+    parser.add_argument('--pool', choices=POOLS)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    state, rated, replay_all = update_ratings(read_matches(args.store), args.output, args.full)
+    print(f"Rated {rated} matches{' (full replay)' if replay_all else ''}, {time.perf_counter() - start:.2f}s")
+    table = state.table()
+    for pool in [args.pool] if args.pool else POOLS:
+        print(table[table['Pool'] == pool].head(args.top).to_string(index=False))
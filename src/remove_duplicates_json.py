@@ -1,38 +1,22 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'matches'))
+from dedup import drop_duplicate_matches
+from match_store import STORE_PATH, read_matches, write_matches
 
-import json
 
 def remove_duplicates_from_file(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-
-    # Ensure the data is a list, if not, return without modification
-    if not isinstance(data, list):
-        print("The JSON file does not contain a list. Exiting without changes.")
-        return
-
-    unique_matches = {}
-    for record in data:
-        # Create a tuple based on the fields which define uniqueness of a match
-        match_key = (
-            record["Season"],
-            record["Tournament Name"],
-            record["Date"],
-            record["Team 1 Player 1"],
-            record["Team 1 Player 2"],
-            record["Team 2 Player 1"],
-            record["Team 2 Player 2"]
-        )
-        if match_key not in unique_matches:
-            unique_matches[match_key] = record
-
-    unique_data = list(unique_matches.values())
-
-    with open(file_path, 'w', encoding='utf-8') as file:
-        json.dump(unique_data, file, indent=4, ensure_ascii=False)
+    data = read_matches(file_path)
+
+    # Keep the first record of every match (see matches/dedup.py for the key)
+    unique_data = drop_duplicate_matches(data)
 
+    write_matches(unique_data, file_path)
 
     print(f"Removed {len(data) - len(unique_data)} duplicates from {file_path}")
 
+
 # Call the function
-file_path = "C:/Users/Torstein/Documents/rankinglist-master (2)/rankinglist-master/badmintonstats/src/cleaned_file.json"
+file_path = STORE_PATH
 remove_duplicates_from_file(file_path)
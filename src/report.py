@@ -1,104 +1,90 @@
 from fpdf import FPDF
 import pandas as pd
+import argparse
+import json
+import os
+import re
+import sys
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
-def load_json(filepath):
-    return pd.read_json(filepath)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'matches'))
+from match_store import STORE_PATH, read_matches
+from player_index import PlayerIndex
+from match_stats import player_matches
+from head_to_head import H2H_PATH, HeadToHead, head_to_head_tables, nemeses, pick_nemesis
 
-def calculate_score_difference(result):
-    """Calculate the absolute score difference and number of sets."""
-    games = result.split(',')
-    # Changed to absolute difference to determine closest matches properly
-    score_difference = sum(abs(int(score.split('/')[0]) - int(score.split('/')[1])) for score in games)
-    return score_difference, len(games)
+# The columns of a player's matches the report functions work on
+REPORT_COLUMNS = ['Date', 'Tournament Name', 'Result', 'Opponents', 'Opponent Key', 'Is Win', 'Score Difference',
+                  'Abs Difference', 'Sets Count']
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'img', 'Badstat.png')
+
+# Letters NFKD does not take apart, for the diploma file names
+LETTERS = str.maketrans({'ø': 'o', 'Ø': 'O', 'æ': 'ae', 'Æ': 'AE', 'ß': 'ss', 'ł': 'l', 'Ł': 'L', 'đ': 'd', 'Đ': 'D'})
+
+def load_matches(season=None):
+    """Read the match store (matches/matches.parquet), only the given season if one is passed."""
+    return read_matches(STORE_PATH, season=season)
+
+def load_player_matches(player_name, season=None, index=None):
+    """Only the player's rows of the store, looked up in the player index (matches/player_index.py).
+
+    Only the row groups of the store holding the player's rows are read. For a run over many players,
+    pass the same PlayerIndex(whole_store=True), so the index and store are loaded once.
+    """
+    index = index or PlayerIndex(STORE_PATH)
+    return index.matches(player_name, season)
 
 def get_best_two_set_match(matches):
     """Retrieve the best two-set match where the player won based on the highest score difference."""
-    matches['Score Difference'], matches['Sets Count'] = zip(*matches['Result'].apply(calculate_score_difference))
-    two_set_wins = matches[(matches['Sets Count'] == 2) & (matches['Is Win'] == True)]
-    return two_set_wins.loc[two_set_wins['Score Difference'].idxmax()] if not two_set_wins.empty else None
+    two_set_wins = matches[(matches['Sets Count'] == 2) & matches['Is Win']]
+    return two_set_wins.loc[two_set_wins['Abs Difference'].idxmax()] if not two_set_wins.empty else None
 
 
 def get_closest_three_set_match(matches):
-    matches['Score Difference'], matches['Sets Count'] = zip(*matches['Result'].apply(calculate_score_difference))
     three_set_matches = matches[matches['Sets Count'] == 3]
-    closest_match = three_set_matches.loc[three_set_matches['Score Difference'].idxmin()] if not three_set_matches.empty else None
+    closest_match = three_set_matches.loc[three_set_matches['Abs Difference'].idxmin()] if not three_set_matches.empty else None
     print(f"Closest Three Set Match: {closest_match}")  # Debugging output
     return closest_match
 
 
 def parse_matches(matches, player_name, season):
+    """The player's matches of the season as rows of the shared stats table (match_stats.player_matches)."""
+    # matches may be the whole store or only the player's rows from load_player_matches
     print("Player Name:", player_name)
-    filtered_matches = matches[
-        (matches['Season'] == season) & (
-            (matches['Team 1 Player 1'] == player_name) |
-            (matches['Team 1 Player 2'] == player_name) |
-            (matches['Team 2 Player 1'] == player_name) |
-            (matches['Team 2 Player 2'] == player_name)
-        )
-    ]
-
-    results = []
-    for _, match in filtered_matches.iterrows():
-        if player_name in (match['Team 1 Player 1'], match['Team 1 Player 2']):
-            team_players = [match['Team 1 Player 1'], match['Team 1 Player 2']]
-            opponent_players = [match['Team 2 Player 1'], match['Team 2 Player 2']]
-        else:
-            team_players = [match['Team 2 Player 1'], match['Team 2 Player 2']]
-            opponent_players = [match['Team 1 Player 1'], match['Team 1 Player 2']]
-
-        scores = match['Result'].split(',')
-        player_scores = [int(score.split('/')[0]) if player_name in team_players else int(score.split('/')[1]) for score in scores]
-        opponent_scores = [int(score.split('/')[1]) if player_name in team_players else int(score.split('/')[0]) for score in scores]
-
-        player_score_total = sum(player_scores)
-        opponent_score_total = sum(opponent_scores)
-        score_diff = player_score_total - opponent_score_total
-        is_win = (player_name == match['Winner Player 1']) or (player_name == match['Winner Player 2'])
-
-        # Filter out the player's name and NaN from the opponents
-        opponents = [op for op in opponent_players if not pd.isna(op) and op != player_name]
-
-        results.append({
-            'Date': match['Date'],
-            'Tournament Name': match['Tournament Name'],
-            'Result': match['Result'],
-            'Opponents': " & ".join(opponents),
-            'Is Win': is_win,
-            'Score Difference': score_diff
-        })
-
-    return pd.DataFrame(results)
-
-
+    table = player_matches(matches[matches['Season'] == season], [player_name])
+    return table[REPORT_COLUMNS]
 
 
+def get_nemesis(matches, head_to_head=None, player_name=None, season=None):
+    """(nemesis, matches against them): the side of the net the player lost to most (head_to_head.pick_nemesis).
 
-
-def get_nemesis(matches):
-    # Filter matches where the player lost
-    lost_matches = matches[matches['Is Win'] == False]
-
-    # Group lost matches by opponent
-    opponent_groups = lost_matches['Opponents'].value_counts()
-
-    if not opponent_groups.empty:
-        # Select the opponent with the highest count of losses
-        nemesis = opponent_groups.idxmax()
-        # Retrieve all matches against the nemesis
-        nemesis_matches = matches[matches['Opponents'].str.contains(nemesis, na=False)]
-        return nemesis, nemesis_matches
+    With a HeadToHead the nemesis is looked up in the precomputed records instead of counted from matches.
+    """
+    if head_to_head is not None:
+        nemesis, _ = head_to_head.nemesis(player_name, season)
+    else:
+        lost = ~matches['Is Win']
+        records = pd.DataFrame({'matches': matches.groupby('Opponent Key').size(),
+                                'losses': lost.groupby(matches['Opponent Key']).sum()})
+        nemesis = pick_nemesis(records.to_dict('index'))
+
+    if nemesis is not None:
+        # Exactly that side, in either order of the pair; not every match where one of them played
+        return nemesis, matches[matches['Opponent Key'] == nemesis]
     else:
         return "No matches", pd.DataFrame()  # Return an empty DataFrame if there is no nemesis
 
 
-def get_match_stats(data, player_name, season):
+def get_match_stats(data, player_name, season, head_to_head=None):
     print(data.head())  # Initial data check
     matches = parse_matches(data, player_name, season)
     print(matches.head())  # Check parsed matches
 
     if not matches.empty:
-        nemesis, nemesis_matches = get_nemesis(matches)  # Correctly unpack both values
+        nemesis, nemesis_matches = get_nemesis(matches, head_to_head, player_name, season)
         best_two_set_match = get_best_two_set_match(matches)
         closest_three_set_match = get_closest_three_set_match(matches)
 
@@ -118,17 +104,15 @@ def get_match_stats(data, player_name, season):
     }
 
 
-
 class PDF(FPDF):
     def header(self):
         # Logo
-        self.image('C:/Users/Torstein/Documents/rankinglist-master (2)/rankinglist-master/badmintonstats/src/img/Badstat.png', 10, 8, 33)
+        self.image(LOGO_PATH, 10, 8, 33)
         # Set font for the title, move to the right to center the title after the logo
         self.set_font('Arial', 'B', 16)
         self.cell(80)  # Move to the right to make space for the title next to the logo
         self.ln(20)  # Line break to move below the header
 
-
     def footer(self):
         self.set_y(-15)
         self.set_font('Arial', 'I', 8)
@@ -140,7 +124,23 @@ def format_date(date):
         return date.strftime('%d.%m.%Y')
     return "N/A"
 
-def create_pdf(player_name, match_stats):
+def diploma_file_name(player_name, taken=()):
+    """'ola_nordmann_diploma.pdf': the name as lower-case ASCII words joined by '_', numbered when taken."""
+    slug = unicodedata.normalize('NFKD', player_name.translate(LETTERS)).encode('ascii', 'ignore').decode('ascii')
+    slug = re.sub(r'[^a-z0-9]+', '_', slug.lower()).strip('_') or 'player'
+    file_name, number = f"{slug}_diploma.pdf", 2
+    while file_name in taken:
+        file_name, number = f"{slug}_{number}_diploma.pdf", number + 1
+    return file_name
+
+def diploma_file_names(players):
+    """{player: file name} with a different file for every player, even when their names slugify alike."""
+    names = {}
+    for player in sorted(players):
+        names[player] = diploma_file_name(player, set(names.values()))
+    return names
+
+def create_pdf(player_name, match_stats, season="2023/2024", output_dir=".", file_name=None):
     pdf = PDF()
     pdf.add_page()
 
@@ -151,7 +151,7 @@ def create_pdf(player_name, match_stats):
 
     # Performance Summary Section
     pdf.set_font("Arial", "B", 14)
-    pdf.cell(0, 10, "Sesongen 2023/2024", 0, 1, 'C')
+    pdf.cell(0, 10, f"Sesongen {season}", 0, 1, 'C')
     pdf.ln(5)
 
    # Matches sections
@@ -215,19 +215,112 @@ def create_pdf(player_name, match_stats):
             pdf.cell(col_widths[4], 10, outcome, 1)
             pdf.ln()
 
-
-    pdf.output(f"{player_name.replace(' ', '_').lower()}_diploma.pdf")
+    path = os.path.join(output_dir, file_name or diploma_file_name(player_name))
+    pdf.output(path)
     print("PDF generated successfully.")
-
-
-
-
+    return path
+
+
+NO_MATCH_STATS = {
+    "For lett?": "No matches",
+    "Nervepirrende?": "No matches",
+    "Nemesis": "No matches",
+    "Nemesis Details": pd.DataFrame(),
+    "Total Wins": 0
+}
+
+def season_match_stats(data, season, players=None):
+    """{player: get_match_stats(data, player, season)} for every player of the season, or only players.
+
+    The statistics of all players are computed together with groupby instead of one scan per player.
+    """
+    long = player_matches(data[data['Season'] == season], players)
+    # Blank names are left over from empty cells in a few tournament files
+    long = long[long['Player'].str.strip() != '']
+
+    def first_per_player(rows):
+        return {player: row for player, row in zip(rows['Player'], rows.drop(columns='Player').to_dict('records'))}
+
+    def as_match(row):
+        return pd.Series([row[c] for c in REPORT_COLUMNS], index=REPORT_COLUMNS, dtype=object)
+
+    # Best two-set win: largest absolute difference, the first such match on ties (idxmax)
+    two_set_wins = long[(long['Sets Count'] == 2) & long['Is Win']]
+    best = first_per_player(two_set_wins.sort_values(['Player', 'Abs Difference', 'Row'], ascending=[True, False, True],
+                                                     kind='stable').drop_duplicates('Player'))
+    # Closest three-set match: smallest absolute difference, the first such match on ties (idxmin)
+    three_set = long[long['Sets Count'] == 3]
+    closest = first_per_player(three_set.sort_values(['Player', 'Abs Difference', 'Row'], kind='stable')
+                               .drop_duplicates('Player'))
+
+    # Nemesis: from the season's head-to-head records of every player, as head_to_head.py stores them
+    season_nemeses = nemeses(head_to_head_tables(long)['pairs'])
+    against = long['Opponent Key'].to_numpy() == long['Player'].map(season_nemeses).to_numpy()
+    nemesis_matches = {player: rows.drop(columns='Player').reset_index(drop=True) for player, rows
+                       in long.loc[against, ['Player'] + REPORT_COLUMNS].groupby('Player', sort=False)}
+
+    wins = long.groupby('Player', sort=False)['Is Win'].sum()
+    stats = {}
+    for player, player_wins in wins.items():
+        stats[player] = {
+            "For lett?": as_match(best[player]) if player in best else "No matches",
+            "Nervepirrende?": as_match(closest[player]) if player in closest else "No matches",
+            "Nemesis": season_nemeses.get(player, "No matches"),
+            "Nemesis Details": nemesis_matches.get(player, pd.DataFrame()),
+            "Total Wins": player_wins
+        }
+    for player in players or []:
+        stats.setdefault(player, NO_MATCH_STATS)
+    return stats
+
+def render_diploma(player_name, match_stats, season, output_dir, file_name):
+    """create_pdf in a worker process; returns the path written."""
+    return create_pdf(player_name, match_stats, season, output_dir, file_name)
+
+def render_diplomas(stats, season, output_dir, workers=None):
+    """Render one diploma per player of stats across a process pool and write manifest.json to output_dir.
+
+    A player whose PDF fails is listed under failed with the error, and the others are still rendered.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {'season': season, 'generated': [], 'failed': []}
+    # Named up front: the workers run at the same time and must not write each other's files
+    file_names = diploma_file_names(stats)
+    with ProcessPoolExecutor(workers) as executor:
+        futures = {player: executor.submit(render_diploma, player, player_stats, season, output_dir, file_names[player])
+                   for player, player_stats in stats.items()}
+        for player in sorted(futures):
+            try:
+                manifest['generated'].append({'player': player, 'file': os.path.basename(futures[player].result())})
+            except Exception as e:
+                manifest['failed'].append({'player': player, 'error': f"{type(e).__name__}: {e}"})
+    temp_name = os.path.join(output_dir, 'manifest.json.tmp')
+    with open(temp_name, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(temp_name, os.path.join(output_dir, 'manifest.json'))
+    return manifest
 
 
 if __name__ == "__main__":
-    data = load_json(r'C:\Users\Torstein\Documents\rankinglist-master (2)\rankinglist-master\badmintonstats\src\cleaned_file.json')
-    player_name = input("Enter the player name: ")
-    season = "2023/2024"  # Specify the desired season here
-    match_stats = get_match_stats(data, player_name, season)
-    create_pdf(player_name, match_stats)
-    print(f"Diploma PDF generated for {player_name} with detailed match statistics.")
+    parser = argparse.ArgumentParser(description='Generate diploma PDFs from the match store.')
+    parser.add_argument('--season', default="2023/2024")
+    parser.add_argument('--batch', action='store_true', help='one diploma for every player of the season')
+    parser.add_argument('--players', nargs='*', help='with --batch, only these players')
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--workers', type=int, help='processes rendering PDFs (default: one per CPU)')
+    args = parser.parse_args()
+    season = args.season
+
+    if args.batch:
+        start = datetime.now()
+        stats = season_match_stats(load_matches(season), season, args.players)
+        manifest = render_diplomas(stats, season, args.output_dir, args.workers)
+        print(f"{len(manifest['generated'])} diplomas, {len(manifest['failed'])} failed, "
+              f"{(datetime.now() - start).total_seconds():.1f}s; see {os.path.join(args.output_dir, 'manifest.json')}")
+    else:
+        player_name = input("Enter the player name: ")
+        data = load_player_matches(player_name, season)
+        head_to_head = HeadToHead(H2H_PATH) if os.path.exists(H2H_PATH) else None
+        match_stats = get_match_stats(data, player_name, season, head_to_head)
+        create_pdf(player_name, match_stats, season, args.output_dir)
+        print(f"Diploma PDF generated for {player_name} with detailed match statistics.")
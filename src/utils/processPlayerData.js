@@ -1,7 +1,68 @@
 import { getPlayerMatches } from '../services/databaseService';
 
+// Precomputed stats written by src/player_export.py; must match its SHARDS and hash
+const PLAYER_STATS_SHARDS = 256;
+const PLAYER_STATS_VERSION = 1;
+
+// 32-bit FNV-1a of the UTF-8 name, modulo the shard count, as two hex digits
+const playerStatsShard = (playerName) => {
+    let hash = 0x811c9dc5;
+    new TextEncoder().encode(playerName).forEach(byte => {
+        hash = Math.imul(hash ^ byte, 0x01000193) >>> 0;
+    });
+    return (hash % PLAYER_STATS_SHARDS).toString(16).padStart(2, '0');
+};
+
+const rate = (wins, matches) => matches > 0 ? (wins / matches) * 100 : 0;
+
+// Stats from a shard entry: { g: games, d: [singles wins, matches, doubles wins, matches, mixed wins, matches], c: [comeback results] }
+const statsFromExport = (entry) => {
+    const [singleDeciderWins, singleDeciderMatches, doubleDeciderWins, doubleDeciderMatches,
+           mixDeciderWins, mixDeciderMatches] = entry.d;
+    const comebackWinScores = entry.c || [];
+    const deciderWins = singleDeciderWins + doubleDeciderWins + mixDeciderWins;
+    const deciderMatches = singleDeciderMatches + doubleDeciderMatches + mixDeciderMatches;
+    const deciderWinRate = rate(deciderWins, deciderMatches);
+    return {
+        gamesPlayed: entry.g,
+        comebackWin: comebackWinScores.length > 0,
+        comebackWinScores,
+        comebackGames: comebackWinScores.length,
+        deciderWins,
+        deciderMatches,
+        deciderWinRate,
+        singleDeciderWins,
+        singleDeciderMatches,
+        singleDeciderWinRate: rate(singleDeciderWins, singleDeciderMatches),
+        doubleDeciderWins,
+        doubleDeciderMatches,
+        doubleDeciderWinRate: rate(doubleDeciderWins, doubleDeciderMatches),
+        mixDeciderWins,
+        mixDeciderMatches,
+        mixDeciderWinRate: rate(mixDeciderWins, mixDeciderMatches),
+        deciderDominator: deciderWinRate > 60,
+        strongThirdSetPercentage: deciderMatches > 0 ? Math.round(deciderWins / deciderMatches * 100) : 0,
+    };
+};
+
+// The player's precomputed stats, or null when there is no export (or the player is not in it)
+const loadExportedStats = async (playerName) => {
+    try {
+        const response = await fetch(`/player_stats/${playerStatsShard(playerName)}.json`);
+        if (!response.ok) return null;
+        const shard = await response.json();
+        const entry = shard.v === PLAYER_STATS_VERSION ? shard.players[playerName] : undefined;
+        return entry ? statsFromExport(entry) : null;
+    } catch (error) {
+        return null;
+    }
+};
+
 const processPlayerData = async (playerName) => {
     try {
+        const exported = await loadExportedStats(playerName);
+        if (exported) return exported;
+
         const playerMatches = await getPlayerMatches(playerName);
 
         const filteredMatches = playerMatches.filter(match =>
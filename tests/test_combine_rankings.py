@@ -0,0 +1,46 @@
+import json
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rankinglister'))
+import combine_rankings
+
+
+def write_year(folder, year, category, rows):
+    os.makedirs(folder, exist_ok=True)
+    frame = pd.DataFrame(rows, columns=['Plass.', 'Spiller-Id', 'Navn', 'Klasse', 'Poeng'])
+    frame.to_csv(os.path.join(folder, f'{year}_{category}_1.csv'), index=False)
+
+
+def test_main_without_arguments_combines_every_category(tmp_path, monkeypatch):
+    for category in combine_rankings.CATEGORIES:
+        folder = tmp_path / category
+        write_year(folder, 2023, category, [[1, 100001, 'Ola Nordmann, Asker', 'E', 120]])
+        write_year(folder, 2024, category, [[1, 100001, 'Ola Nordmann, Moss', 'E', 80],
+                                            [2, 100002, 'Kari Nordmann, Asker', 'E', 40]])
+    monkeypatch.setattr(combine_rankings, 'ROOT', str(tmp_path))
+
+    combine_rankings.main([])
+
+    for category, output in combine_rankings.CATEGORIES.items():
+        combined = pd.read_csv(tmp_path / category / output)
+        assert combined['Spiller-Id'].tolist() == [100001, 100002]
+        assert combined['2023'].tolist() == [120.0, 0.0]
+        assert combined['2024'].tolist() == [80.0, 40.0]
+        assert combined['Current Club'].tolist() == ['Moss', 'Asker']
+
+
+def test_export_creates_its_folder(tmp_path):
+    combined = pd.DataFrame({'Spiller-Id': [100001], 'Navn': ['Ola Nordmann'], 'All Clubs': ['Asker|Moss'],
+                             'Current Club': ['Moss'], '2023': [120.0], '2024': [80.0]})
+    path = tmp_path / 'public' / 'combined_rankingsHS.json'
+
+    sizes = combine_rankings.write_export(combined, str(path), ['gz'])
+
+    assert set(sizes) == {str(path), str(path) + '.gz'}
+    document = json.loads(path.read_text(encoding='utf-8'))
+    assert document['points'] == [[120], [80]]
+    assert [document['clubs'][i] for i in document['clubs_of'][0]] == ['Asker', 'Moss']
+    assert document['clubs'][document['club'][0]] == 'Moss'
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'matches'))
+from dedup import MATCH_KEY, DedupIndex, SqliteDedupIndex, canonical_values, drop_duplicate_matches, key_hash
+
+
+def row(team_1, team_2, date='18.11.2023'):
+    return dict(zip(MATCH_KEY, ['2023/2024', 'Asker Open', date] + team_1 + team_2))
+
+
+def test_swapped_partners_have_one_key():
+    listed = row(['Ola Nordmann', 'Per Hansen'], ['Kari Dahl', 'Lise Berg'])
+    swapped = row(['Per Hansen', 'Ola Nordmann'], ['Lise Berg', 'Kari Dahl'])
+
+    assert canonical_values(listed) == canonical_values(swapped)
+    assert key_hash(canonical_values(listed)) == key_hash(canonical_values(swapped))
+
+
+def test_singles_key_keeps_the_missing_partner():
+    singles = row([None, 'Ola Nordmann'], [None, 'Kari Dahl'])
+
+    assert canonical_values(singles)[3:] == ['', 'Ola Nordmann', '', 'Kari Dahl']
+
+
+def test_swapped_duplicates_collapse(tmp_path):
+    rows = [row(['Ola Nordmann', 'Per Hansen'], ['Kari Dahl', 'Lise Berg']),
+            row(['Per Hansen', 'Ola Nordmann'], ['Lise Berg', 'Kari Dahl']),
+            row(['Ola Nordmann', 'Per Hansen'], ['Kari Dahl', 'Lise Berg'], date='19.11.2023')]
+
+    for index in [DedupIndex(), SqliteDedupIndex(str(tmp_path / 'dedup.sqlite'))]:
+        assert [index.add(r) for r in rows] == [True, False, True]
+        assert len(index) == 2
+        index.close()
+
+    kept = drop_duplicate_matches(pd.DataFrame(rows))
+    assert kept.index.tolist() == [0, 2]
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'matches'))
+from fjern_tab import fix_rows, repair_shifts
+from match_store import COLUMNS, encode
+
+MATCH = ['2023/2024', 'Asker Open', '18.11.2023', 'SEN A']
+
+# (shifted row, the row in place) per kind of shift, from Match on
+SHIFTED = {
+    'doubles': (['Herredouble', 'Ola Nordmann', 'Per Hansen', 'Kari Dahl', 'Lise Berg', '21/15,21/17', 'Ola Nordmann',
+                 'Per Hansen', None],
+                ['Herredouble', 'Ola Nordmann', 'Ola Nordmann', 'Per Hansen', 'Kari Dahl', 'Lise Berg', '21/15,21/17',
+                 'Ola Nordmann', 'Per Hansen']),
+    'singles': (['Herresingle', 'Lise Berg', 'Ola Nordmann', None, 'Kari Dahl', '15/21,21/19,21/18', 'Ola Nordmann',
+                 None, None],
+                ['Herresingle', None, 'Ola Nordmann', None, 'Lise Berg', 'Kari Dahl', '15/21,21/19,21/18',
+                 'Ola Nordmann', None]),
+    'singles, empty tab': (['Damesingle', None, None, 'Kari Dahl', None, '21/9,21/11', 'Kari Dahl', None, None],
+                           ['Damesingle', None, None, 'Kari Dahl', None, None, '21/9,21/11', 'Kari Dahl', None]),
+}
+
+IN_PLACE = ['Mixeddouble', None, 'Ola Nordmann', 'Kari Dahl', 'Per Hansen', 'Lise Berg', '21/12,21/13', 'Ola Nordmann',
+            'Kari Dahl']
+
+
+def frame(rows):
+    return encode(pd.DataFrame([MATCH + row for row in rows], columns=COLUMNS))
+
+
+def as_lists(data):
+    return data.astype(object).where(data.notna(), None).values.tolist()
+
+
+def test_every_shift_kind_is_repaired():
+    data = frame([shifted for shifted, _ in SHIFTED.values()] + [IN_PLACE])
+
+    repaired, report = repair_shifts(data)
+
+    assert as_lists(repaired[COLUMNS[4:]]) == [fixed for _, fixed in SHIFTED.values()] + [IN_PLACE]
+    for kind in SHIFTED:
+        assert report['repaired ' + kind] == 1
+    assert report['in place'] == 1
+
+
+def test_repair_matches_the_row_by_row_repair():
+    data = frame([shifted for shifted, _ in SHIFTED.values()] + [IN_PLACE])
+
+    vectorized = encode(repair_shifts(data)[0])
+    by_row = encode(fix_rows(data)[0].replace('', None))
+
+    pd.testing.assert_frame_equal(vectorized, by_row)
+
+
+def test_second_run_changes_nothing():
+    once, _ = repair_shifts(frame([shifted for shifted, _ in SHIFTED.values()] + [IN_PLACE]))
+
+    twice, report = repair_shifts(once)
+
+    pd.testing.assert_frame_equal(twice, once)
+    assert report['in place'] == len(once)
+    assert sum(report['repaired ' + kind] for kind in SHIFTED) == 0
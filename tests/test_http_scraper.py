@@ -0,0 +1,178 @@
+import html
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'viktig'))
+import http_scraper
+from checkpoint import CheckpointStore
+from http_scraper import BASE_URL, HttpScraper
+
+SEASON = {'value': '202023', 'text': '2023/2024'}
+
+# class value -> (name, {tab: [(winner, loser, result)]}); a class without tabs has no 'Vis alle kamper'
+CLASSES = {
+    '11': ('HS A', {'Herresingle': [('Ola Nordmann', 'Per Hansen', '21/15,21/17')]}),
+    '12': ('MD A', {'Herredouble': [('Ola Nordmann/Per Hansen', 'Lars Dahl/Jon Berg', '21/12,21/13')],
+                    'Mixeddouble': [('Ola Nordmann/Kari Dahl', 'Per Hansen/Lise Berg', '15/21,21/19,21/18')]}),
+    '13': ('DS B', {}),
+}
+
+
+class Response:
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.ok = True
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+class FakePortal:
+    """A results page that keeps its state in __VIEWSTATE and answers postbacks like the portal's controls."""
+
+    def __init__(self, wrong_tab=False):
+        self.wrong_tab = wrong_tab
+        self.posts = []
+
+    def session(self):
+        portal = self
+
+        class Session:
+            cookies = {}
+
+            def get(self, url, timeout=None):
+                return Response(url, portal.page({}))
+
+            def post(self, url, data=None, timeout=None):
+                portal.posts.append(data['__EVENTTARGET'])
+                return Response(url, portal.page(portal.handle(data)))
+
+            def close(self):
+                pass
+        return Session()
+
+    def handle(self, data):
+        state = json.loads(data['__VIEWSTATE'])
+        target, argument = data['__EVENTTARGET'], data['__EVENTARGUMENT']
+        if 'ctl00$Main$ButtonSearch' in data:
+            # Enter in the date box clicks the search button
+            state.update(season=data['ctl00$Main$DropDownListSeasonPlanSeason'], date=data['ctl00$Main$TextBoxSeasonPlanDate1'])
+        elif target == 'ctl00$Main$Tournament':
+            state.update(tournament=argument)
+        elif target == 'ctl00$Main$ClassChanged':
+            state.update(tournament_class=data['ctl00$Main$HiddenClass'], all=False, tab=None)
+        elif target == 'ctl00$Main$ShowAll':
+            state.update(all=True, tab=sorted(CLASSES[state['tournament_class']][1])[0])
+        elif target == 'ctl00$Main$Tab':
+            state.update(tab=argument)
+        return state
+
+    def page(self, state):
+        state.setdefault('season', '202024')
+        state.setdefault('date', '')
+        body = ''
+        if state.get('tournament'):
+            body += '<div class="selectedtournamentspan"><h2>18.11.2023 Asker Open</h2></div>'
+            options = ''.join(f'<option value="{value}"{" selected" if value == state.get("tournament_class") else ""}>{name}</option>'
+                              for value, (name, _) in CLASSES.items())
+            body += f'<select onchange="return SelectTournamentClass1(this.value);">{options}</select>'
+            body += ("<script>function SelectTournamentClass1(value) { document.getElementById('HiddenClass').value = value; "
+                     "__doPostBack('ctl00$Main$ClassChanged', ''); return false; }</script>")
+            tabs = CLASSES[state['tournament_class']][1] if state.get('tournament_class') else {}
+            if tabs and not state.get('all'):
+                body += '<a href="javascript:__doPostBack(\'ctl00$Main$ShowAll\',\'\')">Vis alle kamper</a>'
+            if state.get('all'):
+                shown = state['tab']
+                if self.wrong_tab:
+                    shown = next((tab for tab in tabs if tab != shown), shown)
+                for tab in tabs:
+                    body += (f'<div class="{"tabSelected" if tab == shown else "tab"}">'
+                             f'<a href="javascript:__doPostBack(\'ctl00$Main$Tab\',\'{tab}\')">{tab}</a></div>')
+                rows = ''.join(f'<tr><td class="player winner">{"".join(f"<a>{p}</a>" for p in winner.split("/"))}</td>'
+                               f'<td class="player">{"".join(f"<a>{p}</a>" for p in loser.split("/"))}</td>'
+                               f'<td class="result">{result}</td></tr>' for winner, loser, result in tabs.get(state['tab'], []))
+                body += f'<table class="matchlist">{rows}</table>'
+        elif state['date']:
+            body += ('<table><tr class="row" onclick="__doPostBack(\'ctl00$Main$Tournament\',\'7\')">'
+                     '<td class="title">Asker Open:</td></tr></table>')
+        seasons = ''.join(f'<option value="{value}"{" selected" if value == state["season"] else ""}>{value}</option>'
+                          for value in ('202023', '202024'))
+        return f'''<html><body><form method="post" action="./" id="aspnetForm">
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{html.escape(json.dumps(state))}"/>
+<input type="hidden" name="ctl00$Main$HiddenClass" id="HiddenClass" value="{state.get('tournament_class') or ''}"/>
+<select name="ctl00$Main$DropDownListSeasonPlanSeason" id="DropDownListSeasonPlanSeason">{seasons}</select>
+<div onkeypress="javascript:return WebForm_FireDefaultButton(event, 'ButtonSearch')">
+<input name="ctl00$Main$TextBoxSeasonPlanDate1" id="TextBoxSeasonPlanDate1" type="text" value="{state['date']}"/>
+<input type="submit" name="ctl00$Main$ButtonSearch" id="ButtonSearch" value="Søk"/></div>
+{body}</form></body></html>'''
+
+
+@pytest.fixture
+def live(monkeypatch):
+    def scraper(portal, **options):
+        monkeypatch.setattr(http_scraper, 'make_session', lambda concurrency: portal.session())
+        return HttpScraper(BASE_URL, concurrency=2, **options)
+    return scraper
+
+
+def test_live_scrape_posts_back_every_step(live):
+    portal = FakePortal()
+    scraper = live(portal)
+
+    tournaments = scraper.list_tournaments(SEASON)
+    rows = scraper.collect_tournament(SEASON, tournaments[0])
+
+    assert tournaments == [{'name': 'Asker Open', 'href': "javascript:__doPostBack('ctl00$Main$Tournament','7')"}]
+    head = ['2023/2024', 'Asker Open', '18.11.2023']
+    assert rows == [
+        head + ['HS A', 'Herresingle', '', 'Ola Nordmann', '', 'Per Hansen', '21/15,21/17', 'Ola Nordmann', ''],
+        head + ['MD A', 'Herredouble', 'Ola Nordmann', 'Per Hansen', 'Lars Dahl', 'Jon Berg', '21/12,21/13', 'Ola Nordmann', 'Per Hansen'],
+        head + ['MD A', 'Mixeddouble', 'Ola Nordmann', 'Kari Dahl', 'Per Hansen', 'Lise Berg', '15/21,21/19,21/18', 'Ola Nordmann', 'Kari Dahl'],
+    ]
+    # DS B has no 'Vis alle kamper', and only the tabs a class has are opened
+    assert portal.posts.count('ctl00$Main$ShowAll') == 2
+    assert portal.posts.count('ctl00$Main$Tab') == 3
+
+
+def test_page_showing_another_tab_raises(live):
+    scraper = live(FakePortal(wrong_tab=True))
+    tournament = scraper.list_tournaments(SEASON)[0]
+
+    with pytest.raises(ValueError, match='Asked for tab Herredouble'):
+        scraper.collect_tournament(SEASON, tournament)
+
+
+def test_season_the_page_does_not_show_raises(live):
+    scraper = live(FakePortal())
+
+    with pytest.raises(ValueError, match='Asked for season 201999'):
+        scraper.list_tournaments({'value': '201999', 'text': '1999/2000'})
+
+
+def test_live_refresh_skips_old_tournaments_and_unchanged_tabs(live, tmp_path):
+    portal = FakePortal()
+    store = CheckpointStore(str(tmp_path / 'checkpoint.db'))
+
+    def refresh(refresh_days):
+        scraper = live(portal, output_dir=str(tmp_path), store=store, incremental=True, refresh_days=refresh_days)
+        del portal.posts[:]
+        scraper.scrape_season(SEASON)
+        return scraper
+
+    # Never scraped: walked and written
+    first = refresh(30)
+    assert len(first.added) == 3
+    assert store.is_tournament_done('2023/2024', 'Asker Open')
+    # Dated 18.11.2023, outside the window: not opened at all
+    refresh(30)
+    assert 'ctl00$Main$Tournament' not in portal.posts
+    # Walked again, every tab unchanged
+    again = refresh(None)
+    assert 'ctl00$Main$Tournament' in portal.posts
+    assert (again.added, again.removed) == ([], [])
@@ -0,0 +1,72 @@
+import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'viktig'))
+from checkpoint import CheckpointStore
+from incremental import TournamentRefresh, due_for_refresh, read_tournament_rows
+from row_sink import TournamentSink
+
+HEAD = ['2023/2024', 'Asker Open', '18.11.2023', 'SEN A']
+SINGLES = HEAD + ['Herresingle', '', 'Ola Nordmann', '', 'Per Hansen', '21/15,21/17', 'Ola Nordmann', '']
+DOUBLES = HEAD + ['Herredouble', 'Ola Nordmann', 'Per Hansen', 'Lars Dahl', 'Jon Berg', '21/12,21/13', 'Ola Nordmann', 'Per Hansen']
+LATE = HEAD + ['Herredouble', 'Kari Dahl', 'Lise Berg', 'Ola Nordmann', 'Per Hansen', '21/19,21/19', 'Kari Dahl', 'Lise Berg']
+
+
+def page(*results):
+    return '<table class="matchlist">' + ''.join(f'<tr><td>{result}</td></tr>' for result in results) + '</table>'
+
+
+def refresh_run(store, file_name, pages, parsed):
+    """Refresh one tournament from {tab: page}; parsed[tab] are its rows, and the tabs actually parsed are returned."""
+    refresh = TournamentRefresh(store, '2023/2024', 'Asker Open', file_name)
+    reparsed = []
+    for tab, source in pages.items():
+        if not refresh.unchanged('SEN A', tab, source):
+            reparsed.append(tab)
+            refresh.write_rows('SEN A', tab, parsed[tab])
+    return reparsed, refresh.finish()
+
+
+def test_only_changed_tabs_are_parsed_and_diffed(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoint.db'))
+    file_name = str(tmp_path / 'Asker Open_2023-2024.csv')
+    with TournamentSink(file_name) as sink:
+        sink.write([SINGLES, DOUBLES])
+
+    first = {'Herresingle': page('21/15,21/17'), 'Herredouble': page('21/12,21/13')}
+    reparsed, (added, removed) = refresh_run(store, file_name, first, {'Herresingle': [SINGLES], 'Herredouble': [DOUBLES]})
+    # Nothing stored yet, so every tab is parsed, and none differs from the CSV
+    assert reparsed == ['Herresingle', 'Herredouble']
+    assert (added, removed) == ([], [])
+
+    later = {'Herresingle': first['Herresingle'], 'Herredouble': page('21/12,21/13', '21/19,21/19')}
+    reparsed, (added, removed) = refresh_run(store, file_name, later, {'Herredouble': [DOUBLES, LATE]})
+    assert reparsed == ['Herredouble']
+    assert (added, removed) == ([LATE], [])
+    assert read_tournament_rows(file_name) == {('SEN A', 'Herresingle'): [SINGLES], ('SEN A', 'Herredouble'): [DOUBLES, LATE]}
+    assert store.is_tournament_done('2023/2024', 'Asker Open')
+
+
+def test_tab_no_longer_shown_is_removed(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoint.db'))
+    file_name = str(tmp_path / 'Asker Open_2023-2024.csv')
+    with TournamentSink(file_name) as sink:
+        sink.write([SINGLES, DOUBLES])
+
+    _, (added, removed) = refresh_run(store, file_name, {'Herresingle': page('21/15,21/17')}, {'Herresingle': [SINGLES]})
+
+    assert (added, removed) == ([], [DOUBLES])
+    assert read_tournament_rows(file_name) == {('SEN A', 'Herresingle'): [SINGLES]}
+
+
+def test_only_recent_tournaments_are_due(tmp_path):
+    file_name = str(tmp_path / 'Asker Open_2023-2024.csv')
+    with TournamentSink(file_name) as sink:
+        sink.write([SINGLES])
+
+    assert due_for_refresh(file_name, 30, today=datetime.date(2023, 12, 1))
+    assert not due_for_refresh(file_name, 30, today=datetime.date(2024, 1, 1))
+    assert due_for_refresh(file_name, None, today=datetime.date(2024, 1, 1))
+    # Never scraped: always due
+    assert due_for_refresh(str(tmp_path / 'missing.csv'), 30)
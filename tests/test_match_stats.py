@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from match_stats import match_table, parse_results
+
+
+def test_results_parse_into_set_scores():
+    team_1, team_2, sets = parse_results(['21/15,18/21,21/19', '21/9,21/11'])
+
+    assert team_1.tolist() == [[21, 18, 21], [21, 21, 0]]
+    assert team_2.tolist() == [[15, 21, 19], [9, 11, 0]]
+    assert sets.tolist() == [3, 2]
+
+
+def test_walkover_counts_no_sets():
+    team_1, team_2, sets = parse_results(['W.O.', None, ''])
+
+    assert team_1.tolist() == [[0, 0, 0]] * 3
+    assert team_2.tolist() == [[0, 0, 0]] * 3
+    assert sets.tolist() == [0, 0, 0]
+
+
+def test_retired_match_counts_the_sets_played():
+    # Retired during the second set: the score stops where play stopped
+    table = match_table(pd.DataFrame({'Result': ['21/15,3/1']}))
+
+    assert table['Sets Count'].tolist() == [2]
+    assert table['Team 1 Sets'].tolist() == [2]
+    assert table['Team 2 Sets'].tolist() == [0]
+    assert table['Team 1 Points'].tolist() == [24]
+    assert table['Team 2 Points'].tolist() == [16]
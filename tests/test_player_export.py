@@ -0,0 +1,21 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from player_export import shard_file_name, shard_of
+
+# FNV-1a hashes and shard files of playerStatsShard() in src/utils/processPlayerData.js
+SHARDS = {
+    '': (0x811c9dc5, 'c5.json'),
+    'Ola Nordmann': (514892512, 'e0.json'),
+    'Kari Nordmann': (2832680095, '9f.json'),
+    'Bjørn Ødegård': (291061601, '61.json'),
+    'Linnea Holmedal': (2264975106, '02.json'),
+    'Élise Lærkerød': (3879323432, '28.json'),
+}
+
+
+def test_shards_match_the_site():
+    for name, (hash_value, file_name) in SHARDS.items():
+        assert shard_of(name, 2 ** 32) == hash_value
+        assert shard_file_name(shard_of(name)) == file_name
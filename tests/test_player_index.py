@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'matches'))
+from match_store import COLUMNS, StoreWriter
+from player_index import PlayerIndex, TEAM_COLUMNS
+
+PLAYERS = ['Ola Nordmann', 'Kari Dahl', 'Per Hansen', 'Lise Berg', 'Jonas Lie']
+
+
+def write_store(path, batches=4, rows=25):
+    random = np.random.default_rng(1)
+    with StoreWriter(str(path)) as writer:
+        for batch in range(batches):
+            players = random.choice(PLAYERS, size=(rows, 4))
+            frame = pd.DataFrame({'Season': ['2022/2023', '2023/2024'] * (rows // 2) + ['2023/2024'] * (rows % 2),
+                                  'Tournament Name': f'Open {batch}', 'Date': '18.11.2023', 'Match': 'Herredouble',
+                                  'Result': '21/15,21/17'}, columns=COLUMNS)
+            frame[TEAM_COLUMNS] = players
+            frame['Winner Player 1'] = players[:, 0]
+            writer.write(frame)
+
+
+def scan(path, player, season=None):
+    data = pd.read_parquet(path)
+    mask = np.logical_or.reduce([(data[column] == player).to_numpy() for column in TEAM_COLUMNS])
+    if season is not None:
+        mask &= (data['Season'] == season).to_numpy()
+    return data[mask]
+
+
+def test_lookup_reads_only_the_players_rows(tmp_path):
+    path = tmp_path / 'matches.parquet'
+    write_store(path)
+    index = PlayerIndex(str(path))
+
+    for player in PLAYERS + ['Nobody']:
+        for season in [None, '2023/2024']:
+            found = index.matches(player, season)
+            expected = scan(path, player, season)
+            assert found.index.tolist() == expected.index.tolist()
+            assert found['Tournament Name'].astype(str).tolist() == expected['Tournament Name'].astype(str).tolist()
+            assert found[TEAM_COLUMNS].astype(str).values.tolist() == expected[TEAM_COLUMNS].astype(str).values.tolist()
+    assert index.store is None
+
+
+def test_whole_store_lookup_gives_the_same_rows(tmp_path):
+    path = tmp_path / 'matches.parquet'
+    write_store(path)
+    by_rows, whole = PlayerIndex(str(path)), PlayerIndex(str(path), whole_store=True)
+
+    for player in PLAYERS:
+        pd.testing.assert_frame_equal(by_rows.matches(player, '2022/2023'), whole.matches(player, '2022/2023'),
+                                      check_categorical=False)
+    assert whole.store is not None
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'viktig'))
+from match_parser import MATCH_TABS
+from waits import Waiter, content_settled, content_signature, tab_selected
+
+
+class FakeDriver:
+    """Answers the scripts of waits.py from a table that load() replaces after a delay."""
+
+    def __init__(self, table='', tab=None):
+        self.table = table
+        self.tab = tab
+        self.pending = None
+
+    def load(self, table, tab, delay):
+        self.pending = (time.perf_counter() + delay, table, tab)
+
+    def update(self):
+        if self.pending and time.perf_counter() >= self.pending[0]:
+            _, self.table, self.tab = self.pending
+            self.pending = None
+
+    def execute_script(self, script, *args):
+        self.update()
+        if 'readyState' in script:
+            return 'complete'
+        if 'jQuery' in script:
+            return self.pending is None
+        if 'innerHTML' in script:
+            return self.table
+        if 'elected' in script:
+            return [self.tab] if self.tab else []
+        raise AssertionError(script)
+
+
+def settled(driver, tab, settle=0.2):
+    return lambda: content_settled('table.matchlist', content_signature(driver, 'table.matchlist'),
+                                   shown=tab_selected(tab, MATCH_TABS), settle=settle)
+
+
+def test_changed_table_is_taken_when_loaded():
+    driver = FakeDriver('<tr>singles</tr>', 'Herresingle')
+    waiter = Waiter(driver, max_timeout=5, poll=0.02)
+
+    waiter.after('select_tab', lambda: driver.load('<tr>doubles</tr>', 'Herredouble', 0.1), settled(driver, 'Herredouble'))
+
+    assert driver.table == '<tr>doubles</tr>'
+
+
+def test_empty_tab_after_empty_tab_does_not_wait_out_the_timeout():
+    driver = FakeDriver('', 'Herresingle')
+    waiter = Waiter(driver, max_timeout=5, poll=0.02)
+
+    start = time.perf_counter()
+    waiter.after('select_tab', lambda: driver.load('', 'Damesingle', 0.1), settled(driver, 'Damesingle'))
+
+    assert time.perf_counter() - start < 2
+    assert waiter.stats.timeouts['select_tab'] == 0
+
+
+def test_tab_that_never_shows_raises_after_a_retry():
+    driver = FakeDriver('<tr>singles</tr>', 'Herresingle')
+    waiter = Waiter(driver, min_timeout=0.3, max_timeout=0.3, poll=0.02)
+    clicks = []
+
+    with pytest.raises(TimeoutException):
+        waiter.after('select_tab', lambda: clicks.append(1), settled(driver, 'Damesingle'))
+
+    assert len(clicks) == 2
+    assert waiter.stats.timeouts['select_tab'] == 2
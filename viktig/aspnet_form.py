@@ -0,0 +1,196 @@
+import re
+from urllib.parse import urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+# Drives an ASP.NET WebForms page over plain HTTP. Every step a browser takes by clicking
+# is a postback of the page's form with its hidden fields (__VIEWSTATE, __EVENTVALIDATION,
+# ...) copied from the last response and __EVENTTARGET/__EVENTARGUMENT naming the control.
+# Control names, postback targets and what the page scripts post are read from the page
+# itself, never assumed; a control that does something other than post back raises.
+#
+# Shared by viktig/http_scraper.py (tournament results) and rankinglister/ranking_http.py.
+
+POSTBACK = re.compile(r"__doPostBack\(\s*([^,]+?)\s*,\s*([^)]*?)\s*\)")
+# document.getElementById('X').value = ..., $get('X').value = ... and theForm.X.value = ...
+FIELD_ASSIGNMENT = re.compile(r"(?:(?:document\.getElementById|\$get)\(\s*['\"]([^'\"]+)['\"]\s*\)|"
+                              r"(?:theForm|document\.forms\[0\])\.(\w+))\.value\s*=\s*([^;\n]+)")
+# Panel DefaultButton: the button Enter in a text box clicks
+DEFAULT_BUTTON = re.compile(r"WebForm_FireDefaultButton\(\s*event\s*,\s*['\"]([^'\"]+)['\"]\s*\)")
+
+
+def form_fields(soup):
+    """{name: value} of the fields a browser submits with the page's form."""
+    fields = {}
+    for element in soup.find_all(['input', 'select', 'textarea']):
+        name = element.get('name')
+        if not name or element.has_attr('disabled'):
+            continue
+        if element.name == 'select':
+            option = element.find('option', selected=True) or element.find('option')
+            fields[name] = option.get('value', option.get_text()) if option is not None else ''
+        elif element.name == 'textarea':
+            fields[name] = element.get_text()
+        else:
+            kind = element.get('type', 'text').lower()
+            if kind in ('submit', 'button', 'image', 'reset', 'file'):
+                continue
+            if kind in ('checkbox', 'radio') and not element.has_attr('checked'):
+                continue
+            fields[name] = element.get('value', 'on' if kind in ('checkbox', 'radio') else '')
+    return fields
+
+
+def element_by_id(soup, element_id):
+    element = soup.find(id=element_id)
+    if element is None:
+        raise ValueError(f'No #{element_id} on the page')
+    return element
+
+
+def selected_value(select):
+    """Value of the selected option of a select element, or None."""
+    option = select.find('option', selected=True) if select is not None else None
+    return option.get('value') if option is not None else None
+
+
+def evaluate(expression, parameter=None, argument=None):
+    """Value of a script expression made of quoted strings, numbers and the function's parameter joined by '+'."""
+    value = ''
+    for piece in (piece.strip() for piece in expression.split('+')):
+        if len(piece) >= 2 and piece[0] == piece[-1] and piece[0] in '\'"':
+            value += piece[1:-1]
+        elif parameter is not None and piece == parameter:
+            value += str(argument)
+        elif re.fullmatch(r'\d+', piece):
+            value += piece
+        else:
+            raise ValueError(f'Cannot follow the script expression {expression!r}')
+    return value
+
+
+def element_postback(element):
+    """(event target, event argument) of an element that posts back from its href, onclick or onchange, or None."""
+    script = ' '.join(element.get(attribute, '') for attribute in ('href', 'onclick', 'onchange'))
+    # AutoPostBack controls escape the quotes: setTimeout('__doPostBack(\'name\',\'\')', 0)
+    found = POSTBACK.search(script.replace("\\'", "'"))
+    if found is None:
+        return None
+    return evaluate(found.group(1)), evaluate(found.group(2))
+
+
+def link_postback(soup, element_id):
+    """(event target, event argument) of a link that posts back from its href or onclick."""
+    postback = element_postback(element_by_id(soup, element_id))
+    if postback is None:
+        raise ValueError(f'#{element_id} does not post back')
+    return postback
+
+
+def script_body(source, function):
+    """(parameter name, body) of a page script function, or raise when the page has none."""
+    found = re.search(r'function\s+' + re.escape(function) + r'\s*\(\s*(\w*)\s*\)\s*\{', source)
+    if found is None:
+        raise ValueError(f'No {function}() script on the page')
+    depth, start = 1, found.end()
+    for position in range(start, len(source)):
+        depth += {'{': 1, '}': -1}.get(source[position], 0)
+        if depth == 0:
+            return found.group(1), source[start:position]
+    raise ValueError(f'Unterminated {function}() script')
+
+
+def script_postback(soup, source, function, argument):
+    """(field updates, event target, event argument) of calling a page script like SelectRankingList(n).
+
+    Follows scripts that set form fields by id or name and then call __doPostBack.
+    """
+    parameter, body = script_body(source, function)
+    fields = {}
+    for element_id, form_name, expression in FIELD_ASSIGNMENT.findall(body):
+        if element_id:
+            element = soup.find(id=element_id)
+            form_name = element.get('name', element_id) if element is not None else element_id
+        fields[form_name] = evaluate(expression, parameter, argument)
+    found = POSTBACK.search(body)
+    if found is None:
+        raise ValueError(f'{function}() does not post back')
+    return fields, evaluate(found.group(1), parameter, argument), evaluate(found.group(2), parameter, argument)
+
+
+class AspNetForm:
+    """One session on an ASP.NET page, posting its form back with the state of the last response."""
+
+    def __init__(self, session, url, timeout=30):
+        self.session = session
+        self.url = url
+        self.timeout = timeout
+        self.html = None
+        self.soup = None
+        self.pages = 0
+        self.script_sources = {}
+
+    def _load(self, response):
+        response.raise_for_status()
+        self.pages += 1
+        self.url = response.url or self.url
+        self.html = response.text
+        self.soup = BeautifulSoup(self.html, 'html.parser')
+        return self.soup
+
+    def restore(self, url, html):
+        """Carry on from a page loaded by another form, e.g. on a session that copied its cookies."""
+        self.url = url
+        self.html = html
+        self.soup = BeautifulSoup(html, 'html.parser')
+        return self.soup
+
+    def open(self, url=None):
+        return self._load(self.session.get(urljoin(self.url, url) if url else self.url, timeout=self.timeout))
+
+    def post(self, event_target, event_argument='', fields=None):
+        data = form_fields(self.soup)
+        data.update(fields or {})
+        data['__EVENTTARGET'] = event_target
+        data['__EVENTARGUMENT'] = event_argument
+        form = self.soup.find('form')
+        url = urljoin(self.url, form['action']) if form is not None and form.get('action') else self.url
+        return self._load(self.session.post(url, data=data, timeout=self.timeout))
+
+    def submit(self, text_box, fields=None):
+        """Press Enter in text_box: click its panel's default button, else the form's first submit button."""
+        data = dict(fields or {})
+        button = None
+        for holder in [text_box] + list(text_box.parents):
+            if holder.name == 'form':
+                break
+            found = DEFAULT_BUTTON.search(holder.get('onkeypress', ''))
+            if found:
+                button = element_by_id(self.soup, found.group(1))
+                postback = element_postback(button)
+                if postback is not None:
+                    return self.post(*postback, data)
+                break
+        if button is None:
+            button = self.soup.find(lambda tag: tag.name in ('input', 'button') and tag.get('type', '').lower() == 'submit')
+        if button is not None and button.get('name'):
+            data[button['name']] = button.get('value', '')
+        return self.post('', '', data)
+
+    def script_source(self):
+        """The page's inline scripts and the same-site scripts it loads, where the postback functions live."""
+        source = self.html
+        for script in self.soup.find_all('script', src=True):
+            url = urljoin(self.url, script['src'])
+            if urlsplit(url).hostname != urlsplit(self.url).hostname:
+                continue
+            if url not in self.script_sources:
+                response = self.session.get(url, timeout=self.timeout)
+                self.script_sources[url] = response.text if response.ok else ''
+            source += '\n' + self.script_sources[url]
+        return source
+
+    def call_script(self, function, argument):
+        """Post back what calling the page script function(argument) posts."""
+        fields, target, argument = script_postback(self.soup, self.script_source(), function, argument)
+        return self.post(target, argument, fields)
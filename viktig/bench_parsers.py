@@ -0,0 +1,72 @@
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rankinglister'))
+from match_parser import parse_match_rows, parse_tournament_header
+from ranking_parser import parse_ranking_grid
+
+# Compares the BeautifulSoup and lxml parser backends on saved pages (for example a
+# fixture directory written by the page recorder). Every page is parsed by both
+# backends, the outputs must be identical, and the total time per backend is reported.
+
+BACKENDS = ['bs4', 'lxml']
+
+
+def page_parsers(page_source):
+    """The parse calls that apply to a saved page, keyed by name."""
+    parsers = {}
+    if 'matchlist' in page_source:
+        parsers['match rows'] = lambda backend: parse_match_rows(page_source, 'season', 'tournament', 'date', 'class', 'tab', backend=backend)
+    if 'selectedtournamentspan' in page_source:
+        parsers['tournament header'] = lambda backend: parse_tournament_header(page_source, backend=backend)
+    if 'RankingListGrid' in page_source:
+        parsers['ranking grid'] = lambda backend: parse_ranking_grid(page_source, backend=backend)
+    return parsers
+
+
+def run(pages, repeat):
+    timings = {(name, backend): 0.0 for name in ['match rows', 'tournament header', 'ranking grid'] for backend in BACKENDS}
+    counts = dict.fromkeys(['match rows', 'tournament header', 'ranking grid'], 0)
+    mismatches = []
+    for path, page_source in pages:
+        for name, parse in page_parsers(page_source).items():
+            counts[name] += 1
+            outputs = {}
+            for backend in BACKENDS:
+                # The parsers print skipped rows; keep that out of the timings
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        outputs[backend] = parse(backend)
+                    timings[(name, backend)] += time.perf_counter() - start
+            if outputs['bs4'] != outputs['lxml']:
+                mismatches.append((path, name))
+
+    print(f"{'parser':<20}{'pages':>7}{'bs4 (s)':>10}{'lxml (s)':>10}{'speedup':>9}")
+    for name, count in counts.items():
+        if not count:
+            continue
+        bs4_time, lxml_time = timings[(name, 'bs4')], timings[(name, 'lxml')]
+        print(f"{name:<20}{count:>7}{bs4_time:>10.3f}{lxml_time:>10.3f}{bs4_time / lxml_time if lxml_time else 0:>8.1f}x")
+    for path, name in mismatches:
+        print('MISMATCH', name, path)
+    return not mismatches
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the bs4 and lxml parser backends on saved pages.')
+    parser.add_argument('page_dirs', nargs='+', help='directories of saved .html pages')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pages = []
+    for page_dir in args.page_dirs:
+        for path in sorted(glob.glob(os.path.join(page_dir, '*.html'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                pages.append((path, f.read()))
+    sys.exit(0 if run(pages, args.repeat) else 1)
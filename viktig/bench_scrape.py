@@ -0,0 +1,183 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rankinglister'))
+from match_parser import parse_match_rows, parse_tournament_header
+from page_recorder import read_manifest
+from ranking_parser import parse_ranking_grid
+
+# Throughput benchmark for the scraping pipeline on a recorded fixture directory
+# (see page_recorder.py), so it runs without network access.
+#
+#   python bench_scrape.py FIXTURE_DIR                 parse every recorded tournament
+#   python bench_scrape.py FIXTURE_DIR --http          replay it through fixture_server + HttpScraper
+#   python bench_scrape.py FIXTURE_DIR --save base.json
+#   python bench_scrape.py FIXTURE_DIR --compare base.json   exit 1 if throughput dropped
+
+
+def read_page(fixture_dir, entry):
+    with open(os.path.join(fixture_dir, entry['file']), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def group_entries(entries):
+    tournaments = OrderedDict()
+    rankings = OrderedDict()
+    for entry in entries:
+        if entry['kind'] in ('tournament', 'tab'):
+            group = tournaments.setdefault((entry['season'], entry['tournament']), {'page': None, 'tabs': []})
+            if entry['kind'] == 'tournament':
+                group['page'] = entry
+            else:
+                group['tabs'].append(entry)
+        elif entry['kind'] == 'ranking':
+            rankings.setdefault((entry['season'], entry['category']), []).append(entry)
+    return tournaments, rankings
+
+
+def parse_tournament(pages, season, tournament, backend):
+    rows = 0
+    for entry, page_source in pages:
+        if entry['kind'] == 'tournament':
+            parse_tournament_header(page_source, backend=backend)
+        else:
+            rows += len(parse_match_rows(page_source, season, tournament, '', entry['tournament_class'], entry['tab'], backend=backend))
+    return rows
+
+
+def measure(unit, pages, parse):
+    """Time one unit of work, then run it again under tracemalloc for its peak memory."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        rows = parse()
+        parse_seconds = time.perf_counter() - start
+        tracemalloc.start()
+        parse()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return dict(unit, pages=len(pages), bytes=sum(len(p.encode('utf-8')) for _, p in pages), rows=rows,
+                parse_seconds=parse_seconds, peak_kb=peak / 1024)
+
+
+def bench_parse(fixture_dir, entries, backend=None):
+    tournaments, rankings = group_entries(entries)
+    results = []
+    for (season, tournament), group in tournaments.items():
+        pages = [(e, read_page(fixture_dir, e)) for e in ([group['page']] if group['page'] else []) + group['tabs']]
+        results.append(measure({'kind': 'tournament', 'season': season, 'name': tournament}, pages,
+                               lambda: parse_tournament(pages, season, tournament, backend)))
+    for (season, category), ranking_entries in rankings.items():
+        pages = [(e, read_page(fixture_dir, e)) for e in ranking_entries]
+        results.append(measure({'kind': 'ranking', 'season': season, 'name': str(category)}, pages,
+                               lambda: sum(len(parse_ranking_grid(p, backend=backend)[1]) for _, p in pages)))
+    return results
+
+
+def bench_http(fixture_dir, entries, concurrency):
+    """Replay the recorded tournaments through the HTTP scraper against a local fixture server."""
+    from fixture_server import FixtureServer
+    from http_scraper import HttpScraper
+
+    tournaments, _ = group_entries(entries)
+    results = []
+    with FixtureServer(fixture_dir) as server:
+        scraper = HttpScraper(server.base_url, concurrency=concurrency)
+        try:
+            for (season, tournament), group in tournaments.items():
+                if group['page'] is None:
+                    continue
+                parts = urlsplit(group['page']['url'])
+                href = parts.path + ('?' + parts.query if parts.query else '')
+                pages_before, bytes_before = scraper.fetcher.pages, scraper.fetcher.bytes
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    rows = scraper.collect_tournament({'text': season}, {'name': tournament, 'href': href}) or []
+                    seconds = time.perf_counter() - start
+                results.append({'kind': 'http', 'season': season, 'name': tournament, 'pages': scraper.fetcher.pages - pages_before,
+                                'bytes': scraper.fetcher.bytes - bytes_before, 'rows': len(rows), 'parse_seconds': seconds, 'peak_kb': 0})
+        finally:
+            scraper.fetcher.close()
+    return results
+
+
+def summarise(results):
+    summary = {}
+    for kind in sorted({r['kind'] for r in results}):
+        subset = [r for r in results if r['kind'] == kind]
+        seconds = sum(r['parse_seconds'] for r in subset) or 1e-9
+        summary[kind] = {
+            'units': len(subset),
+            'pages': sum(r['pages'] for r in subset),
+            'rows': sum(r['rows'] for r in subset),
+            'seconds': seconds,
+            'pages_per_sec': sum(r['pages'] for r in subset) / seconds,
+            'rows_per_sec': sum(r['rows'] for r in subset) / seconds,
+            'mb_per_sec': sum(r['bytes'] for r in subset) / seconds / 1e6,
+            'max_peak_kb': max(r['peak_kb'] for r in subset),
+        }
+    return summary
+
+
+def print_report(results, summary, verbose):
+    if verbose:
+        print(f"{'kind':<11}{'season':<11}{'name':<40}{'pages':>6}{'rows':>7}{'ms':>9}{'peak KB':>9}")
+        for r in results:
+            print(f"{r['kind']:<11}{r['season']:<11}{r['name'][:39]:<40}{r['pages']:>6}{r['rows']:>7}"
+                  f"{r['parse_seconds'] * 1000:>9.1f}{r['peak_kb']:>9.0f}")
+        print()
+    print(f"{'kind':<11}{'units':>6}{'pages':>7}{'rows':>8}{'seconds':>9}{'pages/s':>9}{'rows/s':>10}{'MB/s':>7}{'peak KB':>9}")
+    for kind, s in summary.items():
+        print(f"{kind:<11}{s['units']:>6}{s['pages']:>7}{s['rows']:>8}{s['seconds']:>9.2f}{s['pages_per_sec']:>9.1f}"
+              f"{s['rows_per_sec']:>10.0f}{s['mb_per_sec']:>7.1f}{s['max_peak_kb']:>9.0f}")
+
+
+def compare(summary, baseline, tolerance):
+    """True if no kind lost more than tolerance of its baseline rows/sec."""
+    ok = True
+    for kind, s in summary.items():
+        if kind not in baseline:
+            continue
+        before = baseline[kind]['rows_per_sec']
+        change = (s['rows_per_sec'] - before) / before if before else 0
+        flag = 'REGRESSION' if change < -tolerance else 'ok'
+        ok = ok and flag == 'ok'
+        print(f"{kind:<11}rows/s {before:>10.0f} -> {s['rows_per_sec']:>10.0f} ({change:+.0%}) {flag}")
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark scraper parsing throughput on a recorded fixture directory.')
+    parser.add_argument('fixture_dir')
+    parser.add_argument('--backend', choices=['bs4', 'lxml'])
+    parser.add_argument('--http', action='store_true', help='also replay the tournaments through HttpScraper')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--verbose', action='store_true', help='print one line per tournament')
+    parser.add_argument('--save', help='write the summary to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON written by --save')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    entries = read_manifest(args.fixture_dir)
+    if not entries:
+        sys.exit(f'No {args.fixture_dir}/manifest.jsonl; record pages first (record_dir in playerMatchScrape usethis.py)')
+    results = bench_parse(args.fixture_dir, entries, args.backend)
+    if args.http:
+        results += bench_http(args.fixture_dir, entries, args.concurrency)
+    summary = summarise(results)
+    print_report(results, summary, args.verbose)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        sys.exit(0 if compare(summary, baseline, args.tolerance) else 1)
@@ -0,0 +1,288 @@
+import os
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import Select
+from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+
+from match_parser import MATCH_TABS, parse_tournament_header, parse_match_rows, tournament_file_name
+from waits import Waiter, content_settled, content_signature, document_ready, option_selected, tab_selected
+from checkpoint import CLASS_DONE
+from incremental import REFRESH_DAYS, TournamentRefresh, due_for_refresh
+from http_scraper import BASE_URL, FROM_DATE, class_tab_key, season_key
+from page_recorder import browser_page_url
+from row_sink import TournamentSink
+
+RESULTS_URL = 'https://badmintonportalen.no/NBF/Turnering/VisResultater/'
+
+TAB_XPATHS = [f"//a[normalize-space()='{tab}']" for tab in MATCH_TABS]
+
+CLASS_SELECT = 'select[onchange="return SelectTournamentClass1(this.value);"]'
+
+
+def make_driver(headless=False):
+    chrome_options = Options()
+    chrome_options.add_argument("--ignore-certificate-errors")
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1920,1080")
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    driver.get(RESULTS_URL)
+    if not headless:
+        driver.maximize_window()
+    driver.implicitly_wait(10)
+    return driver
+
+
+class BrowserScraper:
+    """Drives one Chrome window through the tournament result pages."""
+
+    def __init__(self, driver, recorder=None):
+        self.driver = driver
+        self.wait = WebDriverWait(driver, 10)
+        self.waiter = Waiter(driver)
+        # Optional page_recorder.PageRecorder that saves every page we parse
+        self.recorder = recorder
+
+    def seasons(self):
+        season_dropdown_menu = self.wait.until(EC.presence_of_element_located((By.ID, "DropDownListSeasonPlanSeason")))
+        season_dropdown = Select(season_dropdown_menu)
+        return [{'value': option.get_attribute('value'), 'text': option.text} for option in season_dropdown.options]
+
+    def apply_filters(self, season):
+        season_dropdown_menu = self.wait.until(EC.presence_of_element_located((By.ID, "DropDownListSeasonPlanSeason")))
+        season_dropdown = Select(season_dropdown_menu)
+        season_dropdown.select_by_value(season['value'])
+        self.waiter.until('select_season', document_ready)
+
+        def filter_tournaments():
+            date_input = self.wait.until(EC.presence_of_element_located((By.ID, "TextBoxSeasonPlanDate1")))
+            date_input.clear()
+            date_input.send_keys(FROM_DATE)
+            date_input.send_keys(Keys.RETURN)
+
+        self.waiter.after('filter_tournaments', filter_tournaments,
+                          lambda: content_settled('tr.row', content_signature(self.driver, 'tr.row'),
+                                                  shown=option_selected('#DropDownListSeasonPlanSeason', season['value'])))
+        if self.recorder:
+            self.recorder.record(season_key(BASE_URL, season['value']), self.driver.page_source, 'season', season=season['text'])
+
+    def tournament_rows(self):
+        return self.driver.find_elements(By.XPATH, '//tr[contains(@class, "row")]')
+
+    def open_tournament(self, tournament):
+        tournament.click()
+        self.waiter.until('open_tournament', EC.presence_of_element_located((By.CSS_SELECTOR, 'div.selectedtournamentspan h2')))
+
+    def reset(self, season):
+        self.driver.get(RESULTS_URL)
+        self.apply_filters(season)
+
+    def scrape(self, season, store, output_dir='.'):
+        """Scrape every tournament of the season that the checkpoint store has not finished."""
+        tournaments = self.tournament_rows()
+        for i in range(len(tournaments)):
+            try:
+                tournaments = self.tournament_rows()
+                tournament = tournaments[i]
+                try:
+                    tournament_name = tournament.find_element(By.XPATH, './td[@class="title"]').text
+                    formatted_tournament_name = tournament_name.replace(':', '').strip()
+                except NoSuchElementException:
+                    continue
+
+                if store.is_tournament_done(season['text'], formatted_tournament_name):
+                    continue  # skip if this tournament for this season has already been scraped
+                self.open_tournament(tournament)
+                print('SCRAPING ----> ', tournament_name)
+
+                unique_file_name = os.path.join(output_dir, tournament_file_name(formatted_tournament_name, season['text']))
+                self.scrape_with_checkpoint(season, formatted_tournament_name, unique_file_name, store)
+
+                self.reset(season)
+            except Exception as e:
+                print('Exception;', e)
+                continue
+
+    def refresh(self, season, store, output_dir='.', refresh_days=REFRESH_DAYS):
+        """Re-check the season's tournaments of the last refresh_days, re-parsing only tabs whose page changed.
+
+        Returns the (added, removed) rows for the delta file; see incremental.py.
+        """
+        added, removed = [], []
+        tournaments = self.tournament_rows()
+        for i in range(len(tournaments)):
+            try:
+                tournaments = self.tournament_rows()
+                tournament = tournaments[i]
+                try:
+                    tournament_name = tournament.find_element(By.XPATH, './td[@class="title"]').text
+                    formatted_tournament_name = tournament_name.replace(':', '').strip()
+                except NoSuchElementException:
+                    continue
+
+                unique_file_name = os.path.join(output_dir, tournament_file_name(formatted_tournament_name, season['text']))
+                if not due_for_refresh(unique_file_name, refresh_days):
+                    continue
+                self.open_tournament(tournament)
+                print('REFRESHING ----> ', tournament_name)
+
+                refresh = TournamentRefresh(store, season['text'], formatted_tournament_name, unique_file_name)
+                if self.scrape_tournament_details(season, refresh.write_rows, unchanged=refresh.unchanged):
+                    tournament_added, tournament_removed = refresh.finish()
+                    added.extend(tournament_added)
+                    removed.extend(tournament_removed)
+                    if tournament_added or tournament_removed:
+                        print('CHANGED ----> ', formatted_tournament_name, f'+{len(tournament_added)} -{len(tournament_removed)}')
+                else:
+                    # Nothing is written, so the next refresh looks at every tab again
+                    print('Incomplete, left for the next run:', formatted_tournament_name)
+
+                self.reset(season)
+            except Exception as e:
+                print('Exception;', e)
+                continue
+        return added, removed
+
+    def scrape_with_checkpoint(self, season, formatted_tournament_name, file_name, store):
+        """Scrape the open tournament, committing each tab so a killed run resumes at the next one."""
+        key = (season['text'], formatted_tournament_name)
+        sink = TournamentSink(file_name, resume_offset=store.resume_offset(*key))
+        if sink.resumed:
+            print('Resuming', sink.part_name)
+        else:
+            store.start_tournament(*key, file_name, sink.checkpoint())
+
+        def write_rows(tournament_class, match_name, rows):
+            sink.write(rows)
+            store.mark_tab_done(*key, tournament_class, match_name, len(rows), sink.checkpoint())
+
+        def skip(tournament_class, match_name):
+            if match_name is None:
+                return store.is_class_done(*key, tournament_class, MATCH_TABS)
+            return store.is_tab_done(*key, tournament_class, match_name)
+
+        try:
+            complete = self.scrape_tournament_details(season, write_rows, skip)
+        except BaseException:
+            sink.close()
+            raise
+        if not complete:
+            # The .part file and the finished tabs stay, so the next run only retries what did not load
+            sink.close()
+            print('Incomplete, left for the next run:', formatted_tournament_name)
+            return
+        sink.commit()
+        store.mark_tournament_done(*key, file_name)
+
+    def list_tournaments(self, season):
+        self.reset(season)
+        tournaments = []
+        for row in self.tournament_rows():
+            try:
+                title = row.find_element(By.XPATH, './td[@class="title"]').text
+            except NoSuchElementException:
+                continue
+            tournaments.append({'name': title.replace(':', '').strip(), 'href': None})
+        return tournaments
+
+    def collect_tournament(self, season, tournament):
+        """Open one tournament by name and return all of its match rows; None if it is not listed."""
+        self.reset(season)
+        for row in self.tournament_rows():
+            try:
+                title = row.find_element(By.XPATH, './td[@class="title"]').text
+            except NoSuchElementException:
+                continue
+            if title.replace(':', '').strip() == tournament['name']:
+                self.open_tournament(row)
+                rows = []
+                if not self.scrape_tournament_details(season, lambda tournament_class, match_name, tab_rows: rows.extend(tab_rows)):
+                    raise TimeoutException(f"{tournament['name']} did not load completely")
+                return rows
+        return None
+
+    def scrape_tournament_details(self, season, write_rows, skip=None, unchanged=None):
+        """Walk every class and tab of the open tournament, handing each tab's rows to write_rows.
+
+        skip(class, tab) lets a resumed run pass over finished work; tab is None to ask about the whole class.
+        unchanged(class, tab, page_source) lets a refresh keep the stored rows of a tab whose page has not changed.
+        A class or tab whose page does not load is left out without reaching write_rows; returns False if any was.
+        """
+        driver = self.driver
+        self.waiter.until('tournament_ready', document_ready)
+        page_source = driver.page_source
+        tournament_name, tournament_date = parse_tournament_header(page_source)
+        tournament_url = browser_page_url(driver.current_url)
+        if self.recorder:
+            self.recorder.record(tournament_url, page_source, 'tournament', season=season['text'], tournament=tournament_name)
+
+        try:
+            options_value_list = [{'value': option.get_attribute('value'), 'name': option.text}
+                                  for option in driver.find_elements(By.XPATH, "//select[@onchange='return SelectTournamentClass1(this.value);']/option")]
+        except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
+            print(f"No results found for {tournament_name}. Skipping...")
+            return True
+        complete = True
+        url = driver.current_url
+        for i in options_value_list:
+            if skip and skip(i['name'], None):
+                continue
+            tournament_class = i['name']
+            try:
+                url = url.split('#')[0]+'#'+i['value']
+                self.waiter.after('select_class', lambda: driver.get(url),
+                                  lambda: content_settled('body', content_signature(driver, 'body'),
+                                                          shown=option_selected(CLASS_SELECT, i['value'])))
+            except Exception as e:
+                print('Exception; ', e)
+                complete = False
+                continue
+            try:
+                WebDriverWait(driver, 7).until(
+                EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, 'Vis alle kamper')))
+            except TimeoutException:
+                print(f"No 'Alle kamper' button found for dropdown index {i}. Moving on to the next dropdown...")
+                write_rows(tournament_class, CLASS_DONE, [])
+                continue
+            try:
+                self.waiter.after('show_all_matches', lambda: driver.find_elements(By.XPATH, "//a[text()='Vis alle kamper']")[0].click(),
+                                  lambda: content_settled('table.matchlist', content_signature(driver, 'table.matchlist')))
+            except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
+                print(f"All matches of {tournament_class} did not load; left for the next run")
+                complete = False
+                continue
+
+            for xpath, match_name in zip(TAB_XPATHS, MATCH_TABS):
+                if skip and skip(tournament_class, match_name):
+                    continue
+                try:
+                    WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.XPATH, xpath)))
+                except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
+                    # The class has no such tab
+                    write_rows(tournament_class, match_name, [])
+                    continue
+                try:
+                    self.waiter.after('select_tab', lambda: driver.find_element(By.XPATH, xpath).click(),
+                                      lambda: content_settled('table.matchlist', content_signature(driver, 'table.matchlist'),
+                                                              shown=tab_selected(match_name, MATCH_TABS)))
+                except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
+                    # Parsing now would read the previous tab's table under this tab's name
+                    print(f"{match_name} of {tournament_class} did not load; left for the next run")
+                    complete = False
+                    continue
+                page_source = driver.page_source
+                if self.recorder:
+                    self.recorder.record(class_tab_key(tournament_url, i['value'], match_name), page_source, 'tab',
+                                         season=season['text'], tournament=tournament_name, tournament_class=tournament_class, tab=match_name)
+                if unchanged and unchanged(tournament_class, match_name, page_source):
+                    continue
+                write_rows(tournament_class, match_name,
+                           parse_match_rows(page_source, season['text'], tournament_name, tournament_date, tournament_class, match_name))
+        return complete
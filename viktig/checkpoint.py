@@ -0,0 +1,163 @@
+import sqlite3
+import threading
+import time
+
+# Scrape progress per season/tournament/class/tab, kept in SQLite so every update is a
+# transaction. The finished units are also held in sets for O(1) "already done?" checks.
+#
+# While a tournament is in progress its rows go to a row_sink.TournamentSink, and the
+# byte offset after each finished tab is committed together with that tab. A killed run
+# truncates the .part file back to the last committed offset and carries on with the
+# next tab.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tournaments (
+    season TEXT NOT NULL,
+    tournament TEXT NOT NULL,
+    status TEXT NOT NULL,
+    file_name TEXT,
+    committed_offset INTEGER,
+    updated REAL,
+    PRIMARY KEY (season, tournament)
+);
+CREATE TABLE IF NOT EXISTS tabs (
+    season TEXT NOT NULL,
+    tournament TEXT NOT NULL,
+    tournament_class TEXT NOT NULL,
+    tab TEXT NOT NULL,
+    rows INTEGER,
+    updated REAL,
+    PRIMARY KEY (season, tournament, tournament_class, tab)
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    season TEXT NOT NULL,
+    tournament TEXT NOT NULL,
+    tournament_class TEXT NOT NULL,
+    tab TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    updated REAL,
+    PRIMARY KEY (season, tournament, tournament_class, tab)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Tab name used to mark a whole class as finished, e.g. when it has no "Vis alle kamper"
+CLASS_DONE = ''
+
+
+class CheckpointStore:
+    def __init__(self, path='scrape_checkpoint.db', legacy_file=None):
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=FULL')
+        self.lock = threading.RLock()
+        self.conn.executescript(SCHEMA)
+        if legacy_file:
+            self.import_legacy(legacy_file)
+
+        self.done_tournaments = set(self.conn.execute("SELECT season, tournament FROM tournaments WHERE status = 'done'"))
+        self.done_tabs = set(self.conn.execute('SELECT season, tournament, tournament_class, tab FROM tabs'))
+
+    def transaction(self):
+        return _Transaction(self.conn, self.lock)
+
+    def import_legacy(self, legacy_file):
+        """Load a scraped_tournaments.csv ('<tournament> - <season>' per line) once."""
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_import'").fetchone():
+            return
+        entries = []
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if ' - ' in line:
+                        tournament, season = line.strip().rsplit(' - ', 1)
+                        entries.append((season, tournament, 'done', None, None, time.time()))
+        except FileNotFoundError:
+            pass
+        with self.transaction():
+            self.conn.executemany('INSERT OR IGNORE INTO tournaments VALUES (?, ?, ?, ?, ?, ?)', entries)
+            self.conn.execute("INSERT INTO meta VALUES ('legacy_import', ?)", (legacy_file,))
+
+    def is_tournament_done(self, season, tournament):
+        return (season, tournament) in self.done_tournaments
+
+    def is_tab_done(self, season, tournament, tournament_class, tab):
+        return (season, tournament, tournament_class, tab) in self.done_tabs
+
+    def is_class_done(self, season, tournament, tournament_class, tabs):
+        if self.is_tab_done(season, tournament, tournament_class, CLASS_DONE):
+            return True
+        return all(self.is_tab_done(season, tournament, tournament_class, tab) for tab in tabs)
+
+    def resume_offset(self, season, tournament):
+        """Committed file offset of an unfinished tournament, or None if it was never started."""
+        row = self.conn.execute("SELECT committed_offset FROM tournaments WHERE season = ? AND tournament = ? AND status = 'in_progress'",
+                                (season, tournament)).fetchone()
+        return row[0] if row else None
+
+    def start_tournament(self, season, tournament, file_name, header_offset):
+        with self.transaction():
+            self.conn.execute('DELETE FROM tabs WHERE season = ? AND tournament = ?', (season, tournament))
+            self.conn.execute('INSERT OR REPLACE INTO tournaments VALUES (?, ?, ?, ?, ?, ?)',
+                              (season, tournament, 'in_progress', file_name, header_offset, time.time()))
+        self.done_tabs = {t for t in self.done_tabs if t[:2] != (season, tournament)}
+
+    def mark_tab_done(self, season, tournament, tournament_class, tab, rows, committed_offset=None):
+        with self.transaction():
+            self.conn.execute('INSERT OR REPLACE INTO tabs VALUES (?, ?, ?, ?, ?, ?)',
+                              (season, tournament, tournament_class, tab, rows, time.time()))
+            if committed_offset is not None:
+                self.conn.execute('UPDATE tournaments SET committed_offset = ?, updated = ? WHERE season = ? AND tournament = ?',
+                                  (committed_offset, time.time(), season, tournament))
+        self.done_tabs.add((season, tournament, tournament_class, tab))
+
+    def mark_tournament_done(self, season, tournament, file_name=None):
+        with self.transaction():
+            self.conn.execute("""INSERT INTO tournaments VALUES (?, ?, 'done', ?, NULL, ?)
+                                 ON CONFLICT (season, tournament) DO UPDATE SET status = 'done', updated = excluded.updated""",
+                              (season, tournament, file_name, time.time()))
+            self.conn.execute('DELETE FROM tabs WHERE season = ? AND tournament = ?', (season, tournament))
+        self.done_tournaments.add((season, tournament))
+        self.done_tabs = {t for t in self.done_tabs if t[:2] != (season, tournament)}
+
+    def fingerprints(self, season, tournament):
+        """{(class, tab): digest} of the result pages seen on the last incremental run."""
+        rows = self.conn.execute('SELECT tournament_class, tab, digest FROM fingerprints WHERE season = ? AND tournament = ?',
+                                 (season, tournament))
+        return {(tournament_class, tab): digest for tournament_class, tab, digest in rows}
+
+    def save_fingerprints(self, season, tournament, fingerprints):
+        now = time.time()
+        with self.transaction():
+            self.conn.execute('DELETE FROM fingerprints WHERE season = ? AND tournament = ?', (season, tournament))
+            self.conn.executemany('INSERT INTO fingerprints VALUES (?, ?, ?, ?, ?, ?)',
+                                  [(season, tournament, c, t, digest, now) for (c, t), digest in fingerprints.items()])
+
+    def reset_tournament(self, season, tournament):
+        """Forget a tournament so the next run scrapes it again."""
+        with self.transaction():
+            self.conn.execute('DELETE FROM tournaments WHERE season = ? AND tournament = ?', (season, tournament))
+            self.conn.execute('DELETE FROM tabs WHERE season = ? AND tournament = ?', (season, tournament))
+        self.done_tournaments.discard((season, tournament))
+        self.done_tabs = {t for t in self.done_tabs if t[:2] != (season, tournament)}
+
+    def close(self):
+        self.conn.close()
+
+
+class _Transaction:
+    # The lock keeps threads sharing one store from interleaving their transactions
+    def __init__(self, conn, lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        self.conn.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.lock.release()
+
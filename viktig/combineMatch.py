@@ -1,28 +1,14 @@
-import csv
 import os
+import sys
 
-input_folder = r'C:\Users\Torstein\Documents\rankinglist-master (2)\rankinglist-master\badmintonstats\turneringer'
-output_file = 'all_matches_combined.csv'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'matches'))
+from ingest import build_store
+from match_store import STORE_PATH
 
-all_files = [f for f in os.listdir(input_folder) if f.endswith('.csv')]
+# Combines every per-tournament CSV into the match store (matches/matches.parquet)
+input_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'turneringer')
 
-# Create a list to store rows
-all_rows = []
-
-# Go through each file and read the content
-for file in all_files:
-    with open(os.path.join(input_folder, file), mode='r', encoding='ISO-8859-1') as infile:
-        reader = csv.reader(infile)
-        if not all_rows:  # if all_rows is empty, i.e., this is the first file being read
-            header = next(reader)  # read the header and skip to the next row
-        else:
-            next(reader)  # skip header row for subsequent files
-        for row in reader:
-            row = ['NaN' if value == '' else value for value in row]  # Replace empty strings with 'NaN'
-            all_rows.append(row)
-
-# Write the combined content to the output file
-with open(output_file, mode='w', newline='', encoding='ISO-8859-1') as outfile:
-    writer = csv.writer(outfile)
-    writer.writerow(header)  # Write header
-    writer.writerows(all_rows)  # Write rows
+# The guard keeps the worker processes of build_store from running this again where they are spawned (Windows)
+if __name__ == '__main__':
+    rows = build_store(input_folder, STORE_PATH)
+    print(f"Wrote {rows} matches to {STORE_PATH}")
@@ -0,0 +1,73 @@
+import argparse
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+
+# Saved pages are stored one file per URL, named after the quoted path and query,
+# so the same fixture directory can be served over HTTP or read straight from disk.
+
+
+def fixture_name(url):
+    parts = urlsplit(url)
+    key = parts.path or '/'
+    if parts.query:
+        key += '?' + parts.query
+    return quote(key, safe='') + '.html'
+
+
+def fixture_path(fixture_dir, url):
+    return os.path.join(fixture_dir, fixture_name(url))
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    fixture_dir = '.'
+
+    def do_GET(self):
+        path = fixture_path(self.fixture_dir, self.path)
+        if not os.path.exists(path):
+            self.send_error(404, 'No fixture for ' + self.path)
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Serve a directory of saved portal pages on localhost in a background thread."""
+
+    def __init__(self, fixture_dir, port=0):
+        handler = type('BoundFixtureHandler', (FixtureHandler,), {'fixture_dir': fixture_dir})
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve saved badmintonportalen pages for offline scraping.')
+    parser.add_argument('fixture_dir')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    with FixtureServer(args.fixture_dir, args.port) as server:
+        print('Serving fixtures on', server.base_url)
+        server.thread.join()
@@ -0,0 +1,426 @@
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from aspnet_form import AspNetForm, element_by_id, element_postback, selected_value
+from checkpoint import CheckpointStore
+from fixture_server import FixtureServer
+from incremental import REFRESH_DAYS, TournamentRefresh, due_for_refresh, write_delta
+from match_parser import MATCH_TABS, parse_class_options, parse_match_rows, parse_tournament_header, parse_tournament_list, tournament_file_name
+from page_recorder import browser_page_url
+from row_sink import TournamentSink
+
+# HTTP version of the browser scraper (browser_scraper.py), with the same CSV rows. It
+# runs in one of two modes:
+#
+#   live     against the portal. The results page is an ASP.NET form, so every click of
+#            the browser scraper is a postback of the last response's form (aspnet_form.py):
+#            season and date filter, tournament, class (the SelectTournamentClass1 script),
+#            'Vis alle kamper' and each tab. The pages of one tournament follow each other
+#            on their own session; tournaments run in parallel on a bounded pool. A
+#            response that does not show the season, class or tab asked for raises, and a
+#            control that does not post back (e.g. one that loads by script) raises too,
+#            instead of writing some other page's rows.
+#   replay   against fixture_server.py serving pages recorded by the browser scraper
+#            (page_recorder.py), for tests, benchmarks and re-parsing after parser changes.
+#            The season/class/tab keys below are only the names recorded pages are stored
+#            under; every page is fetched up front on a shared pooled session.
+#
+# With --incremental both modes refresh finished tournaments instead (incremental.py):
+# unchanged tabs keep their rows and changed ones go to a delta file.
+
+BASE_URL = 'https://badmintonportalen.no'
+RESULTS_PATH = '/NBF/Turnering/VisResultater/'
+
+# Date filter the Selenium scraper types into TextBoxSeasonPlanDate1
+FROM_DATE = '12.05.2011'
+
+# Controls of the results page, the same the browser scraper uses
+SEASON_SELECT = 'DropDownListSeasonPlanSeason'
+DATE_BOX = 'TextBoxSeasonPlanDate1'
+CLASS_SCRIPT = 'SelectTournamentClass1'
+SHOW_ALL = 'Vis alle kamper'
+
+# Query parameters of the fixture keys of a season list and of one class/tab of a tournament.
+# They name the dropdown value, the '#<class>' fragment and the tab the browser was on.
+SEASON_KEY_PARAMS = {'season': '{season}', 'date': FROM_DATE}
+CLASS_TAB_KEY_PARAMS = {'class': '{class_value}', 'tab': '{tab}'}
+
+
+def season_key(base_url, season_value):
+    """Fixture key of a recorded season list."""
+    params = {k: v.format(season=season_value) for k, v in SEASON_KEY_PARAMS.items()}
+    return base_url + RESULTS_PATH + '?' + urlencode(params)
+
+
+def class_tab_key(tournament_url, class_value, tab):
+    """Fixture key of a recorded class/tab page of a tournament."""
+    params = {k: v.format(class_value=class_value, tab=tab) for k, v in CLASS_TAB_KEY_PARAMS.items()}
+    page = tournament_url.split('#')[0]
+    separator = '&' if '?' in page else '?'
+    return page + separator + urlencode(params)
+
+
+def replay_url(base_url, href):
+    """The fixture server URL of a link on a recorded page, keyed like page_recorder stores it."""
+    parts = urlsplit(browser_page_url(urljoin(BASE_URL + RESULTS_PATH, href)))
+    return base_url + parts.path + ('?' + parts.query if parts.query else '')
+
+
+def is_live(base_url):
+    """True for the portal itself, False for a fixture server."""
+    return urlsplit(base_url).hostname == urlsplit(BASE_URL).hostname
+
+
+def link_by_text(soup, text):
+    """The first link whose whitespace-normalised text is text, like //a[normalize-space()='text']."""
+    return soup.find(lambda tag: tag.name == 'a' and ' '.join(tag.get_text().split()) == text)
+
+
+def marked_tabs(soup):
+    """The result tabs shown as selected: elements whose class contains 'selected' and whose text is a tab name."""
+    marked = soup.find_all(class_=lambda c: c is not None and 'selected' in c.lower())
+    return [text for text in (' '.join(element.get_text().split()) for element in marked) if text in MATCH_TABS]
+
+
+class ResultsForm(AspNetForm):
+    """One session on the tournament results page, taking the browser scraper's steps as postbacks."""
+
+    def __init__(self, session, base_url=BASE_URL, timeout=30):
+        super().__init__(session, base_url.rstrip('/') + RESULTS_PATH, timeout)
+
+    def select_season(self, value, from_date=FROM_DATE):
+        """Choose the season and press Enter in the date box, as BrowserScraper.apply_filters does."""
+        season = element_by_id(self.soup, SEASON_SELECT)
+        fields = {season.get('name', SEASON_SELECT): value}
+        # An AutoPostBack dropdown reloads the page on its own
+        postback = element_postback(season)
+        if postback is not None:
+            self.post(*postback, fields)
+        date_box = element_by_id(self.soup, DATE_BOX)
+        fields[date_box.get('name', DATE_BOX)] = from_date
+        postback = element_postback(date_box)
+        if postback is not None:
+            self.post(*postback, fields)
+        else:
+            self.submit(date_box, fields)
+        shown = selected_value(element_by_id(self.soup, SEASON_SELECT)), element_by_id(self.soup, DATE_BOX).get('value')
+        if shown != (value, from_date):
+            raise ValueError(f'Asked for season {value} from {from_date}, the page shows {shown[0]} from {shown[1]}')
+
+    def open_tournament(self, tournament):
+        """Follow a tournament of the season list, by its link or its postback."""
+        href = tournament['href']
+        postback = element_postback({'href': href}) if href.startswith('javascript:') else None
+        if postback is not None:
+            self.post(*postback)
+        elif href.startswith('#') or href.startswith('javascript:'):
+            raise ValueError(f"{tournament['name']} is opened by script ({href}), not by a link or a postback")
+        else:
+            self.open(href)
+        return parse_tournament_header(self.html)
+
+    def select_class(self, value):
+        self.call_script(CLASS_SCRIPT, value)
+        shown = selected_value(self.soup.find('select', attrs={'onchange': f'return {CLASS_SCRIPT}(this.value);'}))
+        if shown != value:
+            raise ValueError(f'Asked for class {value}, the page shows {shown}')
+
+    def follow(self, text):
+        """Post back the link with that text; False when the page has no such link."""
+        link = link_by_text(self.soup, text)
+        if link is None:
+            return False
+        postback = element_postback(link)
+        if postback is None:
+            raise ValueError(f"'{text}' does not post back")
+        self.post(*postback)
+        return True
+
+    def show_all_matches(self):
+        """Open the class's 'Vis alle kamper' list; False when the class has none."""
+        return self.follow(SHOW_ALL)
+
+    def select_tab(self, tab):
+        """Open a result tab; False when the class has no such tab."""
+        if not self.follow(tab):
+            return False
+        # Like waits.tab_selected, a page that marks no tab at all is taken at its word
+        marked = marked_tabs(self.soup)
+        if marked and tab not in marked:
+            raise ValueError(f'Asked for tab {tab}, the page shows {marked}')
+        return True
+
+
+def make_session(concurrency):
+    """A requests session whose connection pool is large enough for every worker."""
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency, max_retries=retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class Fetcher:
+    """Runs every page request on one bounded thread pool over a shared session."""
+
+    def __init__(self, session, concurrency, timeout=30):
+        self.session = session
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='fetch')
+        # Counters for benchmarks
+        self.lock = threading.Lock()
+        self.pages = 0
+        self.bytes = 0
+
+    def _get(self, url):
+        response = self.session.get(url, timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        with self.lock:
+            self.pages += 1
+            self.bytes += len(response.content)
+        return response.text
+
+    def submit(self, url):
+        return self.pool.submit(self._get, url)
+
+    def get(self, url):
+        return self.submit(url).result()
+
+    def close(self):
+        self.pool.shutdown()
+
+
+class HttpScraper:
+    def __init__(self, base_url, output_dir='.', store=None, concurrency=8, session=None, incremental=False, timeout=30,
+                 refresh_days=REFRESH_DAYS):
+        self.base_url = base_url.rstrip('/')
+        self.live = is_live(self.base_url)
+        self.output_dir = output_dir
+        self.store = store
+        self.concurrency = concurrency
+        self.fetcher = Fetcher(session or make_session(concurrency), concurrency, timeout)
+        # Live: (url, html, cookies) of each season's filtered list, which every tournament of it starts from
+        self.listings = {}
+        self.listing_lock = threading.Lock()
+        # Incremental mode revisits finished tournaments of the last refresh_days and only re-parses pages that changed
+        self.incremental = incremental
+        self.refresh_days = refresh_days
+        self.added = []
+        self.removed = []
+
+    def count(self, form):
+        with self.fetcher.lock:
+            self.fetcher.pages += form.pages
+
+    def season_listing(self, season):
+        """The live season list, filtered once per season like BrowserScraper.apply_filters."""
+        with self.listing_lock:
+            if season['value'] not in self.listings:
+                form = ResultsForm(make_session(1), self.base_url, self.fetcher.timeout)
+                try:
+                    form.open()
+                    form.select_season(season['value'])
+                finally:
+                    form.session.close()
+                    self.count(form)
+                self.listings[season['value']] = (form.url, form.html, form.session.cookies.copy())
+            return self.listings[season['value']]
+
+    def list_tournaments(self, season):
+        if self.live:
+            return parse_tournament_list(self.season_listing(season)[1])
+        listing = self.fetcher.get(season_key(self.base_url, season['value']))
+        if listing is None:
+            return []
+        return parse_tournament_list(listing)
+
+    def submit_tabs(self, tournament_url, page_source):
+        """Request every class/tab page up front so the pool can work on them in parallel."""
+        jobs = []
+        for option in parse_class_options(page_source):
+            for tab in MATCH_TABS:
+                jobs.append((option['name'], tab, self.fetcher.submit(class_tab_key(tournament_url, option['value'], tab))))
+        return jobs
+
+    def replay_pages(self, jobs):
+        for tournament_class, match_name, future in jobs:
+            try:
+                tab_source = future.result()
+            except requests.RequestException as e:
+                print('Exception; ', e)
+                tab_source = None
+            yield tournament_class, match_name, tab_source
+
+    def live_pages(self, form):
+        """Walk the open tournament like BrowserScraper.scrape_tournament_details, one postback at a time.
+
+        Classes without 'Vis alle kamper' and tabs the class does not have are left out.
+        """
+        try:
+            for option in parse_class_options(form.html):
+                form.select_class(option['value'])
+                if not form.show_all_matches():
+                    continue
+                for match_name in MATCH_TABS:
+                    if form.select_tab(match_name):
+                        yield option['name'], match_name, form.html
+        finally:
+            form.session.close()
+            self.count(form)
+
+    def tournament_pages(self, season, tournament):
+        """(name, date, pages) of a tournament, pages yielding (class, tab, page source) in scrape order.
+
+        The page source is None for a replayed page that is not recorded or did not load. Returns None
+        when the tournament page itself is missing.
+        """
+        if self.live:
+            url, html, cookies = self.season_listing(season)
+            session = make_session(1)
+            session.cookies.update(cookies)
+            form = ResultsForm(session, self.base_url, self.fetcher.timeout)
+            form.restore(url, html)
+            try:
+                tournament_name, tournament_date = form.open_tournament(tournament)
+            except Exception:
+                session.close()
+                self.count(form)
+                raise
+            return tournament_name, tournament_date, self.live_pages(form)
+
+        tournament_url = replay_url(self.base_url, tournament['href'])
+        page_source = self.fetcher.get(tournament_url)
+        if page_source is None:
+            return None
+        tournament_name, tournament_date = parse_tournament_header(page_source)
+        return tournament_name, tournament_date, self.replay_pages(self.submit_tabs(tournament_url, page_source))
+
+    def collect_tournament(self, season, tournament):
+        """Fetch and parse every class/tab of one tournament; None if the tournament page is missing."""
+        found = self.tournament_pages(season, tournament)
+        if found is None:
+            return None
+        tournament_name, tournament_date, pages = found
+
+        rows = []
+        for tournament_class, match_name, tab_source in pages:
+            if tab_source is None:
+                continue
+            rows.extend(parse_match_rows(tab_source, season['text'], tournament_name, tournament_date, tournament_class, match_name))
+        return rows
+
+    def refresh_tournament(self, tournament, season):
+        """Re-check a tournament against its stored page fingerprints and patch its CSV; returns (added, removed)."""
+        found = self.tournament_pages(season, tournament)
+        if found is None:
+            return [], []
+        tournament_name, tournament_date, pages = found
+
+        file_name = os.path.join(self.output_dir, tournament_file_name(tournament['name'], season['text']))
+        refresh = TournamentRefresh(self.store, season['text'], tournament['name'], file_name)
+        for tournament_class, match_name, tab_source in pages:
+            if tab_source is None:
+                # Not in the re-recorded directory or did not load: keep what we had and look again next time
+                refresh.keep(tournament_class, match_name)
+            elif not refresh.unchanged(tournament_class, match_name, tab_source):
+                refresh.write_rows(tournament_class, match_name, parse_match_rows(
+                    tab_source, season['text'], tournament_name, tournament_date, tournament_class, match_name))
+        return refresh.finish()
+
+    def scrape_tournament(self, tournament, season):
+        formatted_tournament_name = tournament['name']
+        rows = self.collect_tournament(season, tournament)
+        if rows is None:
+            print(f"No results found for {formatted_tournament_name}. Skipping...")
+            return 0
+
+        file_name = os.path.join(self.output_dir, tournament_file_name(formatted_tournament_name, season['text']))
+        with TournamentSink(file_name) as sink:
+            sink.write(rows)
+
+        if self.store:
+            self.store.mark_tournament_done(season['text'], formatted_tournament_name, file_name)
+        return len(rows)
+
+    def scrape_season(self, season):
+        if self.incremental:
+            pending = [t for t in self.list_tournaments(season) if due_for_refresh(
+                os.path.join(self.output_dir, tournament_file_name(t['name'], season['text'])), self.refresh_days)]
+            work = self.refresh_tournament
+        else:
+            pending = [t for t in self.list_tournaments(season)
+                       if not (self.store and self.store.is_tournament_done(season['text'], t['name']))]
+            work = self.scrape_tournament
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='tournament') as tournaments:
+            futures = [(t, tournaments.submit(work, t, season)) for t in pending]
+            for tournament, future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print('Exception;', e)
+                    continue
+                if self.incremental:
+                    added, removed = result
+                    self.added.extend(added)
+                    self.removed.extend(removed)
+                    if added or removed:
+                        print('CHANGED ----> ', tournament['name'], f'+{len(added)} -{len(removed)}')
+                else:
+                    print('SCRAPED ----> ', tournament['name'], result)
+
+    def scrape(self, seasons):
+        try:
+            for season in seasons:
+                self.scrape_season(season)
+        finally:
+            self.fetcher.close()
+        if self.incremental:
+            delta = write_delta(self.output_dir, self.added, self.removed)
+            print(f'{len(self.added)} rows added, {len(self.removed)} removed', '->', delta or 'no changes')
+
+
+def parse_season(value):
+    # '202024' -> {'value': '202024', 'text': '2024/2025'} like the season dropdown
+    if '=' in value:
+        value, text = value.split('=', 1)
+    else:
+        year = int(value[-4:])
+        text = f'{year}/{year + 1}'
+    return {'value': value, 'text': text}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scrape badmintonportalen tournaments into CSVs over HTTP, live or from recorded pages.')
+    parser.add_argument('seasons', nargs='+', help="season dropdown values, e.g. 202024 or '202024=2024/2025'")
+    parser.add_argument('--fixtures', help='replay this directory of pages recorded by page_recorder.py instead of the live site')
+    parser.add_argument('--base-url', default=BASE_URL, help='site to scrape live')
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--checkpoint', default='scrape_checkpoint.db')
+    parser.add_argument('--scraped', default='scraped_tournaments.csv', help='legacy checkpoint imported on first use')
+    parser.add_argument('--concurrency', type=int, default=8, help='tournaments (live) or pages (replay) fetched at once')
+    parser.add_argument('--incremental', action='store_true',
+                        help='refresh finished tournaments and write a delta file of changed rows')
+    parser.add_argument('--refresh-days', type=int, default=REFRESH_DAYS,
+                        help='with --incremental, skip tournaments dated more than this many days ago')
+    args = parser.parse_args()
+
+    store = CheckpointStore(args.checkpoint, legacy_file=args.scraped)
+    seasons = [parse_season(s) for s in args.seasons]
+    if args.fixtures:
+        with FixtureServer(args.fixtures) as server:
+            HttpScraper(server.base_url, args.output_dir, store, args.concurrency, incremental=args.incremental,
+                        refresh_days=args.refresh_days).scrape(seasons)
+    else:
+        HttpScraper(args.base_url, args.output_dir, store, args.concurrency, incremental=args.incremental,
+                    refresh_days=args.refresh_days).scrape(seasons)
@@ -0,0 +1,129 @@
+import csv
+import datetime
+import os
+import time
+from collections import Counter, defaultdict
+
+from match_parser import HEADER, matchlist_fingerprint
+from row_sink import TournamentSink
+
+# Incremental refresh of finished tournaments, shared by the browser scraper and the HTTP
+# scraper (live and replay). A refresh walks a tournament's tabs as usual, but a tab whose
+# matchlist fingerprint equals the one stored on the last run keeps its rows from the CSV
+# without being parsed. Changed tabs are re-parsed and diffed against the CSV, and the rows
+# added and removed across the run go to a delta_<time>.csv file.
+#
+# Finished tournaments older than the refresh window (by the Date column of their CSV) are
+# not opened at all, so a weekly refresh only walks the tournaments that can still change.
+
+# Days after a tournament during which a refresh still looks at it
+REFRESH_DAYS = 30
+
+
+def read_tournament_rows(file_name):
+    """Rows of an existing tournament CSV grouped by (Tournament Class, Match)."""
+    grouped = defaultdict(list)
+    try:
+        with open(file_name, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                grouped[(row[3], row[4])].append(row)
+    except FileNotFoundError:
+        pass
+    return grouped
+
+
+def diff_rows(old, new):
+    """(added, removed) between two lists of rows, counting repeated rows."""
+    old_counts = Counter(map(tuple, old))
+    new_counts = Counter(map(tuple, new))
+    added = [list(row) for row in (new_counts - old_counts).elements()]
+    removed = [list(row) for row in (old_counts - new_counts).elements()]
+    return added, removed
+
+
+def tournament_date(file_name):
+    """Date of a scraped tournament from the first row of its CSV, or None."""
+    try:
+        with open(file_name, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            row = next(reader, None)
+    except FileNotFoundError:
+        return None
+    try:
+        return datetime.datetime.strptime(row[2], '%d.%m.%Y').date()
+    except (TypeError, IndexError, ValueError):
+        return None
+
+
+def due_for_refresh(file_name, days=REFRESH_DAYS, today=None):
+    """True unless the tournament's CSV dates it more than days ago; None days refreshes everything."""
+    if days is None:
+        return True
+    date = tournament_date(file_name)
+    return date is None or date >= (today or datetime.date.today()) - datetime.timedelta(days=days)
+
+
+def write_delta(output_dir, added, removed):
+    """Write the rows added and removed by an incremental run; returns the file name or None."""
+    if not (added or removed):
+        return None
+    file_name = os.path.join(output_dir, time.strftime('delta_%Y%m%d_%H%M%S.csv'))
+    with open(file_name, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['Change'] + HEADER)
+        writer.writerows(['+'] + row for row in added)
+        writer.writerows(['-'] + row for row in removed)
+    return file_name
+
+
+class TournamentRefresh:
+    """Patches one finished tournament's CSV from its tabs as they are loaded again."""
+
+    def __init__(self, store, season_text, tournament, file_name):
+        self.store = store
+        self.key = (season_text, tournament)
+        self.file_name = file_name
+        self.old_rows = read_tournament_rows(file_name)
+        self.known = store.fingerprints(*self.key)
+        self.fingerprints = {}
+        self.rows = []
+        self.added = []
+        self.removed = []
+
+    def unchanged(self, tournament_class, match_name, page_source):
+        """Note the tab's fingerprint; True, keeping its stored rows, when the page is the same as last run."""
+        digest = matchlist_fingerprint(page_source)
+        self.fingerprints[(tournament_class, match_name)] = digest
+        if self.known.get((tournament_class, match_name)) != digest:
+            return False
+        self.keep(tournament_class, match_name)
+        return True
+
+    def keep(self, tournament_class, match_name):
+        """Keep the stored rows of a tab that could not be looked at, to look again next time."""
+        self.rows.extend(self.old_rows.pop((tournament_class, match_name), []))
+
+    def write_rows(self, tournament_class, match_name, rows):
+        """Take the freshly parsed rows of a changed tab, or of a tab the tournament no longer has."""
+        previous = self.old_rows.pop((tournament_class, match_name), [])
+        self.rows.extend(rows)
+        added, removed = diff_rows(previous, rows)
+        self.added.extend(added)
+        self.removed.extend(removed)
+
+    def finish(self):
+        """Rewrite the CSV if anything changed and store the new fingerprints; returns (added, removed)."""
+        # Classes or tabs that are no longer listed
+        for previous in self.old_rows.values():
+            self.removed.extend(previous)
+        self.old_rows.clear()
+
+        if self.added or self.removed or not os.path.exists(self.file_name):
+            with TournamentSink(self.file_name) as sink:
+                sink.write(self.rows)
+        self.store.save_fingerprints(*self.key, self.fingerprints)
+        self.store.mark_tournament_done(*self.key, self.file_name)
+        return self.added, self.removed
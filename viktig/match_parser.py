@@ -0,0 +1,199 @@
+import hashlib
+import re
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# Column layout of the per-tournament CSVs in turneringer/
+HEADER = ['Season', 'Tournament Name', 'Date', 'Tournament Class', 'Match', 'Tab', 'Team 1 Player 1', 'Team 1 Player 2', 'Team 2 Player 1', 'Team 2 Player 2', 'Result', 'Winner Player 1', 'Winner Player 2']
+
+# The result tabs shown under "Vis alle kamper"
+MATCH_TABS = ['Herresingle', 'Damesingle', 'Herredouble', 'Damedouble', 'Mixeddouble']
+
+# Parser used for the match tables: 'lxml' (precompiled XPath) when it is installed,
+# otherwise the original BeautifulSoup code. Both produce the same rows.
+DEFAULT_BACKEND = 'lxml' if lxml_html is not None else 'bs4'
+
+
+def tournament_file_name(formatted_tournament_name, season_text):
+    """Per-tournament CSV name, with the season appended."""
+    sanitized_name = re.sub(r'[<>:"/\\|?*]', '_', formatted_tournament_name)
+    return f"{sanitized_name}_{season_text.replace('/', '-')}.csv"
+
+
+def matchlist_fingerprint(page_source):
+    """Hash of the matchlist tables on a results page, so unchanged results can be detected without parsing."""
+    if page_source is None:
+        return ''
+    tables = re.findall(r'<table[^>]*class="[^"]*matchlist[^"]*".*?</table>', page_source, re.S)
+    return hashlib.sha1(''.join(tables).encode('utf-8')).hexdigest()
+
+
+def parse_tournament_list(page_source):
+    """Return the tournaments on a season result list as {'name', 'href'} dicts."""
+    tournaments = []
+    soup = BeautifulSoup(page_source, 'html.parser')
+    for row in soup.find_all('tr', class_=lambda c: c and 'row' in c):
+        title = row.find('td', class_='title')
+        if title is None:
+            continue
+        link = row.find('a', href=True)
+        if link is not None:
+            href = link['href']
+        else:
+            # Rows without an anchor navigate from their onclick handler, to a URL or by a postback
+            onclick = row.get('onclick', '')
+            found = re.search(r"['\"]([^'\"]*VisResultater[^'\"]*)['\"]", onclick)
+            postback = re.search(r"__doPostBack\([^)]*\)", onclick)
+            href = found.group(1) if found else 'javascript:' + postback.group(0) if postback else None
+        if href:
+            tournaments.append({'name': title.get_text().replace(':', '').strip(), 'href': href})
+    return tournaments
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if lxml_html is not None:
+    _HTML_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+    _HEADER_H2 = etree.XPath(f"(//div[{_has_class('selectedtournamentspan')}]//h2)[1]")
+    _MATCHLIST_TABLES = etree.XPath(f"//table[{_has_class('matchlist')}]")
+    _TABLE_ROWS = etree.XPath('.//tr')
+    _PLAYER_CELLS = etree.XPath(f".//td[{_has_class('player')}]")
+    _RESULT_CELL = etree.XPath(f"(.//td[{_has_class('result')}])[1]")
+    _ANCHORS = etree.XPath('.//a')
+
+
+def _lxml_document(page_source):
+    if isinstance(page_source, str):
+        page_source = page_source.encode('utf-8')
+    return lxml_html.fromstring(page_source, parser=_HTML_PARSER)
+
+
+def _stripped_text(element):
+    # Same as BeautifulSoup's get_text(strip=True)
+    return ''.join(piece.strip() for piece in element.itertext())
+
+
+def _class_list(element):
+    return element.get('class', '').split()
+
+
+def parse_tournament_header(page_source, backend=None):
+    """Return (tournament_name, tournament_date) from the selected tournament header."""
+    if (backend or DEFAULT_BACKEND) == 'lxml':
+        found = _HEADER_H2(_lxml_document(page_source))
+        header_text = found[0].text_content() if found else None
+    else:
+        soup = BeautifulSoup(page_source, 'html.parser')
+        tournament_info = soup.find('div', class_='selectedtournamentspan')
+        header_text = tournament_info.h2.text if tournament_info is not None and tournament_info.h2 is not None else None
+    if header_text is None:
+        raise AttributeError('No tournament header on page')
+    try:
+        tournament_name = header_text.split(' ', 1)[1]
+    except IndexError:
+        tournament_name = ''
+    tournament_date = header_text.split(' ', 1)[0]
+    return tournament_name, tournament_date
+
+
+def parse_class_options(page_source):
+    """Return the tournament classes as a list of {'value', 'name'} dicts."""
+    soup = BeautifulSoup(page_source, 'html.parser')
+    select = soup.find('select', attrs={'onchange': 'return SelectTournamentClass1(this.value);'})
+    if select is None:
+        return []
+    return [{'value': option.get('value'), 'name': option.get_text()} for option in select.find_all('option')]
+
+
+def match_row(season_text, tournament_name, tournament_date, tournament_class, match_name, winner_players, loser_players, result):
+    """One CSV row for a match, or None for walkovers and rows that are neither singles nor doubles."""
+    # Skip games with 'W.O.'
+    if 'W.O.' in result:
+        return None
+    if len(winner_players) == 2 and len(loser_players) == 2:  # Doubles
+        return [season_text, tournament_name, tournament_date, tournament_class, match_name, winner_players[0], winner_players[1], loser_players[0], loser_players[1], result, winner_players[0], winner_players[1]]
+    if len(winner_players) == 1 and len(loser_players) == 1:  # Singles
+        return [season_text, tournament_name, tournament_date, tournament_class, match_name, '', winner_players[0], '', loser_players[0], result, winner_players[0], '']
+    print(f"Skipping row with unexpected number of players. Winner Players: {winner_players}, Loser Players: {loser_players}")
+    return None
+
+
+def parse_match_rows(page_source, season_text, tournament_name, tournament_date, tournament_class, match_name, backend=None):
+    """Parse every 'matchlist' table on a results tab into CSV rows."""
+    context = (season_text, tournament_name, tournament_date, tournament_class, match_name)
+    if (backend or DEFAULT_BACKEND) == 'lxml':
+        matches = _matches_lxml(page_source)
+    else:
+        matches = _matches_bs4(page_source)
+    rows = []
+    for winner_players, loser_players, result in matches:
+        row = match_row(*context, winner_players, loser_players, result)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def _matches_bs4(page_source):
+    soup = BeautifulSoup(page_source, 'html.parser')
+
+    # Get all tables with class 'matchlist'
+    for table in soup.find_all('table', class_='matchlist'):
+        # Loop through each row in the table
+        for match in table.find_all('tr'):
+
+            # Check if the row has class 'headrow' and skip it
+            if 'headrow' in match.get('class', []):
+                continue  # skip header rows
+
+            # Get all td elements with class 'player'
+            players_td = match.find_all('td', class_='player')
+
+            # Check if there are at least 2 player TDs
+            if len(players_td) < 2:
+                print(f"Skipping row with less than 2 player TDs. Row: {match}")
+                continue
+
+            # Determine the winner and loser td
+            winner_td, loser_td = (players_td[0], players_td[1]) if 'winner' in players_td[0].get('class', []) else (players_td[1], players_td[0])
+
+            # Get the text content of all anchor tags within the winner and loser tds
+            winner_players = [a.get_text(strip=True) for a in winner_td.find_all('a')]
+            loser_players = [a.get_text(strip=True) for a in loser_td.find_all('a')]
+
+            # Find the result td and get its text content
+            result_td = match.find('td', class_='result')
+            if not result_td:
+                print(f"Skipping row with no result TD. Row: {match}")
+                continue
+
+            yield winner_players, loser_players, result_td.get_text(strip=True)
+
+
+def _matches_lxml(page_source):
+    # Same walk as _matches_bs4, with the selectors compiled once at import
+    for table in _MATCHLIST_TABLES(_lxml_document(page_source)):
+        for match in _TABLE_ROWS(table):
+            if 'headrow' in _class_list(match):
+                continue
+
+            players_td = _PLAYER_CELLS(match)
+            if len(players_td) < 2:
+                print(f"Skipping row with less than 2 player TDs. Row: {etree.tostring(match, encoding='unicode')}")
+                continue
+
+            winner_td, loser_td = (players_td[0], players_td[1]) if 'winner' in _class_list(players_td[0]) else (players_td[1], players_td[0])
+            winner_players = [_stripped_text(a) for a in _ANCHORS(winner_td)]
+            loser_players = [_stripped_text(a) for a in _ANCHORS(loser_td)]
+
+            result_td = _RESULT_CELL(match)
+            if not result_td:
+                print(f"Skipping row with no result TD. Row: {etree.tostring(match, encoding='unicode')}")
+                continue
+
+            yield winner_players, loser_players, _stripped_text(result_td[0])
@@ -0,0 +1,49 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import urlencode
+
+from fixture_server import fixture_name
+
+# Saves the raw page sources a scraper sees into a fixture directory, plus a
+# manifest.jsonl describing each page. Pages are stored under the fixture keys of
+# http_scraper.py (the live portal does not serve them at those URLs), so a recorded
+# directory can be replayed through fixture_server.py or read directly by bench_scrape.py.
+
+MANIFEST = 'manifest.jsonl'
+
+
+def browser_page_url(current_url):
+    """Turn a '...VisResultater/#<state>' browser URL into a plain URL that identifies the page."""
+    page, _, fragment = current_url.partition('#')
+    if not fragment:
+        return page
+    return page + ('&' if '?' in page else '?') + urlencode({'fragment': fragment})
+
+
+class PageRecorder:
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+        os.makedirs(fixture_dir, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def record(self, url, page_source, kind, **meta):
+        """Save one page; kind is 'season', 'tournament', 'tab' or 'ranking'."""
+        name = fixture_name(url)
+        with open(os.path.join(self.fixture_dir, name), 'w', encoding='utf-8') as f:
+            f.write(page_source)
+        entry = dict(meta, kind=kind, url=url, file=name, bytes=len(page_source.encode('utf-8')), recorded=time.time())
+        with self.lock, open(os.path.join(self.fixture_dir, MANIFEST), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def read_manifest(fixture_dir):
+    entries = []
+    try:
+        with open(os.path.join(fixture_dir, MANIFEST), 'r', encoding='utf-8') as f:
+            for line in f:
+                entries.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    return entries
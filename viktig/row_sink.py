@@ -0,0 +1,81 @@
+import csv
+import os
+
+from match_parser import HEADER
+
+# Output file for one tournament. The CSV stays open for the whole tournament and rows
+# are buffered and written in batches. Everything goes to '<file>.part', which is renamed
+# over the real file only when the tournament is finished, so turneringer/ never holds a
+# half-written CSV.
+#
+# checkpoint() flushes and returns the byte offset of the .part file, which the
+# CheckpointStore commits with each finished tab. A resumed run reopens the .part file
+# at that offset and carries on.
+
+PART_SUFFIX = '.part'
+
+
+class TournamentSink:
+    def __init__(self, file_name, header=HEADER, resume_offset=None, batch_rows=1000):
+        self.file_name = file_name
+        self.part_name = file_name + PART_SUFFIX
+        self.batch_rows = batch_rows
+        self.buffer = []
+        self.rows = 0
+        if resume_offset is not None and os.path.exists(self.part_name):
+            self.file = open(self.part_name, 'r+', newline='', encoding='utf-8', buffering=1 << 16)
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+            self.resumed = True
+        else:
+            self.file = open(self.part_name, 'w', newline='', encoding='utf-8', buffering=1 << 16)
+            self.resumed = False
+        self.writer = csv.writer(self.file)
+        if not self.resumed and header:
+            self.writer.writerow(header)
+
+    def write(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.batch_rows:
+            self.flush_buffer()
+
+    def flush_buffer(self):
+        try:
+            self.writer.writerows(self.buffer)
+        except Exception:
+            # Fall back to row by row so one bad row does not lose the batch
+            for row in self.buffer:
+                try:
+                    self.writer.writerow(row)
+                except Exception as e:  # Catch any other unexpected values and skip
+                    print(f"Error writing row. Error: {str(e)}")
+        self.rows += len(self.buffer)
+        self.buffer = []
+
+    def checkpoint(self):
+        """Write out buffered rows, fsync, and return the offset a resumed run can restart from."""
+        self.flush_buffer()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def commit(self):
+        """Finish the tournament: write everything and rename the .part file over the real one."""
+        self.checkpoint()
+        self.file.close()
+        os.replace(self.part_name, self.file_name)
+
+    def close(self):
+        """Stop without committing; the .part file is left for a resumed run."""
+        if not self.file.closed:
+            self.flush_buffer()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.close()
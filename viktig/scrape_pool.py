@@ -0,0 +1,144 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import queue
+
+from checkpoint import CheckpointStore
+from match_parser import HEADER
+
+# Spreads a scrape over several worker processes, each with its own browser (or its own
+# HTTP client, live or against a local fixture server in fixtures mode). Work is handed out
+# per (season, tournament); every worker appends finished tournaments to its own shard
+# file and only the coordinator writes to the checkpoint store.
+
+
+def open_backend(backend, options):
+    """Return (scraper, close) for a worker. Both backends offer list_tournaments/collect_tournament."""
+    if backend == 'browser':
+        from browser_scraper import BrowserScraper, make_driver
+        driver = make_driver(headless=True)
+        scraper = BrowserScraper(driver)
+
+        def close():
+            print(scraper.waiter.stats.summary())
+            driver.quit()
+        return scraper, close
+
+    from http_scraper import HttpScraper
+    scraper = HttpScraper(options['base_url'], concurrency=options['fetch_concurrency'])
+    return scraper, scraper.fetcher.close
+
+
+def shard_path(output_dir, worker_id):
+    return os.path.join(output_dir, f'shard_{worker_id}.csv')
+
+
+def append_to_shard(path, rows):
+    new_file = not os.path.exists(path)
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(HEADER)
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def worker(worker_id, backend, options, tasks, results):
+    scraper, close = open_backend(backend, options)
+    shard = shard_path(options['output_dir'], worker_id)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            kind, season, tournament = task
+            try:
+                if kind == 'list':
+                    results.put(('listed', worker_id, season, scraper.list_tournaments(season)))
+                else:
+                    rows = scraper.collect_tournament(season, tournament)
+                    if rows:
+                        append_to_shard(shard, rows)
+                    results.put(('scraped', worker_id, season, tournament, None if rows is None else len(rows)))
+            except Exception as e:
+                results.put(('failed', worker_id, season, tournament, repr(e)))
+    finally:
+        close()
+
+
+def run_pool(seasons, store, workers=os.cpu_count(), backend='browser', base_url=None, output_dir='.', fetch_concurrency=4):
+    os.makedirs(output_dir, exist_ok=True)
+    options = {'base_url': base_url, 'output_dir': output_dir, 'fetch_concurrency': fetch_concurrency}
+
+    ctx = multiprocessing.get_context('spawn')
+    tasks, results = ctx.Queue(), ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(i, backend, options, tasks, results)) for i in range(workers)]
+    for p in processes:
+        p.start()
+
+    for season in seasons:
+        tasks.put(('list', season, None))
+    pending = len(seasons)
+    scraped = failed = 0
+    try:
+        while pending:
+            try:
+                message = results.get(timeout=5)
+            except queue.Empty:
+                if not any(p.is_alive() for p in processes):
+                    print('All workers stopped with', pending, 'tasks left')
+                    break
+                continue
+            pending -= 1
+            kind, worker_id, season = message[:3]
+            if kind == 'listed':
+                for tournament in message[3]:
+                    if not store.is_tournament_done(season['text'], tournament['name']):
+                        tasks.put(('scrape', season, tournament))
+                        pending += 1
+            elif kind == 'scraped':
+                tournament, rows = message[3], message[4]
+                if rows is None:
+                    print(f"No results found for {tournament['name']}. Skipping...")
+                    continue
+                store.mark_tournament_done(season['text'], tournament['name'], shard_path(output_dir, worker_id))
+                scraped += 1
+                print(f'[worker {worker_id}] SCRAPED ----> ', tournament['name'], rows)
+            else:
+                failed += 1
+                print(f'[worker {worker_id}] Exception;', message[4])
+    finally:
+        for _ in processes:
+            tasks.put(None)
+        for p in processes:
+            p.join()
+    print(f'Scraped {scraped} tournaments, {failed} failed')
+    return scraped, failed
+
+
+if __name__ == '__main__':
+    from http_scraper import parse_season
+
+    parser = argparse.ArgumentParser(description='Scrape seasons in parallel across several headless browsers.')
+    parser.add_argument('seasons', nargs='+', help="season dropdown values, e.g. 202024 or '202024=2024/2025'")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--fixtures', help='scrape saved pages from this directory instead of the live site')
+    parser.add_argument('--http', action='store_true', help='scrape the live site over HTTP postbacks instead of browsers')
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--checkpoint', default='scrape_checkpoint.db')
+    parser.add_argument('--scraped', default='scraped_tournaments.csv', help='legacy checkpoint imported on first use')
+    args = parser.parse_args()
+    seasons = [parse_season(s) for s in args.seasons]
+    store = CheckpointStore(args.checkpoint, legacy_file=args.scraped)
+
+    if args.fixtures:
+        from fixture_server import FixtureServer
+        with FixtureServer(args.fixtures) as server:
+            run_pool(seasons, store, args.workers, 'fixtures', server.base_url, args.output_dir)
+    elif args.http:
+        from http_scraper import BASE_URL
+        run_pool(seasons, store, args.workers, 'http', BASE_URL, args.output_dir)
+    else:
+        run_pool(seasons, store, args.workers, 'browser', None, args.output_dir)
@@ -0,0 +1,182 @@
+import time
+from collections import defaultdict
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Shared wait layer for the Selenium scrapers. Instead of sleeping a fixed time after
+# every click we poll for the DOM change the click should cause, and keep timings
+# per step so a run can print where its time went.
+#
+# A wait that times out raises: reading the page anyway would parse the previous table
+# under the new class, tab or page. Waiter.after() runs the action once more before
+# giving up, and callers skip what did not load without marking it done.
+
+
+class LatencyStats:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.completed = defaultdict(list)
+        self.timeouts = defaultdict(int)
+
+    def record(self, step, seconds, timed_out=False):
+        self.samples[step].append(seconds)
+        if timed_out:
+            self.timeouts[step] += 1
+        else:
+            self.completed[step].append(seconds)
+
+    def percentile(self, step, q, completed_only=False):
+        values = sorted((self.completed if completed_only else self.samples)[step])
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def summary(self):
+        lines = [f"{'step':<24}{'count':>7}{'mean':>8}{'p50':>8}{'p95':>8}{'max':>8}{'timeouts':>10}"]
+        for step, values in sorted(self.samples.items()):
+            lines.append(f"{step:<24}{len(values):>7}{sum(values) / len(values):>8.2f}{self.percentile(step, 0.5):>8.2f}"
+                         f"{self.percentile(step, 0.95):>8.2f}{max(values):>8.2f}{self.timeouts[step]:>10}")
+        return '\n'.join(lines)
+
+
+class Waiter:
+    """Polls for a condition per step, with a timeout that adapts to how slow that step has been."""
+
+    def __init__(self, driver, min_timeout=2, max_timeout=10, poll=0.1, factor=4):
+        self.driver = driver
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.poll = poll
+        self.factor = factor
+        self.stats = LatencyStats()
+
+    def timeout_for(self, step):
+        # Only waits that succeeded say how long this step really needs
+        p95 = self.stats.percentile(step, 0.95, completed_only=True)
+        if p95 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p95 * self.factor))
+
+    def until(self, step, condition, required=True):
+        """Wait for condition; on timeout raise if required, otherwise return False."""
+        start = time.perf_counter()
+        try:
+            result = WebDriverWait(self.driver, self.timeout_for(step), poll_frequency=self.poll,
+                                   ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)).until(condition)
+        except TimeoutException:
+            self.stats.record(step, time.perf_counter() - start, timed_out=True)
+            if required:
+                raise
+            return False
+        self.stats.record(step, time.perf_counter() - start)
+        return result
+
+    def after(self, step, action, expect, retries=1):
+        """Run action() and wait for the condition expect() builds before it; on a timeout run it again, up to retries times.
+
+        expect is called before every attempt, so it can take the content signature the action must change.
+        """
+        for attempt in range(retries + 1):
+            condition = expect()
+            action()
+            try:
+                return self.until(step, condition)
+            except TimeoutException:
+                if attempt == retries:
+                    raise
+
+
+def document_ready(driver):
+    return driver.execute_script('return document.readyState') == 'complete'
+
+
+def requests_idle(driver):
+    """No jQuery request or ASP.NET async postback is in flight; always true on pages without them."""
+    return driver.execute_script(
+        'return !((window.jQuery && jQuery.active > 0) || (window.Sys && Sys.WebForms && Sys.WebForms.PageRequestManager'
+        ' && Sys.WebForms.PageRequestManager.getInstance().get_isInAsyncPostBack()));')
+
+
+def content_signature(driver, css_selector):
+    """innerHTML of the elements matching css_selector, used to detect when they are replaced."""
+    return driver.execute_script(
+        'return Array.from(document.querySelectorAll(arguments[0])).map(e => e.innerHTML).join("");', css_selector)
+
+
+class content_settled:
+    """The page has loaded the result of an action on the elements matching css_selector.
+
+    True as soon as they differ from the signature taken before the action. When they stay
+    the same, e.g. an empty tab after another empty tab, it is true once the page is idle
+    and they have not changed for settle seconds, instead of waiting out the timeout.
+    shown(driver), when given, must also hold: the page shows the class, tab or page asked for.
+    """
+
+    def __init__(self, css_selector, previous, shown=None, settle=0.5):
+        self.css_selector = css_selector
+        self.previous = previous
+        self.shown = shown
+        self.settle = settle
+        self.since = None
+        self.last = None
+
+    def __call__(self, driver):
+        if not document_ready(driver) or not requests_idle(driver):
+            self.since = None
+            return False
+        if self.shown is not None and not self.shown(driver):
+            self.since = None
+            return False
+        current = content_signature(driver, self.css_selector)
+        if current and current != self.previous:
+            return True
+        # Unchanged or empty: only once it has stayed that way for a while
+        now = time.perf_counter()
+        if self.since is None or current != self.last:
+            self.since, self.last = now, current
+        return now - self.since >= self.settle
+
+
+class option_selected:
+    """The select matching css_selector has value selected."""
+
+    def __init__(self, css_selector, value):
+        self.css_selector = css_selector
+        self.value = value
+
+    def __call__(self, driver):
+        selects = driver.find_elements(By.CSS_SELECTOR, self.css_selector)
+        return bool(selects) and selects[0].get_attribute('value') == self.value
+
+
+class tab_selected:
+    """No tab but name is marked selected among the elements whose class contains 'selected' and whose text is one of names.
+
+    Pages that mark no tab at all are taken at their word.
+    """
+
+    def __init__(self, name, names):
+        self.name = name
+        self.names = names
+
+    def __call__(self, driver):
+        marked = driver.execute_script(
+            'return Array.from(document.querySelectorAll("[class*=elected]")).map(e => e.textContent.trim());')
+        marked = [text for text in marked if text in self.names]
+        return not marked or self.name in marked
+
+
+class ranking_page_loaded:
+    """RankingListGrid shows page_number: the page has finished loading and that page is no longer a link."""
+
+    def __init__(self, page_number):
+        self.page_number = page_number
+
+    def __call__(self, driver):
+        if not document_ready(driver) or not requests_idle(driver):
+            return False
+        if not driver.find_elements(By.CLASS_NAME, 'RankingListGrid'):
+            return False
+        return not driver.find_elements(By.CSS_SELECTOR, f'a[onclick="return SelectRankingListPage({self.page_number});"]')